@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import IO, Any, Optional
+import asyncio
+import base64 as b64
+import collections
+import datetime as dt
+import gzip
+import hashlib
+import json
+import logging
+import pathlib
+import random
+
+import httpx
+
+from cs_tools.api import _transport
+
+log = logging.getLogger(__name__)
+
+# THE ARCHIVE FORMAT, WRITTEN IN THE FIRST LINE OF EVERY CASSETTE.
+CASSETTE_VERSION = 1
+
+# AUTHENTICATION REQUESTS CARRY CREDENTIALS, SO THEY ARE MATCHED ON THEIR PATH ALONE.
+_MATCHED_ON_PATH = (
+    "api/rest/2.0/auth/",
+    "callosum/v1/tspublic/v1/session/auth/token",
+    "callosum/v1/tspublic/v1/session/login",
+)
+
+# THESE RESPONSES CARRY TOKENS, SO THEIR TOKENS ARE REDACTED BEFORE THEY ARE RECORDED.
+_RESPONSE_REDACTED = (
+    "api/rest/2.0/auth/token/",
+    "api/rest/2.0/auth/session/token",
+    "callosum/v1/tspublic/v1/session/auth/token",
+)
+
+# STANDS IN FOR A TOKEN IN THE RECORDED RESPONSE.
+_REDACTED_TOKEN = "REDACTED"
+
+# SESSION COOKIES WOULD OTHERWISE BE REPLAYED TO WHOEVER HOLDS THE ARCHIVE.
+_HEADERS_NOT_RECORDED = _transport._HEADERS_NOT_STORED | {b"set-cookie"}
+
+# A FAULT WHICH IS NOT AN HTTP STATUS CODE RAISES ONE OF THESE INSTEAD.
+_FAULT_ERRORS: dict[str, type[httpx.TransportError]] = {
+    "timeout": httpx.ReadTimeout,
+    "disconnect": httpx.RemoteProtocolError,
+}
+
+
+async def exchange_key(request: httpx.Request) -> str:
+    """Identify the request within a cassette, the same way the HTTP cache does."""
+    if any(fragment in request.url.path for fragment in _MATCHED_ON_PATH):
+        return hashlib.blake2b(f"{request.method} {request.url.path}".encode(), digest_size=20).hexdigest()
+
+    return await _transport.CachePolicy.build_cache_key(request)
+
+
+def redact_tokens(content: bytes) -> bytes:
+    """Replace the token in an authentication response, keeping the rest of its body."""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        # A BARE TOKEN, RATHER THAN A JSON DOCUMENT.
+        return _REDACTED_TOKEN.encode()
+
+    if not isinstance(data, dict):
+        return _REDACTED_TOKEN.encode()
+
+    redacted = {key: _REDACTED_TOKEN if key == "token" else value for key, value in data.items()}
+    return json.dumps(redacted).encode()
+
+
+class FaultProfile:
+    """
+    Inject failures into a replayed session, reproducibly.
+
+    Each rate is the chance a single request fails that way, keyed by an HTTP status code
+    (eg. "429") or a transport error ("timeout", "disconnect").
+    """
+
+    def __init__(self, rates: dict[str, float], *, seed: int = 0):
+        for fault, rate in rates.items():
+            if not fault.isdigit() and fault not in _FAULT_ERRORS:
+                raise ValueError(f"fault must be an HTTP status code or one of {sorted(_FAULT_ERRORS)}, got '{fault}'")
+
+            if not 0 <= rate <= 1:
+                raise ValueError(f"rate for '{fault}' must be between 0 and 1, got {rate}")
+
+        self.rates = rates
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_string(cls, profile: str, *, seed: int = 0) -> FaultProfile:
+        """Parse a profile like '429=0.05,timeout=0.01'."""
+        rates: dict[str, float] = {}
+
+        for entry in filter(None, (part.strip() for part in profile.split(","))):
+            fault, _, rate = entry.partition("=")
+            rates[fault.strip().lower()] = float(rate)
+
+        return cls(rates, seed=seed)
+
+    def choose(self) -> Optional[str]:
+        """Pick the fault, if any, for the next request."""
+        roll = self._random.random()
+
+        for fault, rate in self.rates.items():
+            if roll < rate:
+                return fault
+
+            roll -= rate
+
+        return None
+
+
+class _TeeStream(httpx.AsyncByteStream):
+    """
+    Pass a response body through as it is read, keeping a copy for the cassette.
+
+    Only the recorded copy is held in memory, until the exchange is written. A body which is
+    closed early is read to its end first, so the cassette can replay it in full.
+    """
+
+    def __init__(self, response: httpx.Response, *, on_complete: Callable[[bytes], Awaitable[None]]):
+        self._response = response
+        self._chunks: list[bytes] = []
+        self._iterator: Optional[AsyncIterator[bytes]] = None
+        self._on_complete = on_complete
+        self._failed = False
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self._iterator is None:
+            self._iterator = self._response.aiter_bytes()
+
+        try:
+            async for chunk in self._iterator:
+                self._chunks.append(chunk)
+                yield chunk
+
+        # NOT GeneratorExit, WHICH ONLY MEANS THE READER STOPPED EARLY.
+        except (Exception, asyncio.CancelledError):
+            self._failed = True
+            raise
+
+    async def aclose(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+
+        try:
+            # A BODY WHICH FAILED PART WAY THROUGH CANNOT BE REPLAYED, THE RETRY WHICH FOLLOWS IT IS RECORDED INSTEAD.
+            if not self._failed:
+                async for _ in self:
+                    pass
+
+        finally:
+            await self._response.aclose()
+
+        if not self._failed:
+            await self._on_complete(b"".join(self._chunks))
+
+
+class CassetteRecorder:
+    """Record every exchange sent through the transport, appending each to a compact archive as it happens."""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self.recorded = 0
+        self._archive: Optional[IO[str]] = None
+        self._write_lock = asyncio.Lock()
+        self._finished = False
+
+    async def record(self, request: httpx.Request, response: httpx.Response, *, elapsed: float) -> httpx.Response:
+        """Hand back an equivalent response, remembering the exchange once its body has been read."""
+        key = await exchange_key(request)
+        redacted = any(fragment in request.url.path for fragment in _RESPONSE_REDACTED)
+
+        async def remember(content: bytes) -> None:
+            headers = [(k, v) for k, v in response.headers.raw if k.lower() not in _HEADERS_NOT_RECORDED]
+
+            exchange = {
+                "key": key,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": response.status_code,
+                "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers],
+                "content": b64.b64encode(redact_tokens(content) if redacted else content).decode(),
+                "elapsed": round(elapsed, 4),
+            }
+
+            # ONE EXCHANGE AT A TIME, SO LINES FROM CONCURRENT REQUESTS NEVER INTERLEAVE.
+            async with self._write_lock:
+                # REOPENING A FINISHED ARCHIVE WOULD TRUNCATE IT.
+                if self._finished:
+                    log.warning(f"{request.method} {request.url.path} was read after the recording ended, not recorded")
+                    return
+
+                await asyncio.to_thread(self._write, exchange)
+                self.recorded += 1
+
+        # THE CALLER READS THE (DECODED) BODY AS IT ARRIVES, SO A STREAMED RESPONSE STAYS STREAMED.
+        return type(response)(
+            status_code=response.status_code,
+            headers=[(k, v) for k, v in response.headers.raw if k.lower() not in _transport._HEADERS_NOT_STORED],
+            stream=_TeeStream(response, on_complete=remember),
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def _open(self) -> IO[str]:
+        if self._archive is None:
+            header = {"version": CASSETTE_VERSION, "recorded_at": dt.datetime.now(tz=dt.timezone.utc).isoformat()}
+            self._archive = gzip.open(self.path, "wt", encoding="utf-8")
+            self._archive.write(json.dumps(header, separators=(",", ":")) + "\n")
+
+        return self._archive
+
+    def _write(self, exchange: dict[str, Any]) -> None:
+        self._open().write(json.dumps(exchange, separators=(",", ":")) + "\n")
+
+    def _close(self) -> None:
+        self._open().close()
+        self._archive = None
+
+    async def aclose(self) -> None:
+        """Finish the archive."""
+        async with self._write_lock:
+            await asyncio.to_thread(self._close)
+            self._finished = True
+
+        log.info(f"Recorded {self.recorded:,} HTTP exchanges to {self.path}")
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Answer requests from a recorded cassette, with no cluster attached.
+
+    Identical requests are answered in the order they were recorded, and the last answer
+    repeats once they run out. Requests which were never recorded receive a 404.
+    """
+
+    def __init__(self, path: pathlib.Path, *, latency_scale: float = 0.0, faults: Optional[FaultProfile] = None):
+        self.path = path
+        self.latency_scale = latency_scale
+        self.faults = faults
+        self.stats: collections.Counter[str] = collections.Counter()
+        self._exchanges: dict[str, collections.deque[dict[str, Any]]] = collections.defaultdict(collections.deque)
+
+        with gzip.open(path, "rt", encoding="utf-8") as archive:
+            header = json.loads(next(archive))
+
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+
+            for line in archive:
+                exchange = json.loads(line)
+                self._exchanges[exchange["key"]].append(exchange)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Replay the recorded response."""
+        key = await exchange_key(request)
+
+        if not (recorded := self._exchanges.get(key)):
+            self.stats["misses"] += 1
+            log.warning(f"No recorded exchange for {request.method} {request.url.path}, replying with HTTP 404")
+            return httpx.Response(status_code=404, json={"error": "not in cassette"}, request=request)
+
+        exchange = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        self.stats["hits"] += 1
+
+        if self.latency_scale:
+            await asyncio.sleep(exchange["elapsed"] * self.latency_scale)
+
+        if self.faults is not None and (fault := self.faults.choose()) is not None:
+            self.stats[f"fault_{fault}"] += 1
+
+            if fault in _FAULT_ERRORS:
+                raise _FAULT_ERRORS[fault](f"Injected fault: {fault}", request=request)
+
+            return httpx.Response(status_code=int(fault), request=request)
+
+        return httpx.Response(
+            status_code=exchange["status_code"],
+            headers=[(k.encode("latin-1"), v.encode("latin-1")) for k, v in exchange["headers"]],
+            content=b64.b64decode(exchange["content"]),
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        """Report how the replay went."""
+        log.debug(f"HTTP replay statistics: {dict(self.stats)}")
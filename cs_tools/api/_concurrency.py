@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Callable
+from typing import Any, Optional
+import asyncio
+import collections
+import contextlib
+import functools as ft
+import logging
+import math
+import time
+
+import httpx
+
+log = logging.getLogger(__name__)
+
+# ROUTES A REQUEST TO A NAMED CONCURRENCY POOL, REGARDLESS OF ITS PATH.
+CONCURRENCY_POOL_HEADER = "x-cs-tools-concurrency-pool"
+
+# EXPENSIVE ENDPOINT CLASSES EACH GET A POOL, SO ONE CLASS CANNOT HOLD EVERY SLOT WHILE CHEAP CALLS QUEUE BEHIND IT.
+DEFAULT_POOL_ROUTES = {
+    "metadata/tml/": "tml",
+    "api/rest/2.0/searchdata": "data",
+    "security/metadata/permissions": "permissions",
+    "security/metadata/fetch-permissions": "permissions",
+    "security/principals/fetch-permissions": "permissions",
+}
+
+# EACH EXPENSIVE POOL MAY USE AT MOST THIS SHARE OF THE TRANSPORT'S CONCURRENCY.
+DEFAULT_POOL_SHARE = 0.25
+
+# SETS A REQUEST'S PLACE IN THE QUEUE, REGARDLESS OF ITS PATH.
+PRIORITY_HEADER = "x-cs-tools-priority"
+
+# WAITING REQUESTS ARE SERVED STRICTLY IN THIS ORDER, FIRST-COME FIRST-SERVED WITHIN A PRIORITY.
+PRIORITIES = ("control", "normal", "background")
+
+# SESSION KEEPALIVE AND AUTHENTICATION MUST NEVER WAIT BEHIND A BULK CRAWL, OR THE SESSION EXPIRES MID-RUN.
+DEFAULT_PRIORITY_ROUTES = {
+    "api/rest/2.0/auth/": "control",
+    "callosum/v1/session/isactive": "control",
+    "callosum/v1/tspublic/v1/session/": "control",
+}
+
+# SLOTS ABOVE THE LIMIT WHICH ONLY CONTROL-PLANE REQUESTS MAY USE.
+DEFAULT_RESERVED_SLOTS = 1
+
+# FAST ENDPOINTS JITTER BY MULTIPLES OF THEIR TYPICAL LATENCY, WHICH SHOULD NOT READ AS PRESSURE.
+_MIN_LATENCY_SPIKE_SECONDS = 1.0
+
+
+def mark_pool(name: str) -> Callable:
+    """Route an HTTPX endpoint to a named concurrency pool by injecting the pool header."""
+
+    def decorator(fn: Callable) -> Callable:
+        @ft.wraps(fn)
+        def wrapper(self: Any, *a: Any, headers: httpx._types.HeaderTypes | None = None, **kw: Any) -> Any:
+            if headers is None:
+                headers = {}
+
+            headers[CONCURRENCY_POOL_HEADER] = name  # type: ignore[index]
+            return fn(self, *a, headers=headers, **kw)
+
+        return wrapper
+
+    return decorator
+
+
+def default_pools(ceiling: int) -> dict[str, int]:
+    """Size the default pools against the transport's concurrency."""
+    share = max(1, math.floor(ceiling * DEFAULT_POOL_SHARE))
+    return dict.fromkeys(DEFAULT_POOL_ROUTES.values(), share)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit concurrent requests with an AIMD (additive increase, multiplicative decrease) policy.
+
+    The limit starts at the ceiling and behaves like an asyncio.Semaphore until the server
+    signals pressure, either by status code (429/502/503/504), a timeout, or a latency much
+    slower than is typical for that endpoint. The limit is then cut multiplicatively, and
+    recovers by roughly one slot for every full window of healthy responses.
+
+    Waiters are served by priority (see PRIORITIES), and `reserved` slots above the limit
+    are held back for "control" requests alone.
+    """
+
+    def __init__(
+        self,
+        ceiling: int,
+        *,
+        floor: int = 1,
+        initial: Optional[int] = None,
+        backoff_ratio: float = 0.5,
+        latency_spike_ratio: float = 4.0,
+        reserved: int = 0,
+    ):
+        if ceiling < 1:
+            raise ValueError("ceiling must be at least one")
+
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.backoff_ratio = backoff_ratio
+        self.latency_spike_ratio = latency_spike_ratio
+        self._limit = float(ceiling if initial is None else max(self.floor, min(initial, ceiling)))
+        self.reserved = reserved
+        self._in_flight = 0
+        self._waiters: dict[str, collections.deque[asyncio.Future[None]]] = {
+            priority: collections.deque() for priority in PRIORITIES
+        }
+        self._typical_latency: dict[str, float] = {}
+        # A FULL WINDOW HAS "ALREADY PASSED", SO AN OVERLOADED CLUSTER IS BACKED OFF FROM AT THE VERY FIRST SIGNAL.
+        self._completions_since_backoff = ceiling
+        self.acquired = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def limit(self) -> int:
+        """The number of requests currently allowed to run at once."""
+        return max(self.floor, math.floor(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        """The number of requests currently running."""
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        """The number of requests queued for a slot."""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _has_capacity(self, priority: str) -> bool:
+        return self._in_flight < self.limit + (self.reserved if priority == "control" else 0)
+
+    async def acquire(self, priority: str = "normal") -> None:
+        """Wait for a slot, by priority and then first-come first-served."""
+        if priority not in self._waiters:
+            raise ValueError(f"priority must be one of {PRIORITIES}, got '{priority}'")
+
+        self.acquired += 1
+        ahead = PRIORITIES[: PRIORITIES.index(priority) + 1]
+
+        if not any(self._waiters[p] for p in ahead) and self._has_capacity(priority):
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        start = time.perf_counter()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # A SLOT MAY HAVE BEEN HANDED TO US JUST BEFORE WE WERE CANCELLED, SO PASS IT ON.
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._waiters[priority].remove(waiter)
+            raise
+        finally:
+            self.wait_seconds += time.perf_counter() - start
+
+    def release(self) -> None:
+        """Return a slot, handing it directly to the next waiter."""
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+
+            while waiters and self._has_capacity(priority):
+                waiter = waiters.popleft()
+
+                if waiter.done():
+                    continue
+
+                self._in_flight += 1
+                waiter.set_result(None)
+
+            # A LOWER PRIORITY NEVER JUMPS AHEAD OF ONE STILL WAITING.
+            if waiters:
+                return
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: str = "normal") -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block."""
+        await self.acquire(priority)
+
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, *, endpoint: str, latency: Optional[float] = None, pressured: bool = False) -> None:
+        """Feed the outcome of a single request back into the limit."""
+        typical = self._typical_latency.get(endpoint)
+
+        if latency is not None and not pressured:
+            if typical is not None and latency > max(typical * self.latency_spike_ratio, _MIN_LATENCY_SPIKE_SECONDS):
+                pressured = True
+
+            # AN EXPONENTIALLY WEIGHTED AVERAGE, SO THE BASELINE FOLLOWS THE SERVER'S NORMAL PACE.
+            self._typical_latency[endpoint] = latency if typical is None else (0.9 * typical) + (0.1 * latency)
+
+        self._completions_since_backoff += 1
+
+        if pressured:
+            self._backoff()
+        else:
+            self._limit = min(float(self.ceiling), self._limit + (1 / self._limit))
+            self._wake_waiters()
+
+    def _backoff(self) -> None:
+        # ONE BURST OF FAILURES SHOULD ONLY COUNT ONCE, SO WAIT FOR A FULL WINDOW BEFORE CUTTING AGAIN.
+        if self._completions_since_backoff < self.limit:
+            return
+
+        self._completions_since_backoff = 0
+        self._limit = max(float(self.floor), self._limit * self.backoff_ratio)
+        log.debug(f"Server is under pressure, reducing concurrent requests to {self.limit} (max: {self.ceiling})")
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.release()
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from typing import Optional
+import asyncio
+import collections
+import logging
+import time
+
+import httpx
+
+from cs_tools.api import _retry, _telemetry, _transport
+
+log = logging.getLogger(__name__)
+
+# SET ON A RESPONSE WHOSE REQUEST WAS HEDGED, NAMING WHICH COPY ANSWERED FIRST ("primary" OR "hedge").
+HEDGE_HEADER = "x-cs-tools-hedged"
+
+# READ-ONLY ENDPOINTS WHICH ARE NOT CACHEABLE, BUT ARE STILL SAFE TO SEND TWICE.
+DEFAULT_HEDGE_ROUTES = ("api/rest/2.0/searchdata",)
+
+_Sender = Callable[[httpx.Request], Awaitable[httpx.Response]]
+
+
+class HedgePolicy:
+    """
+    Send a duplicate of a slow, idempotent read, and take whichever response arrives first.
+
+    A request is hedged once it has been outstanding for longer than the `percentile` latency
+    observed for its endpoint. Like the RetryBudget, every request deposits `ratio` tokens and
+    every hedge withdraws one, so only around `ratio` of requests are ever sent twice.
+    """
+
+    def __init__(
+        self,
+        *,
+        percentile: float = 95.0,
+        ratio: float = 0.05,
+        reserve: float = 5.0,
+        capacity: float = 20.0,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        routes: tuple[str, ...] = DEFAULT_HEDGE_ROUTES,
+    ):
+        if not 0 < percentile < 100:
+            raise ValueError(f"percentile must be between 0 and 100, got {percentile}")
+
+        self.percentile = percentile
+        self.ratio = ratio
+        self.capacity = max(capacity, reserve)
+        self.tokens = reserve
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.routes = routes
+        self.latency: dict[str, _telemetry.LatencyHistogram] = collections.defaultdict(_telemetry.LatencyHistogram)
+        self.stats: collections.Counter[str] = collections.Counter()
+
+    def is_hedgeable(self, request: httpx.Request) -> bool:
+        """Determine if the request only reads, and may safely be sent twice."""
+        if _retry._is_retry_unsafe(request):
+            return False
+
+        # A STREAMED UPLOAD CAN ONLY BE SENT ONCE.
+        if not isinstance(request.stream, httpx.ByteStream):
+            return False
+
+        if request.method == "GET" or _transport.CachePolicy.CACHE_CONTROL_HEADER in request.headers:
+            return True
+
+        return any(fragment in request.url.path for fragment in self.routes)
+
+    def delay_for(self, endpoint: str) -> Optional[float]:
+        """Determine how long to wait on the endpoint before hedging, once enough is known about it."""
+        if (histogram := self.latency.get(endpoint)) is None or histogram.count < self.min_samples:
+            return None
+
+        return max(self.min_delay, histogram.percentile(self.percentile))
+
+    def _withdraw(self) -> bool:
+        if self.tokens < 1:
+            self.stats["budget_exhausted"] += 1
+            return False
+
+        self.tokens -= 1
+        return True
+
+    async def _timed(self, endpoint: str, send: _Sender, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        response = await send(request)
+        self.latency[endpoint].record(time.perf_counter() - start)
+        return response
+
+    async def send(self, request: httpx.Request, *, send: _Sender, send_hedge: _Sender) -> httpx.Response:
+        """Send the request, and a duplicate of it if the first copy is slow to answer."""
+        if not self.is_hedgeable(request):
+            return await send(request)
+
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+        endpoint = _telemetry.RequestTelemetry.endpoint_for(request)
+
+        # TAKEN BEFORE SENDING, THE TRANSPORT ATTACHES ITS CONNECTION TRACE TO THE ORIGINAL.
+        extensions = dict(request.extensions)
+        primary = asyncio.ensure_future(self._timed(endpoint, send, request))
+
+        if (delay := self.delay_for(endpoint)) is None:
+            return await primary
+
+        # UNLIKE AWAITING IT, WAITING ON THE PRIMARY DOES NOT CANCEL IT ALONG WITH THE CALLER.
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+
+        if done or not self._withdraw():
+            return await primary
+
+        duplicate = httpx.Request(
+            request.method, request.url, headers=request.headers, content=request.content, extensions=extensions
+        )
+        hedge = asyncio.ensure_future(self._timed(endpoint, send_hedge, duplicate))
+        self.stats["hedges_sent"] += 1
+
+        winner = await self._race(primary, hedge)
+        response = winner.result()
+        response.headers[HEDGE_HEADER] = "primary" if winner is primary else "hedge"
+
+        if winner is hedge:
+            self.stats["hedges_won"] += 1
+
+        return response
+
+    @staticmethod
+    async def _race(primary: asyncio.Future, hedge: asyncio.Future) -> asyncio.Future:
+        """Wait for the first copy to answer, then abandon the other."""
+        pending = {primary, hedge}
+        winner: Optional[asyncio.Future] = None
+
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                # ON A TIE, THE PRIMARY WINS. A COPY WHICH FAILED IS ONLY USED IF THE OTHER FAILS TOO.
+                for task in sorted(done, key=lambda t: t is not primary):
+                    if task.exception() is None:
+                        winner = task
+                        break
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if winner is None:
+            return primary
+
+        loser = hedge if winner is primary else primary
+
+        if loser.done() and not loser.cancelled() and loser.exception() is None:
+            await loser.result().aclose()
+
+        return winner
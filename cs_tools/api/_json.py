@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from types import ModuleType
+from typing import Any, Optional, Union
+import functools as ft
+import json
+import logging
+import re
+
+import httpx
+
+log = logging.getLogger(__name__)
+
+# THE ACCELERATED DECODERS ARE OPTIONAL, AND INSTALLED WITH: pip install cs_tools[speedups]
+orjson: Optional[ModuleType]
+msgspec: Optional[ModuleType]
+
+try:
+    # https://github.com/ijl/orjson
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+try:
+    # https://jcristharif.com/msgspec/
+    import msgspec
+except ModuleNotFoundError:
+    msgspec = None
+
+# THE FASTEST DECODER AVAILABLE IN THIS ENVIRONMENT, FOR LOGGING.
+DECODER = "orjson" if orjson is not None else "msgspec" if msgspec is not None else "json"
+
+# OUTSIDE OF A STRING, ONLY THESE BYTES CHANGE WHERE AN ARRAY ELEMENT BEGINS OR ENDS.
+_STRUCTURAL = re.compile(rb'[\[\]{}",]')
+
+# INSIDE OF A STRING, ONLY THESE BYTES MATTER.
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+
+def _fast_loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+
+    return json.loads(data)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Deserialize a JSON document, with the fastest decoder available."""
+    try:
+        return _fast_loads(data)
+
+    # THE ACCELERATED DECODERS REJECT A FEW THINGS THE STDLIB ALLOWS (eg. NaN). NOTE THAT orjson DECODES INTEGERS
+    # WIDER THAN 64 BITS AS FLOATS, WHICH NO ThoughtSpot API RETURNS.
+    except ValueError:
+        return json.loads(data)
+
+
+@ft.cache
+def _typed_decoder(type_: Any) -> Any:
+    assert msgspec is not None, "msgspec is not installed."
+    return msgspec.json.Decoder(type_)
+
+
+def loads_as(data: Union[bytes, str], *, shape: Any) -> Any:
+    """
+    Deserialize a JSON document which is expected to have the given shape.
+
+    When msgspec is available, the shape is checked while decoding (in a single pass), and
+    a mismatch raises ValueError. Otherwise this is the same as loads().
+    """
+    if msgspec is None:
+        return loads(data)
+
+    try:
+        return _typed_decoder(shape).decode(data)
+    except msgspec.ValidationError as e:
+        raise ValueError(f"JSON document does not match {shape}: {e}") from None
+    except msgspec.DecodeError:
+        return json.loads(data)
+
+
+class JSONResponse(httpx.Response):
+    """An httpx.Response which decodes its body with the fastest JSON decoder available."""
+
+    def json(self, **kwargs: Any) -> Any:
+        # ONLY THE STDLIB UNDERSTANDS ITS OWN DECODING OPTIONS.
+        if kwargs:
+            return super().json(**kwargs)
+
+        return loads(self.content)
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> JSONResponse:
+        """Adopt a response, without reading its body."""
+        if isinstance(response, cls):
+            return response
+
+        adopted = cls(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=response.stream,
+            extensions=response.extensions,
+            request=response._request,
+        )
+
+        # A RESPONSE BUILT FROM CONTENT HAS ALREADY BEEN READ.
+        if hasattr(response, "_content"):
+            adopted._content = response._content
+
+        return adopted
+
+
+class ArraySplitter:
+    """
+    Split a top-level JSON array into the raw bytes of its elements, as the document arrives.
+
+    Only structural bytes are inspected, and consumed bytes are dropped, so memory is bounded
+    by the largest single element rather than the whole document.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._element_start: Optional[int] = None
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Add the next chunk of the document, returning every element it completed."""
+        if self.finished:
+            if chunk.strip():
+                raise ValueError("Unexpected data after the end of the JSON array")
+            return []
+
+        self._buffer += chunk
+        elements: list[bytes] = []
+        buffer = self._buffer
+
+        while not self.finished:
+            if self._in_string:
+                if (match := _STRING_SPECIAL.search(buffer, self._position)) is None:
+                    self._position = len(buffer)
+                    break
+
+                # AN ESCAPE NEEDS THE BYTE AFTER IT, WHICH MAY NOT HAVE ARRIVED YET.
+                if match.group() == b"\\":
+                    if match.end() >= len(buffer):
+                        self._position = match.start()
+                        break
+
+                    self._position = match.end() + 1
+                    continue
+
+                self._in_string = False
+                self._position = match.end()
+                continue
+
+            if (match := _STRUCTURAL.search(buffer, self._position)) is None:
+                self._position = len(buffer)
+                break
+
+            token = match.group()
+            self._position = match.end()
+
+            if self._depth == 0 and (token != b"[" or buffer[: match.start()].strip()):
+                raise ValueError("Expected the JSON document to be an array")
+
+            if token == b'"':
+                self._in_string = True
+
+            elif token in b"[{":
+                if self._depth == 0:
+                    self._element_start = match.end()
+
+                self._depth += 1
+
+            elif token in b"]}":
+                self._depth -= 1
+
+                if self._depth == 0:
+                    self._emit(elements, end=match.start())
+                    self.finished = True
+
+            elif self._depth == 1:
+                self._emit(elements, end=match.start())
+                self._element_start = match.end()
+
+        self._compact()
+        return elements
+
+    def _emit(self, elements: list[bytes], *, end: int) -> None:
+        assert self._element_start is not None
+        element = bytes(self._buffer[self._element_start : end]).strip()
+
+        if element:
+            elements.append(element)
+
+    def _compact(self) -> None:
+        # EVERYTHING BEFORE THE CURRENT ELEMENT HAS BEEN HANDED OUT ALREADY.
+        drop = self._position if self._element_start is None or self.finished else self._element_start
+
+        if drop:
+            del self._buffer[:drop]
+            self._position -= drop
+
+            if self._element_start is not None:
+                self._element_start -= drop
+
+    def close(self) -> None:
+        """Ensure the whole document was seen."""
+        if not self.finished:
+            raise ValueError("The JSON array ended before it was closed")
+
+
+async def aiter_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Decode each element of a top-level JSON array, as soon as its bytes arrive."""
+    splitter = ArraySplitter()
+
+    async for chunk in chunks:
+        for element in splitter.feed(chunk):
+            yield loads(element)
+
+    splitter.close()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from typing import Any
+from typing import Any, Optional
+import datetime as dt
+import email.utils
 import functools as ft
 import logging
 
@@ -22,6 +24,21 @@ _NON_IDEMPOTENT_PATH_FRAGMENTS = (
 )
 
 
+# STATUSES WHICH MEAN THE SERVER (OR A GATEWAY IN FRONT OF IT) IS TEMPORARILY OVERWHELMED.
+SERVER_PRESSURE_STATUSES = frozenset(
+    {
+        httpx.codes.TOO_MANY_REQUESTS,  # 429
+        httpx.codes.SERVICE_UNAVAILABLE,  # 503
+        httpx.codes.BAD_GATEWAY,  # 502
+        httpx.codes.GATEWAY_TIMEOUT,  # 504
+    }
+)
+
+
+# HONOR A SERVER'S Retry-After UP TO THE SAME CAP AS OUR OWN BACKOFF, A LONGER ASK IS TREATED AS A FAILURE.
+RETRY_AFTER_MAX_SECONDS = 30.0
+
+
 def mark_nonidempotent(fn: Callable) -> Callable:
     """Mark an HTTPX endpoint as unsafe to re-send by injecting the non-idempotent header."""
 
@@ -89,17 +106,94 @@ def request_errors_unless_importing_tml(exception: BaseException) -> bool:
     return False
 
 
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse the Retry-After header, which is either a number of seconds or an HTTP-date."""
+    if (value := response.headers.get("Retry-After")) is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=dt.timezone.utc)
+
+    return max(0.0, (retry_at - dt.datetime.now(tz=dt.timezone.utc)).total_seconds())
+
+
 def if_server_is_under_pressure(response: httpx.Response) -> bool:
     """Retry the request if the server signals transient pressure, unless re-sending is unsafe."""
-    transient_pressure_statuses = {
-        httpx.codes.TOO_MANY_REQUESTS,  # 429
-        httpx.codes.SERVICE_UNAVAILABLE,  # 503
-        httpx.codes.BAD_GATEWAY,  # 502
-        httpx.codes.GATEWAY_TIMEOUT,  # 504
-    }
+    if response.status_code not in SERVER_PRESSURE_STATUSES:
+        return False
 
-    if response.status_code not in transient_pressure_statuses:
+    # THE SERVER TOLD US HOW LONG IT NEEDS, AND IT IS LONGER THAN WE ARE WILLING TO HOLD A SLOT FOR.
+    if (retry_after := retry_after_seconds(response)) is not None and retry_after > RETRY_AFTER_MAX_SECONDS:
         return False
 
     # A GATEWAY GIVING UP DOES NOT MEAN THE SERVER STOPPED WORKING ON THE REQUEST.
     return not _is_retry_unsafe(response.request)
+
+
+class wait_retry_after(tenacity.wait.wait_base):
+    """Wait as long as the server's Retry-After header asks, otherwise fall back to another strategy."""
+
+    def __init__(self, fallback: tenacity.wait.wait_base):
+        self.fallback = fallback
+
+    def __call__(self, retry_state: tenacity.RetryCallState) -> float:
+        outcome = retry_state.outcome
+
+        if outcome is not None and not outcome.failed:
+            r = outcome.result()
+
+            if isinstance(r, httpx.Response) and (seconds := retry_after_seconds(r)) is not None:
+                return min(seconds, RETRY_AFTER_MAX_SECONDS)
+
+        return self.fallback(retry_state)
+
+
+class RetryBudget(tenacity.retry_base):
+    """
+    Limit retries to a fraction of successful requests, with a token bucket.
+
+    Every successful response deposits `ratio` tokens, and every retry withdraws one.
+    The bucket starts with `reserve` tokens so a healthy client can ride out an early
+    blip, and never holds more than `capacity`. Once the bucket is empty, retryable
+    failures are surfaced immediately rather than adding load to a struggling server.
+    """
+
+    def __init__(
+        self, retry: tenacity.retry_base, *, ratio: float = 0.2, reserve: float = 10.0, capacity: float = 100.0
+    ):
+        self.retry = retry
+        self.ratio = ratio
+        self.capacity = max(capacity, reserve)
+        self.tokens = reserve
+        self.exhausted = 0
+
+    def __call__(self, retry_state: tenacity.RetryCallState) -> bool:
+        if not self.retry(retry_state):
+            outcome = retry_state.outcome
+
+            if outcome is not None and not outcome.failed and outcome.result().status_code < 400:
+                self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+            return False
+
+        # THE POLICY IS ABOUT TO GIVE UP ANYWAY, SO THERE IS NO RETRY TO PAY FOR.
+        if retry_state.retry_object is not None and retry_state.retry_object.stop(retry_state):
+            return True
+
+        if self.tokens < 1:
+            self.exhausted += 1
+            log.debug(f"Retry budget exhausted, not retrying attempt {retry_state.attempt_number}")
+            return False
+
+        self.tokens -= 1
+        return True
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+import collections
+import contextlib
+import datetime as dt
+import json
+import logging
+import math
+import pathlib
+import re
+import time
+
+import httpx
+
+from cs_tools.api import _transport
+
+log = logging.getLogger(__name__)
+
+# IDENTIFIERS IN THE PATH (eg. users/{guid}/update) WOULD GIVE EVERY OBJECT ITS OWN ENDPOINT.
+_PATH_IDENTIFIERS = re.compile(r"/(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+)(?=/|$)", re.I)
+
+
+class LatencyHistogram:
+    """
+    A log-bucketed histogram of durations, in constant memory.
+
+    Each bucket is 5% wider than the last, so any percentile is accurate to within 5%.
+    """
+
+    _FLOOR_SECONDS = 1e-4
+    _GROWTH = 1.05
+
+    def __init__(self):
+        self._buckets: collections.Counter[int] = collections.Counter()
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add a single duration."""
+        index = max(0, math.ceil(math.log(max(seconds, self._FLOOR_SECONDS) / self._FLOOR_SECONDS, self._GROWTH)))
+        self._buckets[index] += 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """Estimate the duration which p percent of recorded durations fall under."""
+        if not self.count:
+            return 0.0
+
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+
+            if seen >= rank:
+                return min(self.max, self._FLOOR_SECONDS * self._GROWTH**index)
+
+        return self.max
+
+
+class EndpointStats:
+    """Everything we know about the requests sent to a single endpoint."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.nbytes = 0
+        self.status_codes: collections.Counter[int] = collections.Counter()
+        self.cache_tiers: collections.Counter[str] = collections.Counter()
+        self.retries = 0
+        self.slot_wait_seconds = 0.0
+        self.connection_wait_seconds = 0.0
+
+    @property
+    def requests(self) -> int:
+        return sum(self.status_codes.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "p50_seconds": round(self.latency.percentile(50), 4),
+            "p95_seconds": round(self.latency.percentile(95), 4),
+            "p99_seconds": round(self.latency.percentile(99), 4),
+            "max_seconds": round(self.latency.max, 4),
+            "bytes": self.nbytes,
+            "status_codes": {str(code): n for code, n in sorted(self.status_codes.items())},
+            "cache_tiers": dict(self.cache_tiers),
+            "retries": self.retries,
+            "slot_wait_seconds": round(self.slot_wait_seconds, 4),
+            "connection_wait_seconds": round(self.connection_wait_seconds, 4),
+        }
+
+
+class RequestTelemetry:
+    """Collect per-endpoint latency, size, status, retry and cache statistics from the transport's timing headers."""
+
+    def __init__(self):
+        self.endpoints: collections.defaultdict[str, EndpointStats] = collections.defaultdict(EndpointStats)
+        self._started_at = time.perf_counter()
+
+    @staticmethod
+    def endpoint_for(request: httpx.Request) -> str:
+        """Name the endpoint a request was sent to."""
+        return f"{request.method} {_PATH_IDENTIFIERS.sub('/{id}', request.url.path)}"
+
+    def record(self, response: httpx.Response) -> None:
+        """Add a single (read) response."""
+        stats = self.endpoints[self.endpoint_for(response.request)]
+        stats.status_codes[response.status_code] += 1
+        stats.cache_tiers[response.headers.get(_transport.CachePolicy.CACHE_TIER_HEADER, "network")] += 1
+
+        with contextlib.suppress(httpx.ResponseNotRead):
+            stats.nbytes += len(response.content)
+
+        dispatched_at = response.request.headers.get(_transport.CachedRetryTransport.REQUEST_DISPATCH_HEADER, None)
+        received_at = response.headers.get(_transport.CachedRetryTransport.RESPONSE_RECEIVE_HEADER, None)
+
+        if dispatched_at and received_at:
+            elapsed = dt.datetime.fromisoformat(received_at) - dt.datetime.fromisoformat(dispatched_at)
+            stats.latency.record(max(0.0, elapsed.total_seconds()))
+
+        if attempts := response.headers.get(_transport.CachedRetryTransport.ATTEMPTS_HEADER, None):
+            stats.retries += max(0, int(attempts) - 1)
+
+        if slot_wait := response.headers.get(_transport.CachedRetryTransport.SLOT_WAIT_HEADER, None):
+            stats.slot_wait_seconds += float(slot_wait)
+
+        if connection_wait := response.headers.get(_transport.CachedRetryTransport.CONNECTION_WAIT_HEADER, None):
+            stats.connection_wait_seconds += float(connection_wait)
+
+    def summary(self) -> dict[str, Any]:
+        """Summarize the session, with the busiest endpoints first."""
+        elapsed = time.perf_counter() - self._started_at
+        requests = sum(stats.requests for stats in self.endpoints.values())
+        busiest = sorted(self.endpoints.items(), key=lambda item: item[1].requests, reverse=True)
+
+        return {
+            "elapsed_seconds": round(elapsed, 4),
+            "requests": requests,
+            "requests_per_second": round(requests / elapsed, 4) if elapsed else 0.0,
+            "bytes": sum(stats.nbytes for stats in self.endpoints.values()),
+            "endpoints": {endpoint: stats.as_dict() for endpoint, stats in busiest},
+        }
+
+    def format_summary(self, *, top: Optional[int] = 15) -> str:
+        """Render the summary as a plain-text table."""
+        summary = self.summary()
+        header = ("ENDPOINT", "N", "P50", "P95", "P99", "MB", "RETRY", "CACHED", "WAIT")
+        lines = [
+            f"HTTP telemetry: {summary['requests']:,} requests in {summary['elapsed_seconds']:.1f}s "
+            f"({summary['requests_per_second']:.1f}/s, {summary['bytes'] / 1024**2:,.1f} MB)",
+            "{:<56} {:>7} {:>8} {:>8} {:>8} {:>8} {:>6} {:>7} {:>8}".format(*header),
+        ]
+
+        for endpoint, stats in list(summary["endpoints"].items())[:top]:
+            cached = sum(n for tier, n in stats["cache_tiers"].items() if tier != "network")
+            lines.append(
+                f"{endpoint[:56]:<56} {stats['requests']:>7,} "
+                f"{stats['p50_seconds']:>7.3f}s {stats['p95_seconds']:>7.3f}s {stats['p99_seconds']:>7.3f}s "
+                f"{stats['bytes'] / 1024**2:>8.2f} {stats['retries']:>6,} {cached:>7,} "
+                f"{stats['slot_wait_seconds']:>7.2f}s"
+            )
+
+        return "\n".join(lines)
+
+    def export(self, path: pathlib.Path) -> None:
+        """Write the summary to a JSON file."""
+        path.write_text(json.dumps(self.summary(), indent=2))
+        log.debug(f"Wrote HTTP telemetry to {path}")
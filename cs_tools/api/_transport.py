@@ -1,16 +1,24 @@
 from __future__ import annotations
 
-from collections.abc import Coroutine, MutableMapping
-from typing import Any, Optional, cast
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine, MutableMapping
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, ClassVar, Optional, cast
 import asyncio
 import base64 as b64
+import collections
 import contextlib
 import datetime as dt
 import functools as ft
+import hashlib
+import importlib
 import json
 import logging
 import pathlib
+import re
+import time
+import urllib.parse
 import warnings
+import zlib
 
 from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
@@ -19,13 +27,313 @@ import httpx
 import sqlalchemy as sa
 import tenacity
 
+from cs_tools import utils
+from cs_tools.api import _concurrency, _json, _retry
+
+if TYPE_CHECKING:
+    from cs_tools.api._cassette import CassetteRecorder
+    from cs_tools.api._hedging import HedgePolicy
+
 log = logging.getLogger(__name__)
 
+zstd: Optional[ModuleType]
+
+try:
+    # AVAILABLE_IN_PY314 -- https://docs.python.org/3.14/library/compression.zstd.html
+    zstd = importlib.import_module("compression.zstd")
+except ModuleNotFoundError:
+    zstd = None
+
 
 class _Base(DeclarativeBase):
     """SQLAlchemy declarative base class."""
 
 
+# EACH ROW RECORDS THE FORMAT IT WAS WRITTEN IN, SO CACHE FILES FROM OLDER RELEASES STAY
+# READABLE AND ARE UPGRADED IN PLACE THE NEXT TIME THEIR ROWS ARE HIT.
+#
+#   0 :: LEGACY, headers AS JSON BYTES AND stream AS BASE64 TEXT.
+#   1 :: headers AS RAW HTTP HEADER LINES AND stream AS zlib-COMPRESSED BYTES.
+#   2 :: headers AS RAW HTTP HEADER LINES AND stream AS zstd-COMPRESSED BYTES.
+RECORD_FORMAT_LEGACY = 0
+RECORD_FORMAT_ZLIB = 1
+RECORD_FORMAT_ZSTD = 2
+RECORD_FORMAT_CURRENT = RECORD_FORMAT_ZSTD if zstd is not None else RECORD_FORMAT_ZLIB
+
+# THE BODY IS STORED DECODED, SO THESE HEADERS NO LONGER DESCRIBE IT.
+_HEADERS_NOT_STORED = frozenset({b"content-encoding", b"content-length", b"transfer-encoding"})
+
+
+def _utc_now() -> dt.datetime:
+    """The current time, as the naive UTC timestamp SQLite stores."""
+    return dt.datetime.now(tz=dt.timezone.utc).replace(tzinfo=None)
+
+
+def encode_record(response: httpx.Response) -> tuple[int, bytes, bytes]:
+    """Serialize a fully-read response into its (record_format, headers, stream) cache representation."""
+    h = b"\r\n".join(k + b": " + v for k, v in response.headers.raw if k.lower() not in _HEADERS_NOT_STORED)
+
+    if zstd is not None and RECORD_FORMAT_CURRENT == RECORD_FORMAT_ZSTD:
+        d = zstd.compress(response.content)
+    else:
+        d = zlib.compress(response.content, level=6)
+
+    return RECORD_FORMAT_CURRENT, h, d
+
+
+def decode_record(record_format: int, headers: Any, stream: Any) -> Optional[tuple[list[tuple[bytes, bytes]], bytes]]:
+    """Deserialize a cache representation into its (headers, content), or None if it cannot be read here."""
+    if record_format == RECORD_FORMAT_LEGACY:
+        return json.loads(headers), b64.b64decode(stream.encode("ascii"))
+
+    h = [tuple(line.split(b": ", 1)) for line in headers.split(b"\r\n") if line]
+
+    if record_format == RECORD_FORMAT_ZLIB:
+        return h, zlib.decompress(stream)
+
+    # A CACHE WRITTEN BY A NEWER PYTHON MAY BE SHARED WITH AN OLDER ONE.
+    if record_format == RECORD_FORMAT_ZSTD and zstd is not None:
+        return h, zstd.decompress(stream)
+
+    return None
+
+
+def _canonical_json(value: Any, *, unordered: frozenset[str] = frozenset()) -> str:
+    """Serialize JSON so that equivalent documents produce identical text."""
+    if isinstance(value, dict) and unordered:
+        value = {
+            k: sorted(v, key=_canonical_json) if k in unordered and isinstance(v, list) else v for k, v in value.items()
+        }
+
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _canonical_body(request: httpx.Request, *, unordered: frozenset[str]) -> str:
+    """Normalize a request body, falling back to its raw text when it cannot be parsed."""
+    body = request.content
+
+    if not body:
+        return ""
+
+    if request.headers.get("content-type", "").startswith("application/x-www-form-urlencoded"):
+        pairs = urllib.parse.parse_qsl(body.decode("utf-8", errors="replace"), keep_blank_values=True)
+        return urllib.parse.urlencode(sorted(pairs, key=lambda pair: pair[0]))
+
+    try:
+        return _canonical_json(_json.loads(body), unordered=unordered)
+    except ValueError:
+        return body.decode("utf-8", errors="replace")
+
+
+def _is_h2_error(error: Optional[BaseException]) -> bool:
+    """Determine if a protocol error came from the HTTP/2 state machine, rather than a plain dropped connection."""
+    seen: set[int] = set()
+
+    # httpx AND httpcore EACH WRAP THE ERROR, THE h2 EVENT OR EXCEPTION IS FURTHER DOWN THE CHAIN.
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+
+        if any(type(_).__module__.partition(".")[0] == "h2" for _ in (error, *error.args)):
+            return True
+
+        error = error.__cause__ or error.__context__
+
+    return False
+
+
+def _is_http2_available() -> bool:
+    """Determine if HTTP/2 can be negotiated, which requires the optional 'h2' package."""
+    try:
+        import h2  # noqa: F401
+    except ModuleNotFoundError:
+        log.warning(
+            "HTTP/2 is enabled, but the 'h2' package is not installed (pip install cs_tools[http2]), using HTTP/1.1"
+        )
+        return False
+
+    return True
+
+
+class _ConnectionTrace:
+    """Time how long a request waits for a connection from the pool, via httpcore's trace extension."""
+
+    # THE FIRST OF THESE MARKS THE MOMENT THE POOL HANDED OUT A (NEW OR REUSED) CONNECTION.
+    ACQUIRED_EVENTS = frozenset(
+        {"connection.connect_tcp.started", "http11.send_request_headers.started", "http2.send_request_headers.started"}
+    )
+
+    def __init__(self, parent: Optional[Callable[..., Awaitable[None]]] = None):
+        self.started_at = time.perf_counter()
+        self.acquired_at: Optional[float] = None
+        self.opened_connection = False
+        self._parent = parent
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        """Seconds spent queued for a connection, if the pool reported it."""
+        return None if self.acquired_at is None else self.acquired_at - self.started_at
+
+    async def __call__(self, event_name: str, info: dict[str, Any]) -> None:
+        if self.acquired_at is None and event_name in _ConnectionTrace.ACQUIRED_EVENTS:
+            self.acquired_at = time.perf_counter()
+
+        if event_name == "connection.connect_tcp.started":
+            self.opened_connection = True
+
+        if self._parent is not None:
+            await self._parent(event_name, info)
+
+
+_GUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", flags=re.IGNORECASE)
+
+
+# READS WHOSE ANSWER DESCRIBES OBJECTS OTHER THAN THE ONES THEY ASK ABOUT.
+_RELATIONSHIP_READS = ('"include_dependent_objects":true', "/security/", "/dependents")
+
+
+def _mutation_targets(request: httpx.Request) -> tuple[set[str], set[str]]:
+    """Find the objects (by GUID or identifier) and object types which a mutating request touches."""
+    text = f"{request.url.path} {request.content.decode('utf-8', errors='replace')}"
+    identifiers = {guid.lower() for guid in _GUID.findall(text)}
+    types: set[str] = set()
+
+    try:
+        stack = [_json.loads(request.content)] if request.content else []
+    except ValueError:
+        stack = []
+
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, list):
+            stack.extend(value)
+
+        if not isinstance(value, dict):
+            continue
+
+        for k, v in value.items():
+            if k.endswith(("identifier", "identifiers")):
+                identifiers.update(i for i in (v if isinstance(v, list) else [v]) if isinstance(i, str))
+            elif k.endswith("type") and isinstance(v, str):
+                types.add(v)
+            else:
+                stack.append(v)
+
+    return identifiers, types
+
+
+def _is_stale(description: Optional[str], *, identifiers: set[str], types: set[str]) -> bool:
+    """Determine if a cached request could have a different answer, after a mutation touching these objects."""
+    # WE DON'T KNOW WHAT THE MUTATION TOUCHED, SO ASSUME IT TOUCHED EVERYTHING.
+    if description is None or not identifiers:
+        return True
+
+    # THE NAMESPACE IDENTIFIES WHO ASKED, NOT WHAT WAS ASKED ABOUT.
+    if description.startswith("["):
+        _, _, description = description.partition("] ")
+
+    if any(identifier in description for identifier in identifiers):
+        return True
+
+    # A READ OF SOME OTHER OBJECT'S DEPENDENTS OR PERMISSIONS MAY STILL INCLUDE THE OBJECTS WHICH WERE TOUCHED.
+    if any(fragment in description for fragment in _RELATIONSHIP_READS):
+        return True
+
+    # A READ OF SOME OTHER SPECIFIC OBJECT IS UNAFFECTED.
+    if _GUID.search(description):
+        return False
+
+    # A LISTING IS STALE, UNLESS IT IS FILTERED TO SOME OTHER TYPE OF OBJECT.
+    if types and '"type":' in description:
+        return any(f'"{t}"' in description for t in types)
+
+    return True
+
+
+def _is_invalidated(
+    description: Optional[str], *, affected: tuple[str, ...], identifiers: set[str], types: set[str]
+) -> bool:
+    """Determine if a cached request is made stale by a mutation, which affects these endpoints and objects."""
+    if description is not None and not any(fragment in description for fragment in affected):
+        return False
+
+    return _is_stale(description, identifiers=identifiers, types=types)
+
+
+class _MemoryTier:
+    """A bounded, in-process LRU of decoded responses which sits in front of the SQLite cache."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: collections.OrderedDict[
+            str, tuple[int, list[tuple[bytes, bytes]], bytes, dt.datetime, Optional[str], int]
+        ]
+        self._entries = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, *, now: dt.datetime) -> Optional[tuple[int, list[tuple[bytes, bytes]], bytes]]:
+        """Fetch the (status_code, headers, content) of an unexpired response."""
+        if (entry := self._entries.get(key)) is None:
+            return None
+
+        status_code, headers, content, expires_at, *_ = entry
+
+        if expires_at < now:
+            self.pop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return status_code, headers, content
+
+    def put(
+        self,
+        key: str,
+        *,
+        status_code: int,
+        headers: list[tuple[bytes, bytes]],
+        content: bytes,
+        expires_at: dt.datetime,
+        description: Optional[str] = None,
+    ) -> None:
+        """Add a response, evicting the least recently used ones to stay within budget."""
+        self.pop(key)
+
+        size = len(content) + sum(len(k) + len(v) for k, v in headers)
+
+        # ONE ENORMOUS PAYLOAD SHOULD NOT FLUSH EVERYTHING ELSE, IT IS STILL SERVED FROM DISK.
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (status_code, headers, content, expires_at, description, size)
+        self.nbytes += size
+
+        while self.nbytes > self.max_bytes:
+            *_, evicted_size = self._entries.popitem(last=False)[1]
+            self.nbytes -= evicted_size
+
+    def pop(self, key: str) -> None:
+        """Remove a response, if it exists."""
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.nbytes -= entry[-1]
+
+    def evict(self, is_stale: Callable[[Optional[str]], bool]) -> int:
+        """Remove the responses whose request description is stale, returning how many."""
+        stale = [key for key, (*_, description, _) in self._entries.items() if is_stale(description)]
+
+        for key in stale:
+            self.pop(key)
+
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove all responses."""
+        self._entries.clear()
+        self.nbytes = 0
+
+
 class CachePolicy:
     """
     Implement a SQLite-based caching policy.
@@ -34,36 +342,141 @@ class CachePolicy:
 
     CREATE TABLE http_cache (
         key            TEXT     PRIMARY KEY,
+        request        TEXT,
         status_code    INTEGER,
         headers        BLOB,
-        stream         TEXT,
+        stream         BLOB,
+        record_format  INTEGER  DEFAULT 0,
         cache_hits     INTEGER  DEFAULT 0,
-        created_at_utc DATETIME DEFAULT CURRENT_TIMESTAMP
+        created_at_utc DATETIME DEFAULT CURRENT_TIMESTAMP,
+        accessed_at_utc DATETIME,
+        expires_at_utc DATETIME
     )
-    """
 
-    # TODO: investigate msgspec.json.encode / .decode for even faster resolution here.
+    Responses expire after a per-endpoint time-to-live, and the whole cache is held to
+    a byte budget by evicting the least recently (then least frequently) used rows.
+    Both sweeps run in the background, or on demand through CachePolicy.prune().
+
+    Recently used responses are also held in memory, so repeated reads within a single
+    run never touch the database. Hits and misses for each tier are counted in .stats
 
+    Writes are queued and committed in batches (write-behind), either periodically or
+    once the queue outgrows its byte budget, and always when the cache is closed.
+
+    Mutations evict the responses they make stale from memory right away, but are only
+    searched for on disk once per run of mutations, before the next read from disk.
+    """
+
+    CACHE_FILENAME = "http.cache"
     CACHE_CONTROL_HEADER = "x-cs-tools-cache-control"
     CACHE_BUSTING_HEADER = "x-cs-tools-cache-bust"
     CACHE_FETCHED_HEADER = "x-cs-tools-cache-hit"
+    CACHE_TIER_HEADER = "x-cs-tools-cache-tier"
     CACHE_RESPONSE_TABLE = sa.Table(
         "http_cache",
         _Base.metadata,
         sa.Column("key", sa.String, primary_key=True),
+        sa.Column("request", sa.Text),
         sa.Column("status_code", sa.Integer),
         sa.Column("headers", sa.BLOB),
-        sa.Column("stream", sa.String),
+        sa.Column("stream", sa.LargeBinary),
+        sa.Column("record_format", sa.Integer, nullable=False, server_default=sa.text(str(RECORD_FORMAT_LEGACY))),
         sa.Column("cache_hits", sa.Integer, default=0),
         sa.Column("created_at_utc", sa.DateTime, server_default=sa.func.now()),
+        sa.Column("accessed_at_utc", sa.DateTime),
+        sa.Column("expires_at_utc", sa.DateTime),
     )
 
-    def __init__(self, directory: pathlib.Path):
-        self._filepath = directory / "http.cache"
+    # COLUMNS ADDED SINCE THE FIRST RELEASE OF THE CACHE, WHICH OLDER CACHE FILES WILL NOT HAVE.
+    _MIGRATED_COLUMNS: ClassVar[dict[str, str]] = {
+        "record_format": f"INTEGER NOT NULL DEFAULT {RECORD_FORMAT_LEGACY}",
+        "accessed_at_utc": "DATETIME",
+        "expires_at_utc": "DATETIME",
+        "request": "TEXT",
+    }
+
+    DEFAULT_TTL = dt.timedelta(days=1)
+    DEFAULT_MAX_BYTES = 2 * 1024**3
+    DEFAULT_MEMORY_MAX_BYTES = 64 * 1024**2
+    DEFAULT_ENDPOINT_TTLS: ClassVar[dict[str, dt.timedelta]] = {
+        # CONTENT, SHARING & TAGS ARE ALSO EDITED IN THE UI, WHERE NO MUTATION OF OURS CAN INVALIDATE THEM. THEY
+        # PICK THE TARGETS OF DELETES AND SHARES, SO THEY ONLY OUTLIVE A RUN FOR A FEW MINUTES.
+        "metadata/": dt.timedelta(minutes=10),
+        "security/": dt.timedelta(minutes=10),
+        "tags/": dt.timedelta(minutes=10),
+        # MEMBERSHIP CHANGES OFTEN AND IS EXPENSIVE TO GET WRONG.
+        "users/search": dt.timedelta(hours=4),
+        "groups/search": dt.timedelta(hours=4),
+        "tspublic/v1/group": dt.timedelta(hours=4),
+        # CLUSTER-LEVEL INFORMATION RARELY CHANGES BETWEEN RUNS.
+        "api/rest/2.0/system": dt.timedelta(days=7),
+    }
+
+    # TOP-LEVEL REQUEST FIELDS WHOSE LIST ORDER DOES NOT AFFECT THE RESPONSE, BY ENDPOINT.
+    ORDER_INSENSITIVE_FIELDS: ClassVar[dict[str, frozenset[str]]] = {
+        "metadata/search": frozenset({"metadata"}),
+        "security/metadata/fetch-permissions": frozenset({"metadata", "principals"}),
+        "security/principals/fetch-permissions": frozenset({"metadata", "principals"}),
+    }
+
+    # WRITES WHICH MAKE CACHED READS STALE, AS {mutating path fragment: cached path fragments it affects}.
+    MUTATION_INVALIDATES: ClassVar[dict[str, tuple[str, ...]]] = {
+        "metadata/delete": ("metadata/", "security/", "tags/search"),
+        "metadata/tml/import": ("metadata/", "security/"),
+        "metadata/tml/async/import": ("metadata/", "security/"),
+        "vcs/git/commits/deploy": ("metadata/", "security/"),
+        "tags/": ("tags/search", "metadata/search"),
+        "security/metadata/share": ("security/", "metadata/search"),
+        "security/metadata/assign": ("security/", "metadata/search"),
+        "tspublic/v1/security/share": ("security/", "metadata/search"),
+        "users/": ("users/search", "groups/search", "tspublic/v1/group", "security/"),
+        "groups/": ("users/search", "groups/search", "tspublic/v1/group", "security/"),
+    }
+
+    # HOW MANY RESPONSES TO STORE BEFORE SWEEPING THE CACHE AGAIN.
+    SWEEP_EVERY_N_WRITES = 1_000
+
+    # HOW MANY RESPONSES A SWEEP EVICTS AT ONCE, BEFORE IT LETS READS AND WRITES BACK IN.
+    SWEEP_BATCH_SIZE = 500
+
+    # WRITES ARE QUEUED AND COMMITTED TOGETHER, AT MOST THIS OFTEN OR ONCE THIS MANY BYTES ARE WAITING.
+    DEFAULT_FLUSH_INTERVAL = 1.0
+    DEFAULT_WRITE_BEHIND_MAX_BYTES = 16 * 1024**2
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        *,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        memory_max_bytes: int = DEFAULT_MEMORY_MAX_BYTES,
+        default_ttl: dt.timedelta = DEFAULT_TTL,
+        endpoint_ttls: Optional[dict[str, dt.timedelta]] = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        write_behind_max_bytes: int = DEFAULT_WRITE_BEHIND_MAX_BYTES,
+    ):
+        self._filepath = directory / CachePolicy.CACHE_FILENAME
         self._engine = create_async_engine(f"sqlite+aiosqlite:///{self._filepath}", future=True)
         self._cnxn: Optional[AsyncConnection] = None
         self._setup_lock = asyncio.Lock()
+        # BACKGROUND TASKS SHARE ONE CONNECTION, SO EACH UNIT OF WORK MUST NOT INTERLEAVE WITH ANOTHER'S COMMIT.
+        self._db_lock = asyncio.Lock()
         self._pending_cache_tasks: set[asyncio.Task] = set()
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.endpoint_ttls = CachePolicy.DEFAULT_ENDPOINT_TTLS if endpoint_ttls is None else endpoint_ttls
+        self._writes_since_sweep = 0
+        self._memory = _MemoryTier(max_bytes=memory_max_bytes)
+        self.stats: collections.Counter[str] = collections.Counter()
+        self.flush_interval = flush_interval
+        self.write_behind_max_bytes = write_behind_max_bytes
+        self._pending_writes: dict[str, tuple[httpx.Response, Optional[dt.datetime], Optional[str]]] = {}
+        self._pending_hits: collections.Counter[str] = collections.Counter()
+        self._pending_nbytes = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._pending_invalidations: list[tuple[tuple[str, ...], set[str], set[str]]] = []
+        self._invalidation_lock = asyncio.Lock()
+        self.namespace = ""
 
     def _background_task(self, coro: Coroutine) -> None:
         """Safely run a task in the background."""
@@ -104,14 +517,146 @@ class CachePolicy:
 
             self._cnxn = await self._engine.connect()
 
+            # WAL LETS READERS PROCEED DURING A WRITE, AND ONLY SYNCS TO DISK AT CHECKPOINTS.
+            await self._cnxn.exec_driver_sql("PRAGMA journal_mode=WAL")
+            await self._cnxn.exec_driver_sql("PRAGMA synchronous=NORMAL")
+
             await self._cnxn.run_sync(_Base.metadata.create_all)
+            await self._cnxn.run_sync(self._migrate_database)
+            await self._cnxn.commit()
+
+            # CLEAR OUT WHATEVER EXPIRED SINCE THE LAST RUN, WITHOUT HOLDING UP THIS REQUEST.
+            self._background_task(coro=self.prune())
+
+    @staticmethod
+    def _migrate_database(cnxn: sa.Connection) -> None:
+        """Bring a cache file written by an older CS Tools up to the current table definition."""
+        columns = {column["name"] for column in sa.inspect(cnxn).get_columns("http_cache")}
+
+        # LEGACY ROWS ARE REWRITTEN LAZILY ON THEIR NEXT HIT, AND EXPIRE BY THEIR created_at_utc.
+        # ROWS KEYED BY THE FULL REQUEST TEXT (BEFORE HASHED KEYS) ARE NEVER HIT AGAIN, SO THEY SIMPLY AGE OUT.
+        for column_name, column_ddl in CachePolicy._MIGRATED_COLUMNS.items():
+            if column_name not in columns:
+                log.debug(f"Migrating the HTTP cache, adding column '{column_name}'")
+                cnxn.execute(sa.text(f"ALTER TABLE http_cache ADD COLUMN {column_name} {column_ddl}"))
+
+    def ttl_for(self, request: httpx.Request) -> dt.timedelta:
+        """Determine how long a response to this request may be served from the cache."""
+        path = request.url.path
+        matches = [fragment for fragment in self.endpoint_ttls if fragment in path]
+
+        if not matches:
+            return self.default_ttl
+
+        # THE MOST SPECIFIC FRAGMENT WINS.
+        return self.endpoint_ttls[max(matches, key=len)]
+
+    def _evict_expired(self, cnxn: sa.Connection) -> int:
+        """Evict one batch of expired responses."""
+        table = CachePolicy.CACHE_RESPONSE_TABLE
+        now = _utc_now()
+
+        # LEGACY ROWS HAVE NO EXPIRY OF THEIR OWN, SO THEY FALL BACK TO THE DEFAULT TTL.
+        is_expired = sa.or_(
+            table.c.expires_at_utc < now,
+            sa.and_(table.c.expires_at_utc.is_(None), table.c.created_at_utc < now - self.default_ttl),
+        )
+
+        batch = sa.select(table.c.key).where(is_expired).limit(CachePolicy.SWEEP_BATCH_SIZE).scalar_subquery()
+        return cnxn.execute(sa.delete(table).where(table.c.key.in_(batch))).rowcount
+
+    @staticmethod
+    def _cached_bytes(cnxn: sa.Connection) -> int:
+        """Measure how much space the cached responses take up."""
+        table = CachePolicy.CACHE_RESPONSE_TABLE
+        size = sa.func.length(table.c.headers) + sa.func.length(table.c.stream)
+        return cnxn.execute(sa.select(sa.func.coalesce(sa.func.sum(size), 0))).scalar_one()
+
+    @staticmethod
+    def _evict_least_valuable(cnxn: sa.Connection, *, excess: int) -> tuple[int, int]:
+        """Evict one batch of the least recently used responses, returning how many and how many bytes."""
+        table = CachePolicy.CACHE_RESPONSE_TABLE
+        size = sa.func.length(table.c.headers) + sa.func.length(table.c.stream)
+
+        least_valuable_first = (
+            sa.select(table.c.key, size)
+            .order_by(sa.func.coalesce(table.c.accessed_at_utc, table.c.created_at_utc), table.c.cache_hits)
+            .limit(CachePolicy.SWEEP_BATCH_SIZE)
+        )
+
+        to_evict: list[str] = []
+        freed = 0
+
+        for key, nbytes in cnxn.execute(least_valuable_first):
+            if freed >= excess:
+                break
+
+            to_evict.append(key)
+            freed += nbytes or 0
+
+        if not to_evict:
+            return 0, 0
+
+        return cnxn.execute(sa.delete(table).where(table.c.key.in_(to_evict))).rowcount, freed
+
+    async def prune(self, *, max_bytes: Optional[int] = None) -> int:
+        """
+        Remove expired and excess responses from the cache, returning how many were removed.
+
+        Responses are evicted a batch at a time, so reads and writes may run in between.
+        """
+        await self._setup_database()
+        assert self._cnxn is not None, "Caching database is not setup."
+
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        evicted = 0
+
+        # QUEUED WRITES COUNT TOWARDS THE BUDGET TOO.
+        await self.flush()
+
+        while True:
+            async with self._db_lock:
+                n = await self._cnxn.run_sync(self._evict_expired)
+                await self._cnxn.commit()
+
+            evicted += n
+
+            if n < CachePolicy.SWEEP_BATCH_SIZE:
+                break
+
+        if budget is not None:
+            async with self._db_lock:
+                excess = await self._cnxn.run_sync(self._cached_bytes) - budget
+
+            while excess > 0:
+                async with self._db_lock:
+                    n, freed = await self._cnxn.run_sync(self._evict_least_valuable, excess=excess)
+                    await self._cnxn.commit()
+
+                evicted += n
+                excess -= freed
+
+                if not freed:
+                    break
+
+        if evicted:
+            log.debug(f"Evicted {evicted:,} responses from the HTTP cache.")
+
+        return evicted
 
     async def aclose(self) -> None:
         """Close the database."""
+        if self.stats:
+            log.debug(f"HTTP cache statistics: {dict(self.stats)}")
+
         if self._pending_cache_tasks:
             with contextlib.suppress(AssertionError):
                 await asyncio.gather(*self._pending_cache_tasks)
 
+        # NOTHING QUEUED MAY BE LOST WHEN THE CLIENT CLOSES.
+        await self._apply_invalidations()
+        await self.flush()
+
         if self._cnxn is not None:
             await self._cnxn.aclose()
 
@@ -121,8 +666,9 @@ class CachePolicy:
 
         query = sa.select(CachePolicy.CACHE_RESPONSE_TABLE).where(CachePolicy.CACHE_RESPONSE_TABLE.c.key == key)
 
-        result = await self._cnxn.execute(query)
-        return result.fetchone()
+        async with self._db_lock:
+            result = await self._cnxn.execute(query)
+            return result.fetchone()
 
     async def _sql_delete(self, *, key: str) -> None:
         """Remove a response from the cache."""
@@ -130,25 +676,121 @@ class CachePolicy:
 
         query = sa.delete(CachePolicy.CACHE_RESPONSE_TABLE).where(CachePolicy.CACHE_RESPONSE_TABLE.c.key == key)
 
-        await self._cnxn.execute(query)
+        # A FLUSH WHICH ALREADY TOOK THIS KEY FROM THE QUEUE MUST LAND BEFORE WE DELETE, NOT AFTER.
+        async with self._flush_lock, self._db_lock:
+            await self._cnxn.execute(query)
+            await self._cnxn.commit()
 
-    async def _sql_insert(self, *, key: str, r: httpx.Response, hits: int | None = None) -> None:
-        """Add or Update a response to the cache."""
-        assert self._cnxn is not None, "Caching database is not setup."
+    def _queue_write(
+        self,
+        *,
+        key: str,
+        r: httpx.Response,
+        expires_at: Optional[dt.datetime] = None,
+        description: Optional[str] = None,
+    ) -> None:
+        """
+        Queue a response to be written to the cache.
+
+        A fresh response carries its expiry and restarts its time-to-live, while a
+        response without one only rewrites the stored record (eg. upgrading its format).
+        """
+        if (previous := self._pending_writes.pop(key, None)) is not None:
+            self._pending_nbytes -= len(previous[0].content)
+
+        self._pending_writes[key] = (r, expires_at, description)
+        self._pending_nbytes += len(r.content)
+        self._schedule_flush()
+
+    def _queue_hit(self, *, key: str) -> None:
+        """Queue a cache hit to be counted against the stored response."""
+        self._pending_hits[key] += 1
+        self._schedule_flush()
+
+    def _discard_queued(self, *, key: str) -> None:
+        """Forget any writes queued for a response which is about to be removed."""
+        self._pending_hits.pop(key, None)
+
+        if (previous := self._pending_writes.pop(key, None)) is not None:
+            self._pending_nbytes -= len(previous[0].content)
+
+    def _schedule_flush(self) -> None:
+        """Flush queued writes once the interval elapses, or right away if they outgrow their budget."""
+        if self._pending_nbytes >= self.write_behind_max_bytes:
+            self._background_task(coro=self.flush())
+            return
+
+        if self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(self.flush_interval, self._flush_when_due)
+
+    def _flush_when_due(self) -> None:
+        self._flush_timer = None
+        self._background_task(coro=self.flush())
+
+    async def flush(self) -> None:
+        """Write every queued response and hit count to the database, in a single transaction."""
+        async with self._flush_lock:
+            if not self._pending_writes and not self._pending_hits:
+                return
 
-        s = r.status_code
-        h = json.dumps(list(r.headers.raw), default=str).encode("utf-8")
-        d = b64.b64encode(r.content).decode("ascii")
+            # TAKE OWNERSHIP OF THE QUEUE, SO NEW WRITES KEEP ARRIVING WHILE THIS BATCH IS ENCODED.
+            writes, self._pending_writes = self._pending_writes, {}
+            hits, self._pending_hits = self._pending_hits, collections.Counter()
+            self._pending_nbytes = 0
 
-        # INSERT ... VALUES
-        query = insert(CachePolicy.CACHE_RESPONSE_TABLE).values(key=key, status_code=s, headers=h, stream=d)
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
 
-        # ON CONFLICT DO UPDATE
-        data_to_update = {"cache_hits": hits} if hits is not None else {"status_code": s, "headers": h, "stream": d}  # type: ignore[dict-item]
-        query = query.on_conflict_do_update(index_elements=["key"], set_=data_to_update)
+            await self._setup_database()
+            assert self._cnxn is not None, "Caching database is not setup."
 
-        await self._cnxn.execute(query)
-        await self._cnxn.commit()
+            # COMPRESSION RELEASES THE GIL, SO KEEP LARGE PAYLOADS OFF THE EVENT LOOP.
+            records = await asyncio.to_thread(lambda: {key: encode_record(r) for key, (r, *_) in writes.items()})
+
+            now = _utc_now()
+            fresh: list[dict[str, Any]] = []
+            upgrades: list[dict[str, Any]] = []
+
+            for key, (r, expires_at, description) in writes.items():
+                f, h, d = records[key]
+                row = {"key": key, "status_code": r.status_code, "headers": h, "stream": d, "record_format": f}
+
+                if expires_at is None:
+                    upgrades.append(row)
+                else:
+                    fresh.append({**row, "request": description, "created_at_utc": now, "expires_at_utc": expires_at})
+
+            table = CachePolicy.CACHE_RESPONSE_TABLE
+            upsert = insert(table)
+            record_columns = ("status_code", "headers", "stream", "record_format")
+
+            # A HIT ONLY UPGRADES THE RECORD, WHILE A FRESH RESPONSE RESTARTS ITS TIME-TO-LIVE.
+            fresh_query = upsert.on_conflict_do_update(
+                index_elements=["key"],
+                set_={c: upsert.excluded[c] for c in (*record_columns, "request", "created_at_utc", "expires_at_utc")},
+            )
+            upgrade_query = upsert.on_conflict_do_update(
+                index_elements=["key"],
+                set_={c: upsert.excluded[c] for c in record_columns},
+            )
+            hits_query = (
+                sa.update(table)
+                .where(table.c.key == sa.bindparam("hit_key"))
+                .values(cache_hits=table.c.cache_hits + sa.bindparam("hit_count"), accessed_at_utc=now)
+            )
+
+            async with self._db_lock:
+                if fresh:
+                    await self._cnxn.execute(fresh_query, fresh)
+
+                if upgrades:
+                    await self._cnxn.execute(upgrade_query, upgrades)
+
+                if hits:
+                    await self._cnxn.execute(hits_query, [{"hit_key": k, "hit_count": n} for k, n in hits.items()])
+
+                await self._cnxn.commit()
 
     async def _cache_lookup(self, *, key: str) -> httpx.Response | None:
         """Retrieve the response from cache."""
@@ -157,69 +799,203 @@ class CachePolicy:
         if not (cached := await self._sql_select(key=key)):
             return None
 
-        response = httpx.Response(
+        expires_at = cached.expires_at_utc or (cached.created_at_utc + self.default_ttl)
+
+        if expires_at < _utc_now():
+            self._background_task(coro=self._sql_delete(key=key))
+            return None
+
+        if (record := decode_record(cached.record_format, cached.headers, cached.stream)) is None:
+            log.debug(f"Unreadable cache record (format {cached.record_format}), treating as a cache miss.")
+            return None
+
+        headers, content = record
+        response = _json.JSONResponse(status_code=cached.status_code, headers=headers, content=content)
+
+        self._memory.put(
+            key,
             status_code=cached.status_code,
-            headers=json.loads(cached.headers),
-            content=b64.b64decode(cached.stream.encode("ascii")),
+            headers=headers,
+            content=content,
+            expires_at=expires_at,
+            description=cached.request,
         )
 
-        # Update the cache metadata
-        self._background_task(coro=self._sql_insert(key=key, r=response, hits=cached.cache_hits + 1))
+        # Update the cache metadata, upgrading records written in an older format.
+        self._queue_hit(key=key)
+
+        if cached.record_format != RECORD_FORMAT_CURRENT:
+            self._queue_write(key=key, r=response)
 
         return response
 
-    async def build_cache_key(self, request: httpx.Request) -> str:
-        """Define a unique key to identify the request."""
-        # READ THE REQUEST BODY SO WE CAN ACCURATELY CACHE ITS REPRESENTATION.
-        body = await request.aread()
+    @classmethod
+    def describe_request(cls, request: httpx.Request, *, namespace: str = "") -> str:
+        """Describe the request in a canonical, human-readable form. The body must already be read."""
+        path = request.url.path
+        matches = [fragment for fragment in cls.ORDER_INSENSITIVE_FIELDS if fragment in path]
+        unordered = cls.ORDER_INSENSITIVE_FIELDS[max(matches, key=len)] if matches else frozenset()
 
         # NORMALIZE THE URL IN CASE OF INTERESTING CHARACTERS.
         p = f":{request.url.port}" if request.url.port else ""
-        u = f"{request.url.raw_host.decode('utf-8')}{p}/{request.url.raw_path.decode('utf-8')}"
+        u = f"{request.url.raw_host.decode('utf-8')}{p}{path}"
+
+        # PARAMETER ORDER NEVER MATTERS, BUT REPEATED PARAMETERS KEEP THEIR RELATIVE ORDER.
+        if params := sorted(request.url.params.multi_items(), key=lambda pair: pair[0]):
+            u += f"?{urllib.parse.urlencode(params)}"
+
+        description = f"{request.method} {u}"
+
+        if body := _canonical_body(request, unordered=unordered):
+            description += f" {body}"
+
+        # THE SAME REQUEST CAN ANSWER DIFFERENTLY FOR ANOTHER USER OR ORG.
+        if namespace:
+            description = f"[{namespace}] {description}"
+
+        return description
+
+    @classmethod
+    async def build_cache_key(cls, request: httpx.Request, *, namespace: str = "") -> str:
+        """Define a unique, fixed-width key to identify the request."""
+        # READ THE REQUEST BODY SO WE CAN ACCURATELY CACHE ITS REPRESENTATION.
+        await request.aread()
+        description = cls.describe_request(request, namespace=namespace)
+        return hashlib.blake2b(description.encode("utf-8"), digest_size=20).hexdigest()
+
+    @staticmethod
+    def is_cacheable(request: httpx.Request) -> bool:
+        """Determine if the request only reads, and may be answered from the cache."""
+        # A WRITE IS NEVER ANSWERED FROM THE CACHE, EVEN IF IT WAS MARKED CACHEABLE.
+        return CachePolicy.CACHE_CONTROL_HEADER in request.headers and not _retry._is_retry_unsafe(request)
+
+    def invalidated_by(self, request: httpx.Request) -> tuple[str, ...]:
+        """Determine which cached endpoints a (mutating) request may make stale."""
+        if request.method == "GET" or CachePolicy.is_cacheable(request):
+            return ()
+
+        path = request.url.path
+        return tuple(
+            {
+                fragment
+                for mutation, affected in self.MUTATION_INVALIDATES.items()
+                if mutation in path
+                for fragment in affected
+            }
+        )
+
+    async def invalidate(self, request: httpx.Request) -> None:
+        """Forget the cached responses which a mutating request may have made stale."""
+        if not (affected := self.invalidated_by(request)):
+            return
+
+        await request.aread()
+        identifiers, types = _mutation_targets(request)
+
+        # MEMORY IS CHEAP TO SEARCH, SO ITS STALE RESPONSES ARE DROPPED RIGHT AWAY.
+        self._memory.evict(
+            lambda description: _is_invalidated(description, affected=affected, identifiers=identifiers, types=types)
+        )
+
+        # DISK IS ONLY SEARCHED BEFORE THE NEXT READ, SO A LOOP OF MUTATIONS COSTS A SINGLE SCAN.
+        self._pending_invalidations.append((affected, identifiers, types))
+
+    async def _apply_invalidations(self) -> int:
+        """Remove the cached responses which the mutations since the last search made stale, returning how many."""
+        # A READ WAITS ON A SEARCH ALREADY UNDER WAY, SINCE THE RESPONSE IT WANTS MAY BE ABOUT TO BE REMOVED.
+        async with self._invalidation_lock:
+            if not self._pending_invalidations:
+                return 0
+
+            invalidations, self._pending_invalidations = self._pending_invalidations, []
+
+            # LAND ANY QUEUED WRITES, SO A STALE RESPONSE CANNOT BE WRITTEN BACK AFTER WE DELETE IT.
+            await self._setup_database()
+            await self.flush()
+            assert self._cnxn is not None, "Caching database is not setup."
+
+            table = CachePolicy.CACHE_RESPONSE_TABLE
+            fragments = {fragment for affected, *_ in invalidations for fragment in affected}
+            candidates = sa.select(table.c.key, table.c.request).where(
+                sa.or_(*(table.c.request.contains(fragment, autoescape=True) for fragment in fragments))
+            )
+
+            async with self._flush_lock, self._db_lock:
+                rows = (await self._cnxn.execute(candidates)).all()
+                stale = [
+                    key
+                    for key, description in rows
+                    if any(
+                        _is_invalidated(description, affected=affected, identifiers=identifiers, types=types)
+                        for affected, identifiers, types in invalidations
+                    )
+                ]
+
+                for batch in utils.batched(stale, n=500):
+                    await self._cnxn.execute(sa.delete(table).where(table.c.key.in_(batch)))
 
-        # ADD THE PARAMS AND DATA AS QUERY STRING.
-        q = ""
+                await self._cnxn.commit()
 
-        if request.url.query:
-            q += f"::params::{request.url.query.decode('utf-8')}"
+        self.stats["invalidation_scans"] += 1
 
-        if body:
-            q += f"::data::{body.decode('utf-8')}"
+        if stale:
+            log.debug(f"Invalidated {len(stale):,} cached responses after {len(invalidations):,} mutations")
 
-        return f"{u}?{q}"
+        return len(stale)
 
     def should_cache(self, request: httpx.Request, response: httpx.Response) -> bool:
         """Determine if the response should be cached."""
-        return CachePolicy.CACHE_CONTROL_HEADER in request.headers and response.status_code < 300
+        return CachePolicy.is_cacheable(request) and response.status_code < 300
 
     async def check(self, request: httpx.Request) -> httpx.Response | None:
         """Maybe fetch the response from the cache."""
-        should_cache = CachePolicy.CACHE_CONTROL_HEADER in request.headers
-        busted_cache = CachePolicy.CACHE_BUSTING_HEADER in request.headers
+        should_cache = CachePolicy.is_cacheable(request)
+        no_cache = "no-cache" in request.headers.get("cache-control", "")
+        busted_cache = CachePolicy.CACHE_BUSTING_HEADER in request.headers or no_cache
 
         if not should_cache:
             return None
 
-        await self._setup_database()
-
-        sk_cache_key = await self.build_cache_key(request)
+        sk_cache_key = await self.build_cache_key(request, namespace=self.namespace)
 
         if busted_cache:
+            self._memory.pop(sk_cache_key)
+            self._discard_queued(key=sk_cache_key)
+            await self._setup_database()
             self._background_task(coro=self._sql_delete(key=sk_cache_key))
+            self.stats["misses"] += 1
+            return None
+
+        # L1 :: THIS PROCESS HAS ALREADY SEEN THE RESPONSE.
+        if entry := self._memory.get(sk_cache_key, now=_utc_now()):
+            self.stats["memory_hits"] += 1
+            status_code, headers, content = entry
+            hit = _json.JSONResponse(status_code=status_code, headers=headers, content=content, request=request)
+            hit.headers[CachePolicy.CACHE_FETCHED_HEADER] = "true"
+            hit.headers[CachePolicy.CACHE_TIER_HEADER] = "memory"
+            return hit
 
+        await self._setup_database()
+        await self._apply_invalidations()
+
+        # L2 :: A PREVIOUS RUN HAS SEEN THE RESPONSE.
         if (r := await self._cache_lookup(key=sk_cache_key)) is not None:
+            self.stats["disk_hits"] += 1
+
             # ATTACH THE REQUEST TO THE CACHED RESPONSE
             r.request = request
 
             # ADD THE CACHE HIT HEADER
             r.headers[CachePolicy.CACHE_FETCHED_HEADER] = "true"
+            r.headers[CachePolicy.CACHE_TIER_HEADER] = "disk"
             return r
 
+        self.stats["misses"] += 1
         return None
 
     async def store(self, request: httpx.Request, response: httpx.Response) -> None:
         """Store the response in the cache."""
-        sk_cache_key = await self.build_cache_key(request)
+        sk_cache_key = await self.build_cache_key(request, namespace=self.namespace)
 
         # READ THE BODY SO WE CAN CACHE IT
         await response.aread()
@@ -227,82 +1003,257 @@ class CachePolicy:
         # ADD THE REQUEST TO THE RESPONSE
         response.request = request
 
-        self._background_task(coro=self._sql_insert(key=sk_cache_key, r=response))
+        expires_at = _utc_now() + self.ttl_for(request)
+        description = self.describe_request(request, namespace=self.namespace)
+        self._queue_write(key=sk_cache_key, r=response, expires_at=expires_at, description=description)
+
+        self._memory.put(
+            sk_cache_key,
+            status_code=response.status_code,
+            headers=[(k, v) for k, v in response.headers.raw if k.lower() not in _HEADERS_NOT_STORED],
+            content=response.content,
+            expires_at=expires_at,
+            description=description,
+        )
+
+        # KEEP LONG-RUNNING SESSIONS WITHIN THE BYTE BUDGET.
+        self._writes_since_sweep += 1
+
+        if self._writes_since_sweep >= CachePolicy.SWEEP_EVERY_N_WRITES:
+            self._writes_since_sweep = 0
+            self._background_task(coro=self.prune())
 
     async def expire(self, request: httpx.Request) -> None:
         """Remove the response from the cache."""
-        sk_cache_key = await self.build_cache_key(request)
+        sk_cache_key = await self.build_cache_key(request, namespace=self.namespace)
+        self._memory.pop(sk_cache_key)
+        self._discard_queued(key=sk_cache_key)
         await self._sql_delete(key=sk_cache_key)
 
     async def clear(self) -> None:
         """Remove all responses from the cache."""
+        self._memory.clear()
+        self._pending_writes.clear()
+        self._pending_hits.clear()
+        self._pending_nbytes = 0
+
         if self._cnxn is None:
             log.warning("Cache is not yet set up.")
             return
 
-        await self._cnxn.run_sync(_Base.metadata.drop_all)
-        await self._cnxn.run_sync(_Base.metadata.create_all)
+        async with self._db_lock:
+            await self._cnxn.run_sync(_Base.metadata.drop_all)
+            await self._cnxn.run_sync(_Base.metadata.create_all)
+            await self._cnxn.commit()
 
 
 class CachedRetryTransport(httpx.AsyncBaseTransport):
     """Implements a retry policy with caching on every HTTP request."""
 
+    REQUEST_DISPATCH_HEADER = "x-cs-tools-request-dispatch-time-utc"
+    RESPONSE_RECEIVE_HEADER = "x-cs-tools-response-receive-time-utc"
+    CONNECTION_WAIT_HEADER = "x-cs-tools-connection-wait-seconds"
+    SLOT_WAIT_HEADER = "x-cs-tools-slot-wait-seconds"
+    ATTEMPTS_HEADER = "x-cs-tools-attempts"
+
+    # KEEP IDLE CONNECTIONS LONG ENOUGH TO BRIDGE GAPS BETWEEN BATCHES, BUT UNDER THE USUAL 60s LOAD BALANCER TIMEOUT.
+    KEEPALIVE_EXPIRY_SECONDS = 30.0
+
     def __init__(
         self,
         cache_policy: Optional[CachePolicy] = None,
         max_concurrent_requests: int = 1,
         retry_policy: Optional[tenacity.AsyncRetrying] = None,
         wrapped_transport: Optional[httpx.AsyncBaseTransport] = None,
+        concurrency_pools: Optional[dict[str, int]] = None,
+        pool_routes: Optional[dict[str, str]] = None,
+        priority_routes: Optional[dict[str, str]] = None,
+        reserved_slots: int = _concurrency.DEFAULT_RESERVED_SLOTS,
+        http2: bool = False,
+        recorder: Optional[CassetteRecorder] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
         **transport_options: Any,
     ):
+        # SIZE THE CONNECTION POOL TO THE CONCURRENCY LIMIT, SO REQUESTS NEVER QUEUE TWICE OR LEAVE IDLE SOCKETS BEHIND.
+        if "limits" not in transport_options:
+            transport_options["limits"] = httpx.Limits(
+                max_connections=max_concurrent_requests + reserved_slots,
+                max_keepalive_connections=max_concurrent_requests,
+                keepalive_expiry=CachedRetryTransport.KEEPALIVE_EXPIRY_SECONDS,
+            )
+
         # WHEN A TRANSPORT IS INJECTED (eg. httpx.MockTransport IN TESTS), transport_options ARE IGNORED.
-        self._wrapper = wrapped_transport or httpx.AsyncHTTPTransport(**transport_options)
+        self._transport_options = transport_options
+        self.http2 = http2 and wrapped_transport is None and _is_http2_available()
+        self._wrapper = wrapped_transport or httpx.AsyncHTTPTransport(http2=self.http2, **transport_options)
+        self._negotiated_http_version: Optional[str] = None
+        self.connection_stats: collections.Counter[str] = collections.Counter()
+        self._retired_transports: list[httpx.AsyncBaseTransport] = []
         self.cache = cache_policy
-        self.rate_limit = asyncio.Semaphore(value=max_concurrent_requests)
+        self.recorder = recorder
+        self.hedge_policy = hedge_policy
+        self.rate_limit = _concurrency.AdaptiveConcurrencyLimiter(
+            ceiling=max_concurrent_requests, reserved=reserved_slots
+        )
+        self.pool_routes = _concurrency.DEFAULT_POOL_ROUTES if pool_routes is None else pool_routes
+        self.priority_routes = _concurrency.DEFAULT_PRIORITY_ROUTES if priority_routes is None else priority_routes
+        self.pools = {
+            name: _concurrency.AdaptiveConcurrencyLimiter(ceiling=min(limit, max_concurrent_requests))
+            for name, limit in (concurrency_pools or _concurrency.default_pools(max_concurrent_requests)).items()
+        }
         self.retrier = retry_policy or tenacity.AsyncRetrying(stop=tenacity.stop_after_attempt(1))
+        self._in_flight: dict[str, asyncio.Future[tuple[int, list[tuple[bytes, bytes]], bytes]]] = {}
 
     @property
     def max_concurrency(self) -> int:
-        """Get the allowed maximum number of concurrent requests."""
-        return self.rate_limit._value
+        """Get the allowed maximum number of concurrent requests, as currently adapted to the server's health."""
+        return self.rate_limit.limit
+
+    def _pool_for(self, request: httpx.Request) -> Optional[_concurrency.AdaptiveConcurrencyLimiter]:
+        """Determine which concurrency pool, if any, the request belongs to."""
+        if (name := request.headers.get(_concurrency.CONCURRENCY_POOL_HEADER)) is None:
+            matches = [fragment for fragment in self.pool_routes if fragment in request.url.path]
+            name = self.pool_routes[max(matches, key=len)] if matches else None
+
+        return self.pools.get(name) if name is not None else None
+
+    def _priority_for(self, request: httpx.Request) -> str:
+        """Determine the request's place in the queue."""
+        if (priority := request.headers.get(_concurrency.PRIORITY_HEADER)) is None:
+            matches = [fragment for fragment in self.priority_routes if fragment in request.url.path]
+            priority = self.priority_routes[max(matches, key=len)] if matches else "normal"
+
+        return priority
+
+    @contextlib.asynccontextmanager
+    async def _concurrency_slot(self, request: httpx.Request, *, priority: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a slot in the request's pool, then in the transport's overall limit."""
+        priority = priority or self._priority_for(request)
+
+        if (pool := self._pool_for(request)) is None:
+            async with self.rate_limit.slot(priority):
+                yield
+            return
+
+        # A POOL CAPS ITS SHARE OF THE OVERALL LIMIT, SO ONLY POOLED REQUESTS QUEUE BEHIND EACH OTHER.
+        async with pool.slot(priority), self.rate_limit.slot(priority):
+            yield
+
+    def _fall_back_to_http1(self) -> None:
+        """Replace the HTTP/2 connection pool with an HTTP/1.1 one, for the rest of the session."""
+        log.warning("HTTP/2 was rejected by ThoughtSpot (or a proxy in front of it), falling back to HTTP/1.1")
+        self.http2 = False
+        self._retired_transports.append(self._wrapper)
+        self._wrapper = httpx.AsyncHTTPTransport(http2=False, **self._transport_options)
 
     async def _handle_async_request(self, request: httpx.Request) -> httpx.Response:
         """Ensure request is injected on exception."""
-        with httpx._exceptions.request_context(request=request):
-            r = await self._wrapper.handle_async_request(request=request)
-
-            if isinstance(r, httpx.Response):
-                r.request = request
+        start = time.perf_counter()
+        trace = _ConnectionTrace(parent=request.extensions.get("trace"))
+        request.extensions = {**request.extensions, "trace": trace}
+
+        try:
+            with httpx._exceptions.request_context(request=request):
+                r = await self._wrapper.handle_async_request(request=request)
+
+                if isinstance(r, httpx.Response):
+                    r = _json.JSONResponse.from_response(r)
+                    r.request = request
+
+        # A SERVER WHICH CANNOT ANSWER IN TIME IS A SERVER UNDER PRESSURE.
+        except httpx.TimeoutException:
+            self.rate_limit.record(endpoint=request.url.path, pressured=True)
+            raise
+
+        # SOME SERVERS AND PROXIES ADVERTISE h2 BUT CANNOT SPEAK IT, SO THE RETRY GOES OUT OVER HTTP/1.1. ONCE ANY
+        # RESPONSE HAS ARRIVED, AN ORDINARY PROTOCOL ERROR (eg. A DROPPED KEEP-ALIVE) SAYS NOTHING ABOUT HTTP/2.
+        except (httpx.RemoteProtocolError, httpx.LocalProtocolError) as e:
+            if self.http2 and (self._negotiated_http_version is None or _is_h2_error(e)):
+                self._fall_back_to_http1()
+            raise
+
+        # EVERY ATTEMPT IS RECORDED, SO A REPLAY SEES THE SAME RETRIES THE ORIGINAL SESSION DID.
+        if self.recorder is not None:
+            r = await self.recorder.record(request, r, elapsed=time.perf_counter() - start)
+
+        # TIME SPENT WAITING ON OUR OWN CONNECTION POOL IS NOT SERVER LATENCY.
+        if (wait_seconds := trace.wait_seconds) is not None:
+            self.connection_stats["connections_opened" if trace.opened_connection else "connections_reused"] += 1
+            self.connection_stats["connection_wait_seconds"] += wait_seconds  # type: ignore[assignment]
+            r.headers[CachedRetryTransport.CONNECTION_WAIT_HEADER] = f"{wait_seconds:.4f}"
+
+        if self.http2 and self._negotiated_http_version is None:
+            self._negotiated_http_version = r.http_version
+            log.debug(f"Negotiated {r.http_version} with {request.url.host} (HTTP/2 was offered)")
+
+        self.rate_limit.record(
+            endpoint=request.url.path,
+            latency=time.perf_counter() - start - (trace.wait_seconds or 0.0),
+            pressured=r.status_code in _retry.SERVER_PRESSURE_STATUSES,
+        )
 
         return r
 
-    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    async def _send_hedge(self, request: httpx.Request) -> httpx.Response:
+        """Send a duplicate of a slow request, only once every other waiting request has a slot."""
+        async with self._concurrency_slot(request, priority="background"):
+            return await self._handle_async_request(request=request)
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        """Serve the request from the cache, or send it to the server under the rate limit and retry policy."""
         UTC_NOW = ft.partial(dt.datetime.now, tz=dt.timezone.utc)
 
         # SET THE REQUEST DISPATCH TIME
-        request.headers["x-cs-tools-request-dispatch-time-utc"] = UTC_NOW().isoformat()
+        request.headers[CachedRetryTransport.REQUEST_DISPATCH_HEADER] = UTC_NOW().isoformat()
 
         # CACHE HITS SHOULD NOT AFFECT RATE LIMITS
         if self.cache is not None and (cached_response := await self.cache.check(request=request)):
-            # SET THE EFFECTIVE RESPONSE TIME
-            cached_response.headers["x-cs-tools-response-receive-time-utc"] = UTC_NOW().isoformat()
+            # SET THE EFFECTIVE RESPONSE TIME, THE STORED TIMINGS BELONG TO THE ORIGINAL REQUEST.
+            cached_response.headers[CachedRetryTransport.RESPONSE_RECEIVE_HEADER] = UTC_NOW().isoformat()
+            cached_response.headers[CachedRetryTransport.SLOT_WAIT_HEADER] = "0"
+            cached_response.headers[CachedRetryTransport.ATTEMPTS_HEADER] = "0"
 
             return cached_response
 
-        # RATE LIMITING OUTSIDE OF RETRYING SO WE EFFECTIVELY IMPLEMENT BACKPRESSURE
-        async with self.rate_limit:
-            # OVERRIDE THE REQUEST DISPATCH TIME IN CASE WE'VE BEEN WAITING
-            request.headers["x-cs-tools-request-dispatch-time-utc"] = UTC_NOW().isoformat()
+        attempts = 0
 
-            try:
-                response: httpx.Response = await self.retrier(self._handle_async_request, request=request)
-            except tenacity.RetryError as error:
-                raise error from None
-            except Exception as error:
-                raise error from None
+        async def attempt() -> httpx.Response:
+            nonlocal attempts
+            attempts += 1
+
+            if self.hedge_policy is not None:
+                return await self.hedge_policy.send(
+                    request, send=self._handle_async_request, send_hedge=self._send_hedge
+                )
+
+            return await self._handle_async_request(request=request)
+
+        try:
+            queued_at = time.perf_counter()
+
+            # RATE LIMITING OUTSIDE OF RETRYING SO WE EFFECTIVELY IMPLEMENT BACKPRESSURE
+            async with self._concurrency_slot(request):
+                slot_wait = time.perf_counter() - queued_at
+
+                # OVERRIDE THE REQUEST DISPATCH TIME IN CASE WE'VE BEEN WAITING
+                request.headers[CachedRetryTransport.REQUEST_DISPATCH_HEADER] = UTC_NOW().isoformat()
+
+                try:
+                    response: httpx.Response = await self.retrier(attempt)
+                except tenacity.RetryError as error:
+                    raise error from None
+                except Exception as error:
+                    raise error from None
+
+        # A WRITE MAY HAVE BEEN APPLIED EVEN IF WE NEVER SAW ITS RESPONSE, SO THE READS IT TOUCHES ARE NOW SUSPECT.
+        finally:
+            if self.cache is not None and self.cache.invalidated_by(request):
+                await self.cache.invalidate(request)
 
         # SET THE EFFECTIVE RESPONSE TIME
-        response.headers["x-cs-tools-response-receive-time-utc"] = UTC_NOW().isoformat()
+        response.headers[CachedRetryTransport.RESPONSE_RECEIVE_HEADER] = UTC_NOW().isoformat()
+        response.headers[CachedRetryTransport.SLOT_WAIT_HEADER] = f"{slot_wait:.4f}"
+        response.headers[CachedRetryTransport.ATTEMPTS_HEADER] = str(attempts)
 
         # CHECK IF WE SHOULD CACHE THE RESPONSE
         if self.cache is not None and self.cache.should_cache(request=request, response=response):
@@ -310,9 +1261,78 @@ class CachedRetryTransport(httpx.AsyncBaseTransport):
 
         return response
 
+    @staticmethod
+    def _is_coalescable(request: httpx.Request) -> bool:
+        """Determine if concurrent, identical requests may share a single response."""
+        if not CachePolicy.is_cacheable(request):
+            return False
+
+        return CachePolicy.CACHE_BUSTING_HEADER not in request.headers
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._is_coalescable(request):
+            return await self._send(request)
+
+        key = await CachePolicy.build_cache_key(request)
+
+        # ANOTHER COROUTINE IS ALREADY FETCHING THIS, SO WAIT FOR IT RATHER THAN ASKING THE SERVER TWICE.
+        if (in_flight := self._in_flight.get(key)) is not None:
+            try:
+                status_code, headers, content = await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                # THE LEADER WAS CANCELLED, NOT US, SO FETCH IT OURSELVES.
+                if not in_flight.cancelled():
+                    raise
+                return await self._send(request)
+
+            r = _json.JSONResponse(status_code=status_code, headers=headers, content=content, request=request)
+            r.headers[CachePolicy.CACHE_TIER_HEADER] = "coalesced"
+            r.headers[CachedRetryTransport.SLOT_WAIT_HEADER] = "0"
+            r.headers[CachedRetryTransport.ATTEMPTS_HEADER] = "0"
+            return r
+
+        leader: asyncio.Future[tuple[int, list[tuple[bytes, bytes]], bytes]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        # MARK ANY EXCEPTION AS RETRIEVED, IN CASE NO ONE ELSE WAS WAITING ON IT.
+        leader.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = leader
+
+        try:
+            response = await self._send(request)
+            await response.aread()
+
+        except asyncio.CancelledError:
+            leader.cancel()
+            raise
+
+        except BaseException as e:
+            leader.set_exception(e)
+            raise
+
+        else:
+            # EACH WAITER GETS ITS OWN COPY OF THE BODY, WHICH HAS ALREADY BEEN DECODED.
+            headers = [(k, v) for k, v in response.headers.raw if k.lower() not in _HEADERS_NOT_STORED]
+            leader.set_result((response.status_code, headers, response.content))
+
+        finally:
+            self._in_flight.pop(key, None)
+
+        return response
+
     async def aclose(self) -> None:
         """Close the transport."""
-        await self._wrapper.aclose()
+        if self.connection_stats:
+            log.debug(f"HTTP connection statistics: {dict(self.connection_stats)}")
+
+        if self.hedge_policy is not None and self.hedge_policy.stats:
+            log.debug(f"HTTP hedging statistics: {dict(self.hedge_policy.stats)}")
+
+        for transport in (*self._retired_transports, self._wrapper):
+            await transport.aclose()
+
+        if self.recorder is not None:
+            await self.recorder.aclose()
 
         if self.cache is not None:
             await self.cache.aclose()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from collections.abc import Awaitable
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
 from typing import Any, Optional, Union
 import asyncio
+import contextvars
 import datetime as dt
 import json
 import logging
@@ -14,19 +15,120 @@ import tenacity
 
 from cs_tools import _types, utils, validators
 from cs_tools.__project__ import __version__
-from cs_tools.api import _retry, _transport
+from cs_tools.api import _cassette, _concurrency, _json, _retry, _telemetry, _transport
 import cs_tools.api.utils as api_utils
 
 log = logging.getLogger(__name__)
 CALLOSUM_DEFAULT_TIMEOUT_SECONDS = 60 * 5
 
+# SET WHILE AN ENDPOINT IS CALLED THROUGH RESTAPIClient.stream_json_array, SO ITS BODY IS LEFT UNREAD.
+_STREAM_RESPONSE: contextvars.ContextVar[bool] = contextvars.ContextVar("_STREAM_RESPONSE", default=False)
+
+# SET WHILE AN ENDPOINT IS CALLED THROUGH RESTAPIClient.trusted, SO ITS REQUEST SKIPS VALIDATION TOO.
+_TRUSTED_CALL: contextvars.ContextVar[bool] = contextvars.ContextVar("_TRUSTED_CALL", default=False)
+
+# EVERY REQUEST AND RESPONSE, AT DEBUG. SILENCE OR SAMPLE THIS LOGGER TO TAKE IT OFF THE HOT PATH.
+wire_log = logging.getLogger(f"{__name__}.wire")
+
+# MARKS A REQUEST WHICH WAS SAMPLED INTO THE WIRE LOG, SO ITS RESPONSE IS LOGGED TOO.
+_WIRE_LOG_EXTENSION = "cs_tools_wire_log"
+
+
+class _RequestDetail:
+    """The headers, params and body of a request, formatted only if the log record is emitted."""
+
+    __slots__ = ("request",)
+
+    def __init__(self, request: httpx.Request):
+        self.request = request
+
+    def __str__(self) -> str:
+        request = self.request
+        detail = f"\n\t=== HEADERS ===\n{dict(request.headers)}"
+
+        if request.url.params:
+            detail += f"\n\t===  PARAMS ===\n{request.url.params}"
+
+        is_sending_files_to_server = request.headers.get("Content-Type", "").startswith("multipart/form-data")
+
+        if not is_sending_files_to_server and request.content:
+            detail += f"\n\t===    DATA ===\n{dict(httpx.QueryParams(request.content.decode()))}"
+
+        return f"{detail}\n"
+
+
+class _ResponseDetail:
+    """The timing, cache and error details of a response, formatted only if the log record is emitted."""
+
+    __slots__ = ("response",)
+
+    def __init__(self, response: httpx.Response):
+        self.response = response
+
+    def __str__(self) -> str:
+        response = self.response
+        requested_at = response.request.headers.get(_transport.CachedRetryTransport.REQUEST_DISPATCH_HEADER, None)
+        responsed_at = response.headers.get(_transport.CachedRetryTransport.RESPONSE_RECEIVE_HEADER, None)
+        detail = ""
+
+        if requested_at and responsed_at:
+            elapsed = dt.datetime.fromisoformat(responsed_at) - dt.datetime.fromisoformat(requested_at)
+            detail += f" {elapsed.total_seconds():.4f}s"
+
+        if connection_wait := response.headers.get(_transport.CachedRetryTransport.CONNECTION_WAIT_HEADER, None):
+            detail += f" (waited {connection_wait}s for a connection)"
+
+        if _transport.CachePolicy.CACHE_FETCHED_HEADER in response.headers:
+            detail += " [~ cached ~]"
+
+        if response.status_code >= 400:
+            detail += f"\n{response.text}\n"
+
+        return detail
+
+
+class _TrustedEndpoints:
+    """
+    Call RESTAPIClient endpoints without validating their arguments.
+
+    Only for internal workflows whose arguments come from data that was already validated
+    (eg. the results of an earlier API call), and which call an endpoint many thousands of
+    times. Arguments are passed through as-is, so nothing is coerced.
+    """
+
+    def __init__(self, client: RESTAPIClient):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Callable[..., Coroutine[Any, Any, httpx.Response]]:
+        endpoint = getattr(type(self._client), name)
+
+        # pydantic.validate_call KEEPS THE FUNCTION IT WRAPS, ALONG WITH ANY DECORATORS BENEATH IT.
+        if (raw := getattr(endpoint, "raw_function", None)) is None:
+            raise AttributeError(f"RESTAPIClient.{name} is not a validated endpoint")
+
+        bound = raw.__get__(self._client, type(self._client))
+
+        async def call(*a: Any, **kw: Any) -> httpx.Response:
+            # THE ENDPOINT SENDS THROUGH RESTAPIClient.request, WHICH MUST NOT VALIDATE IT EITHER.
+            token = _TRUSTED_CALL.set(True)
+
+            try:
+                return await bound(*a, **kw)
+            finally:
+                _TRUSTED_CALL.reset(token)
+
+        # ONLY LOOKED UP ONCE PER ENDPOINT, AFTER THAT THE WRAPPED METHOD IS FOUND ON THE INSTANCE.
+        setattr(self, name, call)
+        return call
+
 
 class RESTAPIClient(httpx.AsyncClient):
     """
     Connect to the ThoughtSpot API.
 
     Endpoints which fetch/search data will have successful responses cached. If you
-    need to re-fetch data, you can add the CACHE_BUSTING_HEADER (x-cs-tools-cache-bust).
+    need to re-fetch data, you can add the CACHE_BUSTING_HEADER (x-cs-tools-cache-bust)
+    or a standard Cache-Control: no-cache header.
 
     INITIAL DESIGN GOALS:
 
@@ -39,6 +141,9 @@ class RESTAPIClient(httpx.AsyncClient):
       3. Any V1 endpoints which need continued coverage should be prefixed with v1_.
          These endpoints may violate all other goals above as they will be progressively
          removed.
+
+    Internal workflows which call an endpoint in a tight loop, with arguments which are
+    already known-good, may skip validation by calling it through `.trusted` instead.
     """
 
     @pydantic.validate_call(validate_return=False, config=validators.METHOD_CONFIG)
@@ -48,6 +153,8 @@ class RESTAPIClient(httpx.AsyncClient):
         concurrency: int = 15,
         cache_directory: Optional[pathlib.Path] = None,
         verify: bool = True,
+        http2: bool = False,
+        wire_log_sample: int = 1,
         **client_opts: Any,
     ) -> None:
         client_opts["base_url"] = str(base_url)
@@ -55,27 +162,43 @@ class RESTAPIClient(httpx.AsyncClient):
         client_opts["event_hooks"] = {"request": [self.__before_request__], "response": [self.__after_response__]}
         client_opts["headers"] = {"x-requested-by": "CS Tools", "user-agent": f"CS Tools/{__version__}"}
 
+        wrapped_transport = client_opts.pop("wrapped_transport", None)
+        recorder = client_opts.pop("recorder", None)
+
+        # A RECORDING MUST SEE EVERY EXCHANGE, AND A REPLAY MUST NEITHER READ FROM NOR WRITE TO THE REAL CACHE.
+        if recorder is not None or isinstance(wrapped_transport, _cassette.ReplayTransport):
+            cache_directory = None
+
         client_opts["transport"] = _transport.CachedRetryTransport(
             cache_policy=_transport.CachePolicy(directory=cache_directory) if cache_directory else None,
             max_concurrent_requests=concurrency,
-            wrapped_transport=client_opts.pop("wrapped_transport", None),
+            wrapped_transport=wrapped_transport,
+            concurrency_pools=client_opts.pop("concurrency_pools", None),
+            recorder=recorder,
+            hedge_policy=client_opts.pop("hedge_policy", None),
             retry_policy=tenacity.AsyncRetrying(
-                retry=(
+                # ONE BUDGET IS SHARED BY EVERY REQUEST, SO A STRUGGLING CLUSTER NEVER SEES A RETRY STORM.
+                retry=_retry.RetryBudget(
                     tenacity.retry_if_exception(_retry.request_errors_unless_importing_tml)
                     | tenacity.retry_if_result(_retry.if_server_is_under_pressure)
                 ),
                 # JITTER SO CONCURRENT RETRIES DON'T STAMPEDE A SERVER THAT IS ALREADY STRUGGLING.
-                wait=tenacity.wait_exponential_jitter(initial=2, max=30),
+                wait=_retry.wait_retry_after(fallback=tenacity.wait_exponential_jitter(initial=2, max=30)),
                 stop=tenacity.stop_after_attempt(max_attempt_number=3),
                 before_sleep=_retry.log_on_any_retry,
                 reraise=True,
             ),
             verify=verify,
+            http2=http2,
         )
 
         super().__init__(**client_opts)
         assert isinstance(self._transport, _transport.CachedRetryTransport), "Unexpected transport used for CS Tools"
         self._heartbeat_task: Optional[asyncio.Task] = None
+        self.telemetry = _telemetry.RequestTelemetry()
+        self.wire_log_sample = max(1, wire_log_sample)
+        self._wire_log_count = 0
+        self.trusted = _TrustedEndpoints(self)
 
     @property
     def cache(self) -> Optional[_transport.CachePolicy]:
@@ -111,6 +234,14 @@ class RESTAPIClient(httpx.AsyncClient):
 
             await asyncio.sleep(30)
 
+    def _should_log_exchange(self) -> bool:
+        """Sample which exchanges are written to the wire log, one in every `wire_log_sample`."""
+        if not wire_log.isEnabledFor(logging.DEBUG):
+            return False
+
+        self._wire_log_count += 1
+        return (self._wire_log_count - 1) % self.wire_log_sample == 0
+
     async def __before_request__(self, request: httpx.Request) -> None:
         """
         Called after a request is fully prepared, but before it is sent to the network.
@@ -120,17 +251,12 @@ class RESTAPIClient(httpx.AsyncClient):
         Further reading:
             https://www.python-httpx.org/advanced/#event-hooks
         """
-        log_msg = f">>> HTTP {request.method} -> {request.url.path}\n\t=== HEADERS ===\n{dict(request.headers)}"
-
-        if request.url.params:
-            log_msg += f"\n\t===  PARAMS ===\n{request.url.params}"
-
-        is_sending_files_to_server = request.headers.get("Content-Type", "").startswith("multipart/form-data")
-
-        if not is_sending_files_to_server and request.content:
-            log_msg += f"\n\t===    DATA ===\n{dict(httpx.QueryParams(request.content.decode()))}"
+        if not self._should_log_exchange():
+            return
 
-        log.debug(f"{log_msg}\n")
+        request.extensions = {**request.extensions, _WIRE_LOG_EXTENSION: True}
+        fields = {"http_method": request.method, "http_path": request.url.path}
+        wire_log.debug(">>> HTTP %s -> %s%s", request.method, request.url.path, _RequestDetail(request), extra=fields)
 
     async def __after_response__(self, response: httpx.Response) -> None:
         """
@@ -143,34 +269,82 @@ class RESTAPIClient(httpx.AsyncClient):
         Further reading:
             https://www.python-httpx.org/advanced/#event-hooks
         """
-        requested_at = response.request.headers.get("x-CS Tools-request-dispatch-time-utc", None)
-        responsed_at = response.headers.get("x-CS Tools-response-receive-time-utc", None)
-
-        if requested_at and responsed_at:
-            requested_at = dt.datetime.fromisoformat(requested_at)
-            responsed_at = dt.datetime.fromisoformat(responsed_at)
-            elapsed = f"{(responsed_at - requested_at).total_seconds():.4f}s"
-        else:
-            elapsed = ""
+        is_error = response.status_code >= 400
 
-        log_msg = f"<<< HTTP {response.status_code} <- {response.request.url.path} {elapsed}"
+        # ERRORS ARE ALWAYS LOGGED, NO MATTER THE SAMPLE.
+        if not (is_error or response.request.extensions.get(_WIRE_LOG_EXTENSION, False)):
+            return
 
-        if _transport.CachePolicy.CACHE_FETCHED_HEADER in response.headers:
-            log_msg += " [~ cached ~]"
+        if not wire_log.isEnabledFor(logging.DEBUG):
+            return
 
-        if response.status_code >= 400:
+        if is_error:
             await response.aread()
-            log_msg += f"\n{response.text}\n"
 
-        log.debug(log_msg)
+        fields = {
+            "http_method": response.request.method,
+            "http_path": response.request.url.path,
+            "http_status": response.status_code,
+            "http_cached": _transport.CachePolicy.CACHE_FETCHED_HEADER in response.headers,
+        }
+        wire_log.debug(
+            "<<< HTTP %s <- %s%s",
+            response.status_code,
+            response.request.url.path,
+            _ResponseDetail(response),
+            extra=fields,
+        )
 
-    @pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)
     async def request(self, method: str, url: Union[httpx.URL, str], **passthru: Any) -> httpx.Response:
         """Remove NULL from request data before sending/logging."""
+        send = self._send_request if _TRUSTED_CALL.get() else self._send_validated_request
+        return await send(method, url, **passthru)
+
+    async def _send_request(self, method: str, url: Union[httpx.URL, str], **passthru: Any) -> httpx.Response:
         passthru = api_utils.scrub_undefined_sentinel(passthru, null=None)
-        response = await super().request(method, url, **passthru)
+
+        if _STREAM_RESPONSE.get():
+            # A STREAMED BODY IS NEVER HELD IN FULL, SO IT CAN NEITHER BE CACHED NOR SHARED.
+            headers = httpx.Headers(passthru.pop("headers", None))
+            headers.pop(_transport.CachePolicy.CACHE_CONTROL_HEADER, None)
+            send_options = {k: passthru.pop(k) for k in ("auth", "follow_redirects") if k in passthru}
+            request = self.build_request(method, url, headers=headers, **passthru)
+            response = await self.send(request, stream=True, **send_options)
+        else:
+            response = await super().request(method, url, **passthru)
+
+        self.telemetry.record(response)
         return response
 
+    _send_validated_request = pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)(
+        _send_request
+    )
+
+    async def stream_json_array(
+        self, endpoint: Callable[..., Awaitable[httpx.Response]], *a: Any, **kw: Any
+    ) -> AsyncIterator[Any]:
+        """
+        Call an endpoint, yielding each element of its top-level JSON array as soon as it arrives.
+
+        The response is never held in memory in full, at the cost of bypassing the HTTP cache.
+        """
+        token = _STREAM_RESPONSE.set(True)
+
+        try:
+            r = await endpoint(*a, **kw)
+        finally:
+            _STREAM_RESPONSE.reset(token)
+
+        try:
+            if r.is_error:
+                await r.aread()
+                r.raise_for_status()
+
+            async for element in _json.aiter_array(r.aiter_bytes()):
+                yield element
+        finally:
+            await r.aclose()
+
     # ==================================================================================
     # AUTHENTICATION :: https://developers.thoughtspot.com/docs/rest-apiv2-reference#_authentication
     # ==================================================================================
@@ -319,19 +493,22 @@ class RESTAPIClient(httpx.AsyncClient):
 
         return self.post("api/rest/2.0/metadata/delete", json=options)
 
+    # NOT CACHED, TML IS COMMITTED BY ITS CALLERS AND EDITS MADE ELSEWHERE MUST NEVER BE MISSED.
     @pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)
-    @_transport.CachePolicy.mark_cacheable
+    @_concurrency.mark_pool("tml")
     def metadata_tml_export(
         self, guid: _types.ObjectIdentifier, export_fqn: bool = True, **options: Any
     ) -> Awaitable[httpx.Response]:
         """Get the EDOC of the ThoughtSpot object."""
-        options["metadata"] = [{"identifier": guid}]
+        if "metadata" not in options:
+            options["metadata"] = [{"identifier": guid}]
+
         options["export_fqn"] = export_fqn
         return self.post("api/rest/2.0/metadata/tml/export", headers=options.pop("headers", None), json=options)
 
     @pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)
-    @_transport.CachePolicy.mark_cacheable
     @_retry.mark_nonidempotent
+    @_concurrency.mark_pool("tml")
     def metadata_tml_import(
         self, tmls: list[str], policy: _types.TMLImportPolicy, **options: Any
     ) -> Awaitable[httpx.Response]:
@@ -341,8 +518,8 @@ class RESTAPIClient(httpx.AsyncClient):
         return self.post("api/rest/2.0/metadata/tml/import", headers=options.pop("headers", None), json=options)
 
     @pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)
-    @_transport.CachePolicy.mark_cacheable
     @_retry.mark_nonidempotent
+    @_concurrency.mark_pool("tml")
     def metadata_tml_async_import(
         self, tmls: list[str], policy: _types.TMLImportPolicy, **options: Any
     ) -> Awaitable[httpx.Response]:
@@ -510,13 +687,14 @@ class RESTAPIClient(httpx.AsyncClient):
     # ==================================================================================
 
     @pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)
+    @_concurrency.mark_pool("data")
     def search_data(
         self, logical_table_identifier: _types.ObjectIdentifier, query_string: str, **options: Any
     ) -> Awaitable[httpx.Response]:
         """Generates an Answer from a given data source."""
         options["query_string"] = query_string
         options["logical_table_identifier"] = str(logical_table_identifier)
-        return self.post("api/rest/2.0/searchdata", json=options)
+        return self.post("api/rest/2.0/searchdata", headers=options.pop("headers", None), json=options)
 
     # ==================================================================================
     # SECURITY :: https://developers.thoughtspot.com/docs/rest-apiv2-reference#_security
@@ -558,6 +736,7 @@ class RESTAPIClient(httpx.AsyncClient):
         return self.post("api/rest/2.0/security/metadata/share", headers=headers, timeout=timeout, json=options)
 
     @pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)
+    @_concurrency.mark_pool("permissions")
     def security_principal_permissions(
         self, guid: _types.ObjectIdentifier, principal_type: str, metadata_type: str, **options: Any
     ) -> Awaitable[httpx.Response]:
@@ -575,6 +754,7 @@ class RESTAPIClient(httpx.AsyncClient):
 
     @pydantic.validate_call(validate_return=True, config=validators.METHOD_CONFIG)
     @_transport.CachePolicy.mark_cacheable
+    @_concurrency.mark_pool("permissions")
     def security_metadata_permissions(
         self, guid: _types.ObjectIdentifier, permission_type: _types.ShareType = "DEFINED", **options: Any
     ) -> Awaitable[httpx.Response]:
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 from cs_tools.api.workflows import metadata, tql, tsload
 from cs_tools.api.workflows.search import search
-from cs_tools.api.workflows.utils import paginator
+from cs_tools.api.workflows.utils import collect, iter_pages, iter_records, paginator
 
 __all__ = (
-    "paginator",
+    "collect",
+    "iter_pages",
+    "iter_records",
     "metadata",
+    "paginator",
     "search",
     "tql",
     "tsload",
-)
\ No newline at end of file
+)
@@ -1,22 +1,25 @@
 from __future__ import annotations
 
-from collections.abc import Coroutine, Iterable
+from collections.abc import AsyncIterator, Coroutine, Iterable
 from typing import Any, Literal, Optional, cast
 import asyncio
+import collections
 import datetime as dt
 import itertools as it
 import json
 import logging
 import pathlib
+import time
 
 from tenacity import before_sleep_log, retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 from thoughtspot_tml.types import TMLObject
 import awesomeversion
 import httpx
 
-from cs_tools import _types, utils
+from cs_tools import _compat, _types, utils
+from cs_tools.api import _json
 from cs_tools.api.client import RESTAPIClient
-from cs_tools.api.workflows.utils import paginator
+from cs_tools.api.workflows.utils import AdaptiveBatchSize, iter_pages, paginator
 
 _LOG = logging.getLogger(__name__)
 
@@ -33,9 +36,15 @@ async def fetch_all(
     http: RESTAPIClient,
     record_size: int = 5_000,
     pattern: Optional[str] = None,
+    prefetch: int = 1,
     **search_options,
 ) -> list[_types.APIResult]:
-    """Wraps metadata/search fetching all objects of the given type and exhausts the pagination."""
+    """
+    Wraps metadata/search fetching all objects of the given type and exhausts the pagination.
+
+    Set `prefetch` to request each type's pages several at a time, when one large type would
+    otherwise be the critical path of the whole crawl.
+    """
     results: list[_types.APIResult] = []
     tasks: list[asyncio.Task] = []
 
@@ -43,7 +52,7 @@ async def fetch_all(
         for object_type in metadata_types:
             search_options["guid"] = ""
             search_options["metadata"] = [{"type": object_type, "name_pattern": pattern}]
-            coro = paginator(http.metadata_search, record_size=record_size, **search_options)
+            coro = paginator(http.metadata_search, record_size=record_size, prefetch=prefetch, **search_options)
             task = g.create_task(coro, name=object_type)
             tasks.append(task)
 
@@ -61,6 +70,63 @@ async def fetch_all(
     return results
 
 
+async def fetch_all_iter(
+    metadata_types: Iterable[_types.APIObjectType],
+    *,
+    http: RESTAPIClient,
+    record_size: int = 5_000,
+    pattern: Optional[str] = None,
+    prefetch: int = 1,
+    **search_options,
+) -> AsyncIterator[list[_types.APIResult]]:
+    """
+    Like fetch_all(), but yields each page of objects as soon as it arrives.
+
+    Every type is crawled at once, so pages arrive in no particular order. Only a page or so
+    of each type is ever held in memory, rather than every object of every type.
+    """
+    metadata_types = list(metadata_types)
+    pages: asyncio.Queue[list[_types.APIResult] | Exception | None] = asyncio.Queue(maxsize=len(metadata_types))
+
+    async def crawl(object_type: _types.APIObjectType) -> None:
+        error: Exception | None = None
+        options = {**search_options, "guid": "", "metadata": [{"type": object_type, "name_pattern": pattern}]}
+
+        try:
+            async for page in iter_pages(http.metadata_search, record_size=record_size, prefetch=prefetch, **options):
+                # BACKPRESSURE, A CRAWL WAITS WHILE THE CALLER IS BEHIND.
+                await pages.put(page)
+
+        except httpx.HTTPError as e:
+            _LOG.error(f"Could not fetch all objects for '{object_type}' object type, see logs for details..")
+            _LOG.debug(f"Full error: {e}", exc_info=True)
+
+        except Exception as e:
+            error = e
+
+        # SIGNAL THIS CRAWL IS DONE, OR HAND ITS FAILURE TO THE CALLER.
+        await pages.put(error)
+
+    crawlers = [asyncio.ensure_future(crawl(object_type)) for object_type in metadata_types]
+
+    try:
+        finished = 0
+
+        while finished < len(crawlers):
+            if (item := await pages.get()) is None:
+                finished += 1
+                continue
+
+            if isinstance(item, Exception):
+                raise item
+
+            yield item
+
+    finally:
+        for task in crawlers:
+            task.cancel()
+
+
 def _flatten_identifiers(guids: Iterable[Any]) -> list[_types.GUID]:
     """Flatten a caller's identifiers (loose single guids and/or grouped lists) into one flat list."""
     flat: list[_types.GUID] = []
@@ -106,7 +172,7 @@ async def fetch(
             # HOW WIDE OR NUMEROUS THE OBJECTS ARE.
             for batch in utils.batched(_flatten_identifiers(guids), n=_MAX_IDENTIFIERS_PER_SEARCH):
                 options = {**search_options, "metadata": [{"type": metadata_type, "identifier": _} for _ in batch]}
-                coro = http.metadata_search(guid="", record_size=record_size, **options)
+                coro = http.trusted.metadata_search(guid="", record_size=record_size, **options)
                 task = g.create_task(coro, name=f"{metadata_type} [{len(batch)} ids]")
                 tasks.append(task)
 
@@ -114,7 +180,7 @@ async def fetch(
         try:
             r = task.result()
             r.raise_for_status()
-            d = r.json()
+            d = _json.loads_as(r.content, shape=list[_types.APIResult])
 
         except httpx.ReadError as e:
             _LOG.error(f"ReadError for guid={task.get_name()}, see logs for details..")
@@ -131,6 +197,77 @@ async def fetch(
     return results
 
 
+async def fetch_iter(
+    typed_guids: dict[_types.APIObjectType, Iterable[_types.GUID]],
+    *,
+    http: RESTAPIClient,
+    record_size: int = 5_000,
+    concurrency: int = 4,
+    **search_options,
+) -> AsyncIterator[_types.APIResult]:
+    """
+    Like fetch(), but yields each object as soon as it is parsed from the response.
+
+    Use this for large responses (eg. include_details=True) so that only a handful of objects
+    are ever held in memory, rather than every page of the crawl. Up to `concurrency` requests
+    are streamed at once, so objects arrive in no particular order.
+    """
+    batches = collections.deque(
+        (metadata_type, batch)
+        for metadata_type, guids in typed_guids.items()
+        for batch in utils.batched(_flatten_identifiers(guids), n=_MAX_IDENTIFIERS_PER_SEARCH)
+    )
+    parsed: asyncio.Queue[_types.APIResult | Exception | None] = asyncio.Queue(maxsize=concurrency)
+
+    async def stream(metadata_type: _types.APIObjectType, batch: tuple[_types.GUID, ...]) -> None:
+        options = {**search_options, "metadata": [{"type": metadata_type, "identifier": _} for _ in batch]}
+
+        try:
+            async for metadata_object in http.stream_json_array(
+                http.trusted.metadata_search, guid="", record_size=record_size, **options
+            ):
+                # BACKPRESSURE, A STREAM WAITS WHILE THE CALLER IS BEHIND.
+                await parsed.put(metadata_object)
+
+        except httpx.HTTPError as e:
+            _LOG.error(
+                f"Could not fetch the object for guid={metadata_type} [{len(batch)} ids], see logs for details.."
+            )
+            _LOG.debug(f"Full error: {e}", exc_info=True)
+
+    async def worker() -> None:
+        error: Exception | None = None
+
+        try:
+            while batches:
+                await stream(*batches.popleft())
+
+        except Exception as e:
+            error = e
+
+        # SIGNAL THIS WORKER IS DONE, OR HAND ITS FAILURE TO THE CALLER.
+        await parsed.put(error)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(min(concurrency, len(batches)))]
+
+    try:
+        finished = 0
+
+        while finished < len(workers):
+            if (item := await parsed.get()) is None:
+                finished += 1
+                continue
+
+            if isinstance(item, Exception):
+                raise item
+
+            yield item
+
+    finally:
+        for task in workers:
+            task.cancel()
+
+
 async def fetch_one(
     identifier: _types.ObjectIdentifier | _types.PrincipalIdentifier | _types.OrgIdentifier,
     metadata_type: _types.APIObjectType | Literal["ORG"],
@@ -197,7 +334,7 @@ async def tag_all(guids: Iterable[_types.GUID], *, tags: Iterable[str], http: RE
     async with utils.BoundedTaskGroup(max_concurrent=CONCURRENCY_MAGIC_NUMBER) as g:
         for guid in guids:
             for tag_name in tags:
-                coro = http.tags_assign(guid=guid, tag=tag_name)
+                coro = http.trusted.tags_assign(guid=guid, tag=tag_name)
                 task = g.create_task(coro, name=f"{guid}__{tag_name}")
                 tasks.append(task)
 
@@ -217,6 +354,30 @@ async def tag_all(guids: Iterable[_types.GUID], *, tags: Iterable[str], http: RE
     # return results
 
 
+# THE NUMBER OF OBJECTS EXPORTED IN THE FIRST metadata/tml/export REQUEST, LATER BATCHES ADAPT TO THE SERVER.
+_TML_EXPORT_BATCH_SIZE = 10
+
+# THE ORDER IN WHICH TML TYPES ARE IMPORTED, SO THAT AN OBJECT'S DEPENDENCIES EXIST BEFORE IT DOES.
+_TML_IMPORT_TIERS = {
+    "connection": 0,
+    "table": 1,
+    "sql_view": 2,
+    "view": 2,
+    "worksheet": 2,
+    "model": 2,
+    "cohort": 3,
+    "answer": 4,
+    "liveboard": 5,
+}
+
+# THESE TYPES MAY REFER TO EACH OTHER BY NAME ALONE, SO WITHIN A WAVE NO ORDER CAN BE FOUND BETWEEN THEM.
+_TML_IMPORT_NAME_REFERENCING_TYPES = frozenset({"sql_view", "view", "worksheet", "model"})
+
+# A BATCH OF PERMISSIONS WHICH TAKES LONGER THAN THIS SHRINKS THE BATCHES CUT AFTER IT, SO ONE PATHOLOGICAL OBJECT
+# STALLS AS FEW NEIGHBOURS AS POSSIBLE.
+_SLOW_PERMISSIONS_BATCH_SECONDS = 60 * 5
+
+
 async def permissions(
     typed_guids: dict[_types.APIObjectType, Iterable[_types.GUID]],
     *,
@@ -226,13 +387,19 @@ async def permissions(
     **permission_options,
 ) -> list[_types.APIResult]:
     """Wraps security/metadata/fetch-permissions fetching specific objects and exhausts the pagination."""
-    FIFTEEN_MINUTES = 60 * 15
-
-    if compat_ts_version < "10.3.0":
-        CONCURRENCY_MAGIC_NUMBER = 1  # Why? Fetching permissions could potentially be very expensive for the server.
-    else:
+    if compat_ts_version >= "10.3.0":
         CONCURRENCY_MAGIC_NUMBER = 5  # Why? Fetching permissions could potentially be very expensive for the server.
 
+        return await _permissions_in_adaptive_batches(
+            typed_guids,
+            concurrency=CONCURRENCY_MAGIC_NUMBER,
+            record_size=record_size,
+            http=http,
+            **permission_options,
+        )
+
+    CONCURRENCY_MAGIC_NUMBER = 1  # Why? Fetching permissions could potentially be very expensive for the server.
+
     results: list[_types.APIResult] = []
     tasks: list[asyncio.Task] = []
 
@@ -246,32 +413,15 @@ async def permissions(
                 #
                 # ONCE 10.3.0.SW IS N-2, WE CAN SWITCH FROM typed_guids -> guids .
                 #
-                if compat_ts_version < "10.3.0":
-                    # A SINGLE OBJECT
-                    if isinstance(guid, str):
-                        permission_options["id"] = [guid]
-
-                    # AN ARRAY OF OBJECTS
-                    if isinstance(guid, list):
-                        permission_options["id"] = guid
-
-                    c = http.v1_security_metadata_permissions(
-                        guid="", api_object_type=metadata_type, **permission_options
-                    )
-                # //
-                else:
-                    permission_options["timeout"] = FIFTEEN_MINUTES
-
-                    # A SINGLE OBJECT
-                    if isinstance(guid, str):
-                        permission_options["metadata"] = [{"type": metadata_type, "identifier": guid}]
-
-                    # AN ARRAY OF OBJECTS
-                    if isinstance(guid, list):
-                        permission_options["metadata"] = [{"type": metadata_type, "identifier": _} for _ in guid]
+                # A SINGLE OBJECT
+                if isinstance(guid, str):
+                    permission_options["id"] = [guid]
 
-                    c = http.security_metadata_permissions(guid="", record_size=record_size, **permission_options)
+                # AN ARRAY OF OBJECTS
+                if isinstance(guid, list):
+                    permission_options["id"] = guid
 
+                c = http.v1_security_metadata_permissions(guid="", api_object_type=metadata_type, **permission_options)
                 t = g.create_task(c, name=guid)
                 tasks.append(t)
 
@@ -291,6 +441,133 @@ async def permissions(
     return results
 
 
+async def _permissions_in_adaptive_batches(
+    typed_guids: dict[_types.APIObjectType, Iterable[_types.GUID]],
+    *,
+    concurrency: int,
+    record_size: int,
+    http: RESTAPIClient,
+    **permission_options,
+) -> list[_types.APIResult]:
+    """
+    Fetch permissions in batches sized to the server's pace.
+
+    A batch which times out or meets a server error is bisected until the offending objects
+    are isolated, and each of those is retried alone. Any other error is logged and skipped.
+    """
+    FIFTEEN_MINUTES = 60 * 15
+
+    batch_size = AdaptiveBatchSize(initial=_MAX_IDENTIFIERS_PER_SEARCH)
+    queue = collections.deque(
+        (metadata_type, guid) for metadata_type, guids in typed_guids.items() for guid in _flatten_identifiers(guids)
+    )
+    halves: collections.deque[tuple[_types.APIObjectType, list[_types.GUID]]] = collections.deque()
+    changed = asyncio.Condition()
+    in_flight = 0
+    results: list[_types.APIResult] = []
+
+    def is_worth_splitting(e: httpx.HTTPError) -> bool:
+        if isinstance(e, httpx.TimeoutException):
+            return True
+
+        return isinstance(e, httpx.HTTPStatusError) and e.response.is_server_error
+
+    async def fetch_batch(metadata_type: _types.APIObjectType, batch: list[_types.GUID]) -> None:
+        start = time.perf_counter()
+        options = {
+            **permission_options,
+            "metadata": [{"type": metadata_type, "identifier": guid} for guid in batch],
+            "timeout": FIFTEEN_MINUTES,
+        }
+
+        request = asyncio.ensure_future(
+            http.trusted.security_metadata_permissions(guid="", record_size=record_size, **options)
+        )
+
+        try:
+            done, _ = await asyncio.wait({request}, timeout=_SLOW_PERMISSIONS_BATCH_SECONDS)
+
+            # THE SERVER IS ALREADY WORKING ON THIS BATCH, SO LET IT FINISH AND CUT THE BATCHES AFTER IT SMALLER.
+            if not done:
+                _LOG.debug(f"A batch of {len(batch)} {metadata_type} permissions is slow, shrinking the next batches")
+                batch_size.record_failure(size=len(batch))
+
+            r = await request
+            r.raise_for_status()
+            d = r.json()
+
+        except httpx.HTTPError as e:
+            if not is_worth_splitting(e):
+                _LOG.error(
+                    f"Could not fetch the permissions for {len(batch)} {metadata_type} objects, see logs for details.."
+                )
+                _LOG.debug(f"Full error: {e!r}", exc_info=True)
+                return
+
+            if len(batch) == 1:
+                _LOG.error(f"Could not fetch the permissions for guid={batch[0]}, see logs for details..")
+                _LOG.debug(f"Full error: {e!r}", exc_info=True)
+                return
+
+            _LOG.debug(f"Splitting a batch of {len(batch)} {metadata_type} permissions after {e!r}")
+            batch_size.record_failure(size=len(batch))
+
+            # THE HALVES WAIT THEIR TURN FOR A WORKER, RATHER THAN DOUBLING THE LOAD ON A STRUGGLING SERVER.
+            middle = len(batch) // 2
+            halves.extend([(metadata_type, batch[:middle]), (metadata_type, batch[middle:])])
+            return
+
+        finally:
+            request.cancel()
+
+        batch_size.record(size=len(batch), seconds=time.perf_counter() - start, nbytes=len(r.content))
+        results.append(d)
+
+    def next_batch() -> tuple[_types.APIObjectType, list[_types.GUID]]:
+        if halves:
+            return halves.popleft()
+
+        metadata_type, guid = queue.popleft()
+        batch = [guid]
+
+        # A BATCH HOLDS A SINGLE TYPE, AND IS CUT AT WHATEVER SIZE THE SERVER IS CURRENTLY COPING WITH.
+        while queue and len(batch) < batch_size.size and queue[0][0] == metadata_type:
+            batch.append(queue.popleft()[1])
+
+        return metadata_type, batch
+
+    def has_work_or_is_drained() -> bool:
+        return bool(halves or queue) or not in_flight
+
+    async def worker() -> None:
+        nonlocal in_flight
+
+        while True:
+            # AN IDLE WORKER WAITS ON THE OTHERS, SINCE THE BATCH THEY ARE FETCHING MAY STILL BE SPLIT.
+            async with changed:
+                await changed.wait_for(has_work_or_is_drained)
+
+                if not (halves or queue):
+                    return
+
+                metadata_type, batch = next_batch()
+                in_flight += 1
+
+            try:
+                await fetch_batch(metadata_type, batch)
+
+            finally:
+                async with changed:
+                    in_flight -= 1
+                    changed.notify_all()
+
+    async with _compat.TaskGroup() as g:
+        for _ in range(concurrency):
+            g.create_task(worker())
+
+    return results
+
+
 async def dependents(guid: _types.GUID, *, http: RESTAPIClient) -> list[_types.APIResult]:
     """Fetch all dependents of a given object, regardless of its type."""
     r = await http.metadata_search(
@@ -308,7 +585,9 @@ async def dependents(guid: _types.GUID, *, http: RESTAPIClient) -> list[_types.A
 
         for logical_table in _["metadata_detail"]["logicalTableList"]:
             guid = logical_table["header"]["id"]
-            c = http.metadata_search(guid=guid, include_dependent_objects=True, dependent_objects_record_size=-1)
+            c = http.trusted.metadata_search(
+                guid=guid, include_dependent_objects=True, dependent_objects_record_size=-1
+            )
             coros.append(c)
 
         _ = await asyncio.gather(*coros)  # type: ignore[assignment]
@@ -391,13 +670,111 @@ async def tml_export(
         return {"edoc": None, "info": {"id": guid, **e.args[0]}}
 
     if directory is not None:
-        i = d["info"]
-        directory.joinpath(i["type"]).mkdir(parents=True, exist_ok=True)
-        directory.joinpath(f"{i['type']}/{i['id']}.{i['type']}.tml").write_text(d["edoc"], encoding="utf-8")
+        await asyncio.to_thread(_write_tml, d, directory=directory)
 
     return d
 
 
+def _write_tml(exported: _types.APIResult, *, directory: pathlib.Path) -> None:
+    i = exported["info"]
+    directory.joinpath(i["type"]).mkdir(parents=True, exist_ok=True)
+    directory.joinpath(f"{i['type']}/{i['id']}.{i['type']}.tml").write_text(exported["edoc"], encoding="utf-8")
+
+
+async def tml_export_batched(
+    guids: Iterable[_types.GUID],
+    *,
+    directory: pathlib.Path | None = None,
+    concurrency: int = 4,
+    http: RESTAPIClient,
+    **tml_export_options,
+) -> AsyncIterator[_types.APIResult]:
+    """
+    Export many metadata objects, several to a request, optionally to a directory.
+
+    Each object's result (the same as tml_export's) is yielded as soon as its batch completes.
+    A batch which fails is split in half, and an object which fails within a batch is retried
+    on its own.
+    """
+    batch_size = AdaptiveBatchSize(initial=_TML_EXPORT_BATCH_SIZE, maximum=100, target_bytes=8 * 1024 * 1024)
+    queue = collections.deque(guids)
+    # ROOM FOR A FULL BATCH FROM EVERY WORKER, SO A SLOW CONSUMER HOLDS THE WORKERS BACK RATHER THAN FILLING MEMORY.
+    exported: asyncio.Queue[_types.APIResult | Exception | None] = asyncio.Queue(
+        maxsize=concurrency * batch_size.maximum
+    )
+
+    async def export(batch: list[_types.GUID]) -> None:
+        if len(batch) == 1:
+            await exported.put(await tml_export(batch[0], directory=directory, http=http, **tml_export_options))
+            return
+
+        start = time.perf_counter()
+
+        try:
+            r = await http.metadata_tml_export(
+                guid=batch[0], metadata=[{"identifier": guid} for guid in batch], **tml_export_options
+            )
+            r.raise_for_status()
+            d = r.json()
+
+            # EACH DOCUMENT MUST BE MATCHED BACK TO THE OBJECT IT WAS EXPORTED FOR.
+            if len(d) != len(batch) or any(doc["info"].get("id", guid) != guid for guid, doc in zip(batch, d)):
+                raise ValueError(f"expected {len(batch)} documents in request order, got {len(d)}")
+
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            _LOG.debug(f"Splitting a batch of {len(batch)} TML exports after {e!r}")
+            batch_size.record_failure(size=len(batch))
+
+            middle = len(batch) // 2
+            await export(batch[:middle])
+            await export(batch[middle:])
+            return
+
+        batch_size.record(size=len(batch), seconds=time.perf_counter() - start, nbytes=len(r.content))
+
+        for guid, doc in zip(batch, d):
+            if doc["info"]["status"]["status_code"] == "ERROR":
+                await export([guid])
+                continue
+
+            if directory is not None:
+                await asyncio.to_thread(_write_tml, doc, directory=directory)
+
+            await exported.put(doc)
+
+    async def worker() -> None:
+        error: Exception | None = None
+
+        try:
+            while queue:
+                await export([queue.popleft() for _ in range(min(batch_size.size, len(queue)))])
+
+        except Exception as e:
+            error = e
+
+        # SIGNAL THIS WORKER IS DONE, OR HAND ITS FAILURE TO THE CALLER.
+        await exported.put(error)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+
+    try:
+        finished = 0
+
+        while finished < len(workers):
+            if (result := await exported.get()) is None:
+                finished += 1
+                continue
+
+            if isinstance(result, Exception):
+                raise result
+
+            yield result
+
+    finally:
+        for task in workers:
+            task.cancel()
+
+
 async def tml_import(
     tmls: list[TMLObject],
     *,
@@ -467,3 +844,104 @@ async def tml_import(
                 _LOG.debug(f"{tml_type} '{tml.name}' successfully imported")
 
     return d
+
+
+def _referenced_fqns(node: Any) -> set[_types.GUID]:
+    """Find every object a TML document refers to by FQN."""
+    found: set[_types.GUID] = set()
+
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "fqn" and isinstance(value, str):
+                found.add(value)
+            else:
+                found |= _referenced_fqns(value)
+
+    if isinstance(node, list):
+        for value in node:
+            found |= _referenced_fqns(value)
+
+    return found
+
+
+def tml_import_waves(tmls: Iterable[TMLObject]) -> list[list[TMLObject]]:
+    """
+    Plan the order of a TML import, as waves of objects which only depend on earlier waves.
+
+    Dependencies are found from each object's FQN references, and by type (tables before
+    worksheets and models, before answers and liveboards) for objects referenced only by name.
+    """
+    tmls = list(tmls)
+    by_guid = {tml.guid: tml for tml in tmls if tml.guid is not None}
+    depends_on = {id(tml): [by_guid[fqn] for fqn in _referenced_fqns(tml.to_dict()) if fqn in by_guid] for tml in tmls}
+    levels: dict[int, int] = {}
+
+    def level(tml: TMLObject, *, visiting: frozenset[int] = frozenset()) -> int:
+        if id(tml) in levels:
+            return levels[id(tml)]
+
+        # A CYCLE CAN'T BE ORDERED, SO ITS BACK-REFERENCE IS IGNORED AND THE SERVER RESOLVES IT.
+        after = [level(d, visiting=visiting | {id(tml)}) + 1 for d in depends_on[id(tml)] if id(d) not in visiting]
+        levels[id(tml)] = max([_TML_IMPORT_TIERS.get(tml.tml_type_name, 0), *after])
+        return levels[id(tml)]
+
+    waves: dict[int, list[TMLObject]] = collections.defaultdict(list)
+
+    for tml in tmls:
+        waves[level(tml)].append(tml)
+
+    return [waves[n] for n in sorted(waves)]
+
+
+def tml_import_wave_is_independent(wave: Iterable[TMLObject]) -> bool:
+    """
+    Determine if a wave's objects cannot refer to each other, so its chunks may be imported at once.
+
+    Otherwise the wave must be imported as one, as an object may name another which only a
+    later chunk would create.
+    """
+    return not any(tml.tml_type_name in _TML_IMPORT_NAME_REFERENCING_TYPES for tml in wave)
+
+
+async def tml_import_chunked(
+    tmls: list[TMLObject],
+    *,
+    chunk_size: int = 50,
+    concurrency: int = 2,
+    http: RESTAPIClient,
+    **tml_import_options,
+) -> AsyncIterator[tuple[list[TMLObject], list[_types.APIResult]]]:
+    """
+    Import objects in chunks, several at once, yielding each chunk with its results.
+
+    Each chunk is a separate import, so the policy (eg. ALL_OR_NONE) applies per chunk. Use
+    tml_import_waves to keep objects in separate chunks from depending on each other, and
+    tml_import_wave_is_independent to decide if a wave's chunks may be imported at once.
+
+    A chunk is only sent once an earlier one has been consumed, so a caller which stops early
+    (at concurrency=1, nothing else is in flight) leaves the remaining chunks unsent.
+    """
+    if tml_import_options.get("use_async_endpoint") and not tml_import_options.get("wait_for_completion"):
+        raise ValueError("a chunked import must wait for completion, to report each chunk's results")
+
+    pending = collections.deque(tmls[offset : offset + chunk_size] for offset in range(0, len(tmls), chunk_size))
+    running: set[asyncio.Future] = set()
+
+    async def import_chunk(chunk: list[TMLObject]) -> tuple[list[TMLObject], list[_types.APIResult]]:
+        _LOG.debug(f"Importing a chunk of {len(chunk):,} TML objects")
+        # A CHUNK WHICH WAITS FOR COMPLETION GETS ONE RESULT PER OBJECT.
+        return chunk, cast("list[_types.APIResult]", await tml_import(chunk, http=http, **tml_import_options))
+
+    try:
+        while pending or running:
+            while pending and len(running) < concurrency:
+                running.add(asyncio.ensure_future(import_chunk(pending.popleft())))
+
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                yield task.result()
+
+    finally:
+        for task in running:
+            task.cancel()
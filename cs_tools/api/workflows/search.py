@@ -6,7 +6,8 @@ import functools as ft
 import logging
 import zoneinfo
 
-from cs_tools import _types
+from cs_tools import _compat, _types
+from cs_tools.api import _json
 from cs_tools.api.client import RESTAPIClient
 from cs_tools.api.workflows import metadata
 
@@ -15,6 +16,17 @@ __all__ = ("search",)
 log = logging.getLogger(__name__)
 
 
+class _SearchDataContents(_compat.TypedDict):
+    column_names: list[str]
+    data_rows: list[list[Any]]
+
+
+class _SearchDataPage(_compat.TypedDict):
+    """The only parts of a searchdata (COMPACT) response we read, the rest is skipped while decoding."""
+
+    contents: list[_SearchDataContents]
+
+
 def _convert_compact_to_full(compact: list[Any], *, column_names: list[str]) -> _types.APIResult:
     """Pair up column values to their names, and clean up the TIMESTAMP representation."""
     full: _types.APIResult = {}
@@ -119,7 +131,7 @@ async def search(
 
         r.raise_for_status()
 
-        d = r.json()
+        d = _json.loads_as(r.content, shape=_SearchDataPage)
 
         for data_row in d["contents"][0]["data_rows"]:
             data.append(_convert_compact_to_full(data_row, column_names=d["contents"][0]["column_names"]))
@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from typing import Any
 import datetime as dt
-import json
 import logging
 
 from cs_tools import _types
+from cs_tools.api import _json
 from cs_tools.api.client import RESTAPIClient
 
 log = logging.getLogger(__name__)
@@ -110,9 +110,9 @@ async def query(
     }
 
     # DEV NOTE: @boonhapus, 2024/12/15
-    # WE USE json.loads(r.iterlines()) INSTEAD OF r.json() BECAUSE THE API RETURNS JSON-LINES.
+    # WE USE _json.loads(r.iterlines()) INSTEAD OF r.json() BECAUSE THE API RETURNS JSON-LINES.
     for result in r.iter_lines():
-        _ = json.loads(result)
+        _ = _json.loads(result)
 
         d["original"].append(_)
 
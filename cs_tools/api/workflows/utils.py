@@ -1,34 +1,197 @@
 from __future__ import annotations
 
-from typing import Any
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any, Optional, TypeVar
+import asyncio
 import logging
 
 import httpx
 
+from cs_tools import utils
+from cs_tools.api import _concurrency
+
 log = logging.getLogger(__name__)
+_T = TypeVar("_T")
 
 
-async def paginator(endpoint_method, *, record_size: int = 5_000, **api_options) -> list[Any]:
-    """Exhaust a paginated endpoint."""
-    data: list[Any] = []
+async def iter_pages(
+    endpoint_method, *, record_size: int = 5_000, read_ahead: int = 1, prefetch: int = 1, **api_options
+) -> AsyncIterator[list[Any]]:
+    """
+    Exhaust a paginated endpoint, yielding each page as soon as it arrives.
+
+    Up to `read_ahead` pages are fetched while the caller is still working on the last one,
+    and no more, so a slow consumer holds back the crawl instead of buffering all of it.
+
+    With `prefetch` above 1, up to that many offsets are requested at once rather than one
+    after another, widening only as full pages come back. Pages are still yielded in order,
+    and records are de-duplicated on their id in case the listing shifts while it is being
+    crawled.
+    """
+    if prefetch > 1 and record_size > 0:
+        pages = _iter_pages_speculatively(endpoint_method, record_size=record_size, prefetch=prefetch, **api_options)
+    else:
+        pages = _iter_pages(endpoint_method, record_size=record_size, **api_options)
+
+    if read_ahead < 1:
+        async for page in pages:
+            yield page
+        return
+
+    async for page in utils.read_ahead(pages, n=read_ahead):
+        yield page
+
+
+def _background_headers(api_options: dict[str, Any]) -> dict[str, str]:
+    headers = dict(api_options.pop("headers", None) or {})
+
+    # A CRAWL MAY BE THOUSANDS OF PAGES, WHICH SHOULD NOT HOLD UP INTERACTIVE OR CONTROL-PLANE CALLS.
+    headers.setdefault(_concurrency.PRIORITY_HEADER, "background")
+    return headers
+
+
+async def _fetch_page(endpoint_method, *, headers: dict[str, str], offset: int, record_size: int, **api_options):
+    """Fetch a single page, or None if the server refused it."""
+    r = await endpoint_method(**api_options, headers=dict(headers), record_offset=offset, record_size=record_size)
+
+    try:
+        r.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        page = (offset // record_size) + 1 if record_size > 0 else 1
+        log.error(f"Could not fetch '{endpoint_method.__name__}' on page #{page} -> {e}, see logs for details..")
+        log.debug(f"Method options: {dict(**api_options, record_offset=offset, record_size=record_size)}")
+        log.debug(f"Error details: {r.text}", exc_info=True)
+        return None
+
+    d = r.json()
+    return d if isinstance(d, list) else [d] if d else []
+
+
+async def _iter_pages(endpoint_method, *, record_size: int, **api_options) -> AsyncIterator[list[Any]]:
+    headers = _background_headers(api_options)
+    offset = 0
+
+    while page := await _fetch_page(
+        endpoint_method, headers=headers, offset=offset, record_size=record_size, **api_options
+    ):
+        offset += len(page)
+        yield page
+
+
+def _record_id(record: Any) -> Optional[str]:
+    if not isinstance(record, dict):
+        return None
+
+    return record.get("metadata_id", record.get("id", None))
+
+
+async def _iter_pages_speculatively(
+    endpoint_method, *, record_size: int, prefetch: int, **api_options
+) -> AsyncIterator[list[Any]]:
+    headers = _background_headers(api_options)
+    seen: set[str] = set()
+    offset = 0
+
+    # THE WINDOW ONLY WIDENS WHILE FULL PAGES COME BACK, SO A SHORT LISTING COSTS NO EXTRA REQUESTS.
+    width = 1
 
     while True:
-        r = await endpoint_method(**api_options, record_offset=len(data), record_size=record_size)
+        is_full = True
+        window = [
+            asyncio.ensure_future(
+                _fetch_page(endpoint_method, headers=headers, offset=o, record_size=record_size, **api_options)
+            )
+            for o in range(offset, offset + (width * record_size), record_size)
+        ]
 
         try:
-            r.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            page = (len(data) // record_size) + 1
-            log.error(f"Could not fetch '{endpoint_method.__name__}' on page #{page} -> {e}, see logs for details..")
-            log.debug(f"Method options: {dict(**api_options, record_offset=len(data), record_size=record_size)}")
-            log.debug(f"Error details: {r.text}", exc_info=True)
-            break
+            for task in window:
+                # LIKE _iter_pages, ONLY AN EMPTY PAGE ENDS THE LISTING, SINCE THE SERVER MAY FILTER A PAGE SHORT.
+                if not (page := await task):
+                    return
+
+                is_full = is_full and len(page) >= record_size
+
+                # THE LISTING MAY SHIFT BETWEEN REQUESTS, SO THE SAME OBJECT CAN APPEAR ON TWO PAGES.
+                fresh = [r for r in page if (id_ := _record_id(r)) is None or id_ not in seen]
+                seen.update(id_ for r in fresh if (id_ := _record_id(r)) is not None)
+
+                if fresh:
+                    yield fresh
+
+        # ANY OFFSETS BEYOND THE END OF THE LISTING ARE ABANDONED.
+        finally:
+            for task in window:
+                task.cancel()
+
+            await asyncio.gather(*window, return_exceptions=True)
+
+        offset += width * record_size
+        width = min(prefetch, width * 2) if is_full else 1
+
+
+async def iter_records(
+    endpoint_method, *, record_size: int = 5_000, read_ahead: int = 1, prefetch: int = 1, **api_options
+) -> AsyncIterator[Any]:
+    """Exhaust a paginated endpoint, yielding each record as soon as its page arrives."""
+    pages = iter_pages(
+        endpoint_method, record_size=record_size, read_ahead=read_ahead, prefetch=prefetch, **api_options
+    )
+
+    async for page in pages:
+        for record in page:
+            yield record
 
-        d = r.json()
 
-        if not d:
-            break
+class AdaptiveBatchSize:
+    """
+    Size batches to the server's pace.
 
-        data.extend(d) if isinstance(d, list) else data.append(d)
+    Batches grow while they come back quickly and small, and shrink when they are slow or
+    large, by at most half or double at a time. A failed batch halves the size outright.
+    """
 
-    return data
+    def __init__(
+        self,
+        *,
+        initial: int = 25,
+        minimum: int = 1,
+        maximum: int = 500,
+        target_seconds: float = 30.0,
+        target_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_seconds = target_seconds
+        self.target_bytes = target_bytes
+        self._size = float(min(max(initial, self.minimum), self.maximum))
+
+    @property
+    def size(self) -> int:
+        """The number of items to place in the next batch."""
+        return int(self._size)
+
+    def _clamp(self, size: float) -> None:
+        self._size = min(max(size, self.minimum), self.maximum)
+
+    def record(self, *, size: int, seconds: float, nbytes: int) -> None:
+        """Feed back how long a batch of `size` items took, and how large its response was."""
+        headroom = min(self.target_seconds / max(seconds, 1e-3), self.target_bytes / max(nbytes, 1))
+
+        # CONCURRENT BATCHES MAY HAVE BEEN CUT AT DIFFERENT SIZES, SO ADAPT FROM THE ONE WHICH WAS MEASURED.
+        self._clamp(size * min(2.0, max(0.5, headroom)))
+
+    def record_failure(self, *, size: int) -> None:
+        """A batch of `size` items failed or ran too long."""
+        self._clamp(min(self._size, size / 2))
+
+
+async def collect(aiterable: AsyncIterable[_T]) -> list[_T]:
+    """Gather every item of an async iterable into a list, for callers which need all of them at once."""
+    return [item async for item in aiterable]
+
+
+async def paginator(endpoint_method, *, record_size: int = 5_000, prefetch: int = 1, **api_options) -> list[Any]:
+    """Exhaust a paginated endpoint."""
+    records = iter_records(endpoint_method, record_size=record_size, read_ahead=0, prefetch=prefetch, **api_options)
+    return await collect(records)
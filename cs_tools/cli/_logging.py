@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import atexit
 import datetime as dt
 import logging
 import logging.config
 import logging.handlers
 import pathlib
+import queue
 import re
 
 from cs_tools.cli.ux import RICH_CONSOLE
@@ -69,6 +71,10 @@ class SecretsFilter(logging.Filter):
         if record.args:
             args = []
             for arg in record.args:
+                # LAZILY FORMATTED ARGS (eg. HTTP REQUEST DETAILS) ARE ONLY RENDERED ONCE WE KNOW THEY'LL BE WRITTEN.
+                if not isinstance(arg, (str, int, float)):
+                    arg = str(arg)
+
                 if isinstance(arg, str):
                     masked_arg = arg
                     for pattern, replacement in self.patterns.values():
@@ -81,6 +87,32 @@ class SecretsFilter(logging.Filter):
         return True
 
 
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Hand records to a background thread, which formats and writes them off of the event loop."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # THE QUEUE NEVER LEAVES THIS PROCESS, SO THERE'S NO NEED TO FORMAT (OR PICKLE) THE RECORD HERE.
+        return record
+
+
+def _write_file_logs_in_background(root: logging.Logger) -> None:
+    """Move the file handler behind a queue, so writing DEBUG logs doesn't block the event loop."""
+    file_handlers = [handler for handler in root.handlers if isinstance(handler, LimitedFileHistoryHandler)]
+
+    if not file_handlers:
+        return
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *file_handlers, respect_handler_level=True)
+
+    for handler in file_handlers:
+        root.removeHandler(handler)
+
+    root.addHandler(DeferredQueueHandler(records))
+    listener.start()
+    atexit.register(listener.stop)
+
+
 def _setup_logging() -> None:
     """Setup CLI / application logging."""
     now = dt.datetime.now(tz=dt.timezone.utc).strftime("%Y-%m-%dT%H_%M_%S")
@@ -137,6 +169,7 @@ def _setup_logging() -> None:
     }
 
     logging.config.dictConfig(config)
+    _write_file_logs_in_background(logging.getLogger())
 
     # HTTPX has gotten quite noisy since
     logging.getLogger("httpcore").setLevel("WARNING")
@@ -4,6 +4,7 @@ import json
 import logging
 
 from cs_tools import __version__, errors, utils
+from cs_tools.api._transport import CachePolicy
 from cs_tools.cli import custom_types
 from cs_tools.cli.ux import RICH_CONSOLE, AsyncTyper
 from cs_tools.settings import (
@@ -51,6 +52,14 @@ def create(
     disable_ssl: bool = typer.Option(
         False, "--disable-ssl", help="whether or not to turn off checking the SSL certificate"
     ),
+    disable_cache: bool = typer.Option(
+        False, "--disable-cache", help="whether or not to turn off caching API responses between runs"
+    ),
+    http2: bool = typer.Option(
+        False,
+        "--http2",
+        help="whether or not to try multiplexing requests over HTTP/2 (install cs_tools\\[http2])",
+    ),
     proxy: str = typer.Option(None, help="proxy server to use to connect to ThoughtSpot"),
     default: bool = typer.Option(False, "--default", help="whether or not to make this the default configuration"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="enable verbose logging"),
@@ -80,6 +89,8 @@ def create(
             "bearer_token": token,
             "default_org": default_org,
             "disable_ssl": disable_ssl,
+            "disable_cache": disable_cache,
+            "http2": http2,
             "proxy": proxy,
             "concurrency": concurrency,
         },
@@ -124,6 +135,14 @@ def modify(
     disable_ssl: bool = typer.Option(
         None, "--disable-ssl", help="whether or not to turn off checking the SSL certificate"
     ),
+    disable_cache: bool = typer.Option(
+        None, "--disable-cache / --enable-cache", help="whether or not to turn off caching API responses between runs"
+    ),
+    http2: bool = typer.Option(
+        None,
+        "--http2 / --http1",
+        help="whether or not to try multiplexing requests over HTTP/2 (install cs_tools\\[http2])",
+    ),
     default_org: int = typer.Option(None, help="org ID to sign into by default"),
     proxy: str = typer.Option(None, help="proxy server to use to connect to ThoughtSpot"),
     default: bool = typer.Option(
@@ -162,6 +181,12 @@ def modify(
     if disable_ssl is not None:
         data["thoughtspot"]["disable_ssl"] = disable_ssl
 
+    if disable_cache is not None:
+        data["thoughtspot"]["disable_cache"] = disable_cache
+
+    if http2 is not None:
+        data["thoughtspot"]["http2"] = http2
+
     if proxy is not None:
         data["thoughtspot"]["proxy"] = proxy
 
@@ -273,6 +298,31 @@ def check(
     return 0
 
 
+@app.command(name="prune-cache")
+async def prune_cache(
+    config: str = typer.Option(..., help="config file identifier", show_default=False, metavar="NAME"),
+    max_size: int = typer.Option(
+        CachePolicy.DEFAULT_MAX_BYTES // 1024**2, help="the most disk space the HTTP cache may use, in megabytes"
+    ),
+):
+    """Remove expired and least recently used responses from the HTTP cache."""
+    conf = CSToolsConfig.from_name(name=config)
+
+    if not conf.temp_dir.joinpath(CachePolicy.CACHE_FILENAME).exists():
+        log.info(f"No HTTP cache found for {conf.name}, nothing to prune.")
+        return 0
+
+    cache = CachePolicy(directory=conf.temp_dir)
+
+    try:
+        evicted = await cache.prune(max_bytes=max_size * 1024**2)
+    finally:
+        await cache.aclose()
+
+    log.info(f"Removed {evicted:,} responses from the HTTP cache for {conf.name}")
+    return 0
+
+
 @app.command(no_args_is_help=False)
 def show(
     config: str = typer.Option(None, help="display a particular config", show_default=False, metavar="NAME"),
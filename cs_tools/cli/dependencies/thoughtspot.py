@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Optional
 import logging
+import pathlib
 import shutil
 
 import typer
 
+from cs_tools import utils
+from cs_tools.api import _cassette, _hedging
+from cs_tools.api._transport import CachePolicy
 from cs_tools.cli import custom_types
 from cs_tools.settings import (
     CSToolsConfig as _CSToolsConfig,
@@ -44,16 +48,80 @@ _OPT_VERBOSE: bool = typer.Option(
 )
 
 
+_OPT_TELEMETRY: pathlib.Path = typer.Option(
+    None,
+    "--telemetry",
+    help="Path to write per-endpoint HTTP request telemetry (JSON) to.",
+    metavar="FILE.json",
+    dir_okay=False,
+    show_default=False,
+    rich_help_panel=_HELP_PANEL_GROUP,
+)
+
+_OPT_RECORD_HTTP: pathlib.Path = typer.Option(
+    None,
+    "--record-http",
+    help="Path to record every HTTP exchange to, for replaying later without a cluster.",
+    metavar="FILE.cassette",
+    dir_okay=False,
+    hidden=True,
+    rich_help_panel=_HELP_PANEL_GROUP,
+)
+
+_OPT_REPLAY_HTTP: pathlib.Path = typer.Option(
+    None,
+    "--replay-http",
+    help="Path to a recording to answer HTTP requests from, instead of ThoughtSpot.",
+    metavar="FILE.cassette",
+    exists=True,
+    dir_okay=False,
+    hidden=True,
+    rich_help_panel=_HELP_PANEL_GROUP,
+)
+
+_OPT_REPLAY_LATENCY: float = typer.Option(
+    0.0,
+    "--replay-latency",
+    help="Multiple of the recorded latency to wait before each replayed response.",
+    hidden=True,
+    rich_help_panel=_HELP_PANEL_GROUP,
+)
+
+_OPT_REPLAY_FAULTS: str = typer.Option(
+    None,
+    "--replay-faults",
+    help="Failures to inject into the replay, eg. '429=0.05,timeout=0.01'.",
+    hidden=True,
+    rich_help_panel=_HELP_PANEL_GROUP,
+)
+
+_OPT_HEDGE_READS: bool = typer.Option(
+    False,
+    "--hedge-reads",
+    help="Re-send slow, read-only requests and use whichever answer arrives first.",
+    show_default=False,
+    hidden=True,
+    rich_help_panel=_HELP_PANEL_GROUP,
+)
+
+
 class ThoughtSpot:
     """Injects the cs_tools.thoughtspot.ThoughtSpot object into the CLI context."""
 
     config: str = _OPT_CONFIG
     temp_dir: custom_types.Directory = _OPT_TEMP_DIR
     verbose: bool = _OPT_VERBOSE
+    telemetry: pathlib.Path = _OPT_TELEMETRY
+    record_http: pathlib.Path = _OPT_RECORD_HTTP
+    replay_http: pathlib.Path = _OPT_REPLAY_HTTP
+    replay_latency: float = _OPT_REPLAY_LATENCY
+    replay_faults: str = _OPT_REPLAY_FAULTS
+    hedge_reads: bool = _OPT_HEDGE_READS
 
     def __init__(self, auto_login=True):
         self.ts_config: Optional[_CSToolsConfig] = None
         self.ts: Optional[_ThoughtSpot] = None
+        self.telemetry_file: Optional[pathlib.Path] = None
         self.auto_login = auto_login
 
     def __with_user_ctx__(self, ctx: typer.Context, *a, name: str, **kw) -> None:
@@ -65,8 +133,26 @@ class ThoughtSpot:
         if ctx.params["verbose"] is not None:
             config_overides["verbose"] = ctx.params["verbose"]
 
+        self.telemetry_file = ctx.params.get("telemetry", None)
+
+        api_options: dict[str, Any] = {}
+
+        if ctx.params.get("record_http", None) is not None:
+            api_options["recorder"] = _cassette.CassetteRecorder(path=ctx.params["record_http"])
+
+        if ctx.params.get("replay_http", None) is not None:
+            faults = ctx.params.get("replay_faults", None)
+            api_options["wrapped_transport"] = _cassette.ReplayTransport(
+                path=ctx.params["replay_http"],
+                latency_scale=ctx.params.get("replay_latency", 0.0),
+                faults=_cassette.FaultProfile.from_string(faults) if faults else None,
+            )
+
+        if ctx.params.get("hedge_reads", False):
+            api_options["hedge_policy"] = _hedging.HedgePolicy()
+
         self.ts_config = _CSToolsConfig.from_name(ctx.params["config"], automigrate=True, **config_overides)
-        self.ts = _ThoughtSpot(self.ts_config, auto_login=self.auto_login)
+        self.ts = _ThoughtSpot(self.ts_config, auto_login=self.auto_login, **api_options)
 
         # Make `ThoughtSpot` available as on the ctx.obj namespace.
         setattr(ctx.obj, name, self.ts)
@@ -82,6 +168,10 @@ class ThoughtSpot:
 
         # CLEAN UP THE TEMPORARY DIRECTORY.
         for path in self.ts_config.temp_dir.iterdir():
+            # THE HTTP CACHE (AND ITS WAL FILES) ARE MEANT TO OUTLIVE A SINGLE RUN.
+            if path.name.startswith(CachePolicy.CACHE_FILENAME):
+                continue
+
             try:
                 path.unlink(missing_ok=True) if path.is_file() else shutil.rmtree(path, ignore_errors=True)
             except PermissionError:
@@ -90,4 +180,16 @@ class ThoughtSpot:
         return self
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        pass
+        if self.ts is None:
+            return
+
+        # SUMMARIZE WHERE THE COMMAND SPENT ITS TIME ON THE NETWORK, ON SCREEN IF --telemetry WAS ASKED FOR.
+        if self.ts.api.telemetry.endpoints:
+            level = logging.INFO if self.telemetry_file is not None else logging.DEBUG
+            _LOG.log(level, self.ts.api.telemetry.format_summary())
+
+        if self.telemetry_file is not None:
+            self.ts.api.telemetry.export(self.telemetry_file)
+
+        # FLUSH ANY QUEUED CACHE WRITES AND RELEASE OPEN CONNECTIONS.
+        utils.run_sync(self.ts.api.aclose())
@@ -136,6 +136,10 @@ def identify(
         return 1
 
     ts = ctx.obj.thoughtspot
+
+    # OBJECTS ARE TAGGED FOR REMOVAL BASED ON THIS SEARCH, SO IT MUST SEE THE CLUSTER AS IT IS NOW.
+    ts.api.headers["cache-control"] = "no-cache"
+
     # DEV NOTE: @boonhapus, 2025/02/18
     #   BI Server on SaaS is held in ThoughtSpot's multi-tenant Snowflake database,
     #   which is set to UTC, whereas BI Server on Software is held in Falcon and set to
@@ -428,7 +432,7 @@ def identify(
             coros = []
 
             for metadata_object in filtered:
-                c = ts.api.tags_assign(guid=metadata_object["guid"], tag=tag_name)
+                c = ts.api.trusted.tags_assign(guid=metadata_object["guid"], tag=tag_name)
                 coros.append(c)
 
             c = utils.bounded_gather(*coros, max_concurrent=15)
@@ -446,6 +450,10 @@ def untag(
 ) -> _types.ExitCode:
     """Remove content with the identified --tag."""
     ts = ctx.obj.thoughtspot
+
+    # THE TAG MAY HAVE BEEN CHANGED IN THE UI SINCE IT WAS LAST CACHED.
+    ts.api.headers["cache-control"] = "no-cache"
+
     # Switch the org
     if ts.session_context.thoughtspot.is_orgs_enabled and org_override is not None:
         ts.switch_org(org_id=org_override)
@@ -507,6 +515,9 @@ def remove(
     """
     ts = ctx.obj.thoughtspot
 
+    # DELETE TARGETS ARE PICKED BY THEIR TAG, WHICH MAY HAVE BEEN REMOVED IN THE UI SINCE IT WAS CACHED.
+    ts.api.headers["cache-control"] = "no-cache"
+
     # Switch the org
     if ts.session_context.thoughtspot.is_orgs_enabled and org_override is not None:
         ts.switch_org(org_id=org_override)
@@ -640,16 +651,14 @@ def remove(
                 this_task.skip()
 
             else:
-                coros: list[Coroutine] = []
-
-                for metadata_object in filtered:
-                    c = workflows.metadata.tml_export(
-                        guid=metadata_object["guid"], edoc_format="YAML", directory=directory, http=ts.api
-                    )
-                    coros.append(c)
+                exports = workflows.metadata.tml_export_batched(
+                    (metadata_object["guid"] for metadata_object in filtered),
+                    edoc_format="YAML",
+                    directory=directory,
+                    http=ts.api,
+                )
 
-                c = utils.bounded_gather(*coros, max_concurrent=4)
-                d = utils.run_sync(c)
+                d = utils.run_sync(workflows.collect(exports))
 
         if export_only:
             return 0
@@ -662,7 +671,7 @@ def remove(
             coros.append(c)
 
             for metadata_object in filtered:
-                c = ts.api.metadata_delete(guid=metadata_object["guid"])
+                c = ts.api.trusted.metadata_delete(guid=metadata_object["guid"])
                 coros.append(c)
 
             c = utils.bounded_gather(*reversed(coros), max_concurrent=15)
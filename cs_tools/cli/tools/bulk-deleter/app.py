@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 import collections
 import datetime as dt
 import logging
@@ -71,6 +72,9 @@ def downstream(
     """
     ts = ctx.obj.thoughtspot
 
+    # DEPENDENTS ARE DELETED, SO THEY ARE LOOKED UP LIVE RATHER THAN FROM THE HTTP CACHE.
+    ts.api.headers["cache-control"] = "no-cache"
+
     if ts.session_context.thoughtspot.is_orgs_enabled and org_override is not None:
         ts.switch_org(org_id=org_override)
 
@@ -146,13 +150,15 @@ def downstream(
             else:
                 this_task.total = len(all_metadata)
 
-                async def _download_and_advance(guid: _types.GUID) -> None:
-                    await workflows.metadata.tml_export(guid=guid, edoc_format="YAML", directory=directory, http=ts.api)
-                    this_task.advance(step=1)
+                async def _download_and_advance(guids: Iterable[_types.GUID]) -> None:
+                    exports = workflows.metadata.tml_export_batched(
+                        guids, edoc_format="YAML", directory=directory, http=ts.api
+                    )
 
-                c = utils.bounded_gather(
-                    *(_download_and_advance(guid=_["guid"]) for _ in all_metadata), max_concurrent=4
-                )
+                    async for _ in exports:
+                        this_task.advance(step=1)
+
+                c = _download_and_advance(guids=[_["guid"] for _ in all_metadata])
                 d = utils.run_sync(c)
 
         if export_only:
@@ -237,6 +243,9 @@ def from_tag(
 
     ts = ctx.obj.thoughtspot
 
+    # DELETE TARGETS ARE PICKED BY THEIR TAG, WHICH MAY HAVE CHANGED SINCE IT WAS CACHED.
+    ts.api.headers["cache-control"] = "no-cache"
+
     if ts.session_context.thoughtspot.is_orgs_enabled and org_override is not None:
         ts.switch_org(org_id=org_override)
 
@@ -276,11 +285,15 @@ def from_tag(
             else:
                 this_task.total = len(guids_to_delete)
 
-                async def _download_and_advance(guid: _types.GUID) -> None:
-                    await workflows.metadata.tml_export(guid=guid, edoc_format="YAML", directory=directory, http=ts.api)
-                    this_task.advance(step=1)
+                async def _download_and_advance(guids: Iterable[_types.GUID]) -> None:
+                    exports = workflows.metadata.tml_export_batched(
+                        guids, edoc_format="YAML", directory=directory, http=ts.api
+                    )
+
+                    async for _ in exports:
+                        this_task.advance(step=1)
 
-                c = utils.bounded_gather(*(_download_and_advance(guid=_) for _ in guids_to_delete), max_concurrent=4)
+                c = _download_and_advance(guids=guids_to_delete)
                 _ = utils.run_sync(c)
 
         if export_only:
@@ -392,6 +405,9 @@ def from_tabular(
 
     ts = ctx.obj.thoughtspot
 
+    # NEVER DELETE BASED ON A CACHED VIEW OF THE CLUSTER.
+    ts.api.headers["cache-control"] = "no-cache"
+
     TOOL_TASKS = [
         px.WorkTask(id="LOAD_DATA", description=f"Loading data from {syncer.name}"),
         px.WorkTask(id="EXPORTING", description="Exporting objects as TML"),
@@ -410,13 +426,15 @@ def from_tabular(
             else:
                 this_task.total = len(all_metadata)
 
-                async def _download_and_advance(guid: _types.GUID) -> None:
-                    await workflows.metadata.tml_export(guid=guid, edoc_format="YAML", directory=directory, http=ts.api)
-                    this_task.advance(step=1)
+                async def _download_and_advance(guids: Iterable[_types.GUID]) -> None:
+                    exports = workflows.metadata.tml_export_batched(
+                        guids, edoc_format="YAML", directory=directory, http=ts.api
+                    )
 
-                c = utils.bounded_gather(
-                    *(_download_and_advance(guid=_["guid"]) for _ in all_metadata), max_concurrent=4
-                )
+                    async for _ in exports:
+                        this_task.advance(step=1)
+
+                c = _download_and_advance(guids=[_["guid"] for _ in all_metadata])
                 _ = utils.run_sync(c)
 
         if export_only:
@@ -79,6 +79,9 @@ def from_tag(
     """Share content with the identified --tag."""
     ts = ctx.obj.thoughtspot
 
+    # SHARING TARGETS ARE PICKED BY THEIR TAG, WHICH MAY HAVE CHANGED SINCE IT WAS CACHED.
+    ts.api.headers["cache-control"] = "no-cache"
+
     if ts.session_context.thoughtspot.is_orgs_enabled and org_override is not None:
         ts.switch_org(org_id=org_override)
 
@@ -89,6 +89,9 @@ def branches_commit(
     #   destinations (scriptability -> arbitrary file structre :: git -> GitHub).
     ts = ctx.obj.thoughtspot
 
+    # A COMMIT MUST REFLECT THE CLUSTER AS IT IS NOW, NOT AS THE HTTP CACHE REMEMBERS IT.
+    ts.api.headers["cache-control"] = "no-cache"
+
     if branch_override is not None:
         _LOG.warning(
             "--branch-name is [fg-warn]deprecated[/] and may lead to unexpected behavior. "
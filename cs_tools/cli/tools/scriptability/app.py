@@ -105,6 +105,9 @@ def checkpoint(
     """
     ts = ctx.obj.thoughtspot
 
+    # A CHECKPOINT IS COMMITTED, SO IT MUST REFLECT THE CLUSTER AS IT IS NOW, NOT AS THE HTTP CACHE REMEMBERS IT.
+    ts.api.headers["cache-control"] = "no-cache"
+
     SYSTEM_USER_GUIDS = ts.session_context.thoughtspot.system_users.values()
 
     if input_types == ["ALL"]:
@@ -162,19 +165,17 @@ def checkpoint(
                 tml_path.unlink()
 
     # BUILD OUR LIST OF EXPORTS.
-    coros = [
-        workflows.metadata.tml_export(
-            guid=metadata_object["object_guid"],
-            edoc_format="YAML",
-            directory=directory,
-            http=ts.api,
-        )
-        for metadata_object in _
-    ]
+    guids = [metadata_object["object_guid"] for metadata_object in _]
+    exports = workflows.metadata.tml_export_batched(
+        guids,
+        edoc_format="YAML",
+        directory=directory,
+        # ANY FASTER THAN 4 CONCURRENT DOWNLOADS AND WE WILL STRESS ATLAS OUT :')
+        concurrency=4,
+        http=ts.api,
+    )
 
-    # ANY FASTER THAN 4 CONCURRENT DOWNLOADS AND WE WILL STRESS ATLAS OUT :')
-    c = utils.bounded_gather(*coros, max_concurrent=4)  # type: ignore[assignment]
-    _ = utils.run_sync(c)
+    _ = utils.run_sync(workflows.collect(exports))
 
     table = local_utils.TMLOperations(_, domain="SCRIPTABILITY", op="EXPORT")
 
@@ -201,7 +202,7 @@ def checkpoint(
         environment=environment,
         status=table.job_status,
         info={
-            "files_expected": len(coros),
+            "files_expected": len(guids),
             "files_exported": sum(s.status != "ERROR" for s in table.statuses),
         },
     )
@@ -268,6 +269,17 @@ def deploy(
         rich_help_panel="TML Import Options",
         hidden=True,
     ),
+    chunk_size: int = typer.Option(
+        None,
+        "--chunk-size",
+        help=(
+            "The most TML objects to send in a single import request (default: all of them). Models, worksheets and "
+            "views refer to each other by name, so they are always imported together. With ALL_OR_NONE, each chunk "
+            "is all or none on its own, and the deploy stops at the first chunk which fails."
+        ),
+        show_default=False,
+        rich_help_panel="TML Import Options",
+    ),
     skip_diff_check: bool = typer.Option(
         False,
         "--skip-diff-check",
@@ -347,8 +359,7 @@ def deploy(
         if tml.tml_type_name.upper() not in input_types:
             continue
 
-        guid = tml.guid
-        tmls[guid] = mapping_info.disambiguate(tml=tml, delete_unmapped_guids=True)
+        tmls[tml.guid] = tml
 
     if not tmls:
         _LOG.info(
@@ -356,45 +367,107 @@ def deploy(
         )
         return 0
 
+    is_validate = deploy_policy == "VALIDATE_ONLY"
+    is_all_or_none = deploy_policy == "ALL_OR_NONE"
+
+    # THE DEPLOY IS ONLY SPLIT WHEN ASKED TO, OTHERWISE THE SERVER RESOLVES EVERY REFERENCE IN ONE IMPORT.
+    is_single_import = is_validate or chunk_size is None
+    guids_to_tag: set[_types.GUID] = set()
+    deployed: dict[_types.GUID, _types.APIResult] = {}
+    files_deployed = 0
+
+    async def deploy_in_waves() -> None:
+        nonlocal files_deployed
+
+        # A SINGLE IMPORT RESOLVES THE REFERENCES BETWEEN ITS OWN OBJECTS, SO IT NEEDS NO WAVES.
+        waves = [list(tmls.values())] if is_single_import else workflows.metadata.tml_import_waves(tmls.values())
+
+        for n, wave in enumerate(waves, start=1):
+            # DISAMBIGUATE AS LATE AS POSSIBLE, SO THE WAVE REFERS TO OBJECTS CREATED BY THE WAVES BEFORE IT.
+            original_guids: dict[int, _types.GUID] = {}
+            disambiguated: list[_types.TMLObject] = []
+
+            for tml in wave:
+                original_guid = tml.guid
+                tml = mapping_info.disambiguate(tml=tml, delete_unmapped_guids=True)
+                original_guids[id(tml)] = original_guid
+                disambiguated.append(tml)
+
+            # AN OBJECT MAY NAME ANOTHER IN THE SAME WAVE, WHICH CHUNKS IN FILE ORDER COULD IMPORT TOO LATE.
+            is_independent = workflows.metadata.tml_import_wave_is_independent(wave)
+
+            chunks = workflows.metadata.tml_import_chunked(
+                disambiguated,
+                chunk_size=len(disambiguated) if is_single_import or not is_independent else chunk_size,
+                # ONE CHUNK AT A TIME, SO NOTHING ELSE IS IN FLIGHT WHEN AN ALL_OR_NONE CHUNK FAILS.
+                concurrency=1 if is_all_or_none else 2,
+                policy=deploy_policy,
+                use_async_endpoint=use_async_endpoint,
+                wait_for_completion=use_async_endpoint,
+                log_errors=False,
+                http=ts.api,
+            )
+
+            async for chunk, results in chunks:
+                # EACH CHUNK IS ITS OWN IMPORT, SO ITS GUIDS ARE MAPPED (OR NOT) INDEPENDENTLY OF THE OTHERS.
+                chunk_table = local_utils.TMLOperations(
+                    results, domain="SCRIPTABILITY", op="VALIDATE" if is_validate else "IMPORT", policy=deploy_policy
+                )
+
+                for tml, result, response in zip(chunk, results, chunk_table.statuses):
+                    original_guid = original_guids[id(tml)]
+                    deployed[original_guid] = result
+
+                    if chunk_table.can_map_guids and response.status != "ERROR":
+                        files_deployed += 1
+
+                    if chunk_table.can_map_guids and response.metadata_guid is not None:
+                        mapping_info.map_guid(old=original_guid, new=response.metadata_guid, disallow_overriding=True)
+                        guids_to_tag.add(response.metadata_guid)
+
+                # EARLIER CHUNKS ARE ALREADY COMMITTED, SO THE BEST WE CAN DO IS NOT SEND ANY MORE.
+                if is_all_or_none and not chunk_table.can_map_guids:
+                    _LOG.error(
+                        f"A chunk in wave {n} of {len(waves)} failed under ALL_OR_NONE, stopping the deploy. "
+                        f"{files_deployed:,} TML objects from earlier chunks were already imported and are kept in "
+                        f"the guid mapping, {len(tmls) - len(deployed):,} were not sent."
+                    )
+                    return
+
     try:
-        c = workflows.metadata.tml_import(
-            tmls=list(tmls.values()),
-            policy=deploy_policy,
-            use_async_endpoint=use_async_endpoint,
-            wait_for_completion=use_async_endpoint,
-            log_errors=False,
-            http=ts.api,
-        )
-        _ = utils.run_sync(c)
+        utils.run_sync(deploy_in_waves())
 
     except httpx.HTTPStatusError as e:
         _LOG.error("Could not import TML due to a ThoughtSpot API error, see logs for details..")
         _LOG.debug(f"Full error: {e}", exc_info=True)
+
+        # EARLIER WAVES MAY HAVE ALREADY CREATED OBJECTS, WHICH THE NEXT DEPLOY MUST NOT CREATE AGAIN.
+        mapping_info.save(new_path=directory / ".mappings" / f"{target_environment}-guid-mappings.json")
         return 1
 
     table = local_utils.TMLOperations(
-        _,
+        list(deployed.values()),
         domain="SCRIPTABILITY",
-        op="VALIDATE" if deploy_policy == "VALIDATE_ONLY" else "IMPORT",
+        op="VALIDATE" if is_validate else "IMPORT",
         policy=deploy_policy,
     )
 
     # RECORD A CHECKPOINT.
     mapping_info.checkpoint(
         by=f"cs_tools/{__version__}/scriptability/deploy",
-        mode="VALIDATE" if deploy_policy == "VALIDATE_ONLY" else "IMPORT",
+        mode="VALIDATE" if is_validate else "IMPORT",
         environment=target_environment,
         status=table.job_status,
         info={
             "deploy_type": deploy_type,
             "deploy_policy": deploy_policy,
             "files_expected": len(tmls),
-            "files_deployed": 0 if not table.can_map_guids else sum(s.status != "ERROR" for s in table.statuses),
+            "files_deployed": files_deployed,
         },
     )
 
     # INJECT ERRORS WITH MORE INFO FOR OUR USERS CLARITY.
-    for original_guid, response in zip(tmls, table.statuses):
+    for original_guid, response in zip(deployed, table.statuses):
         if response.status == "ERROR":
             response.metadata_name = tmls[original_guid].name
             response.metadata_type = tmls[original_guid].tml_type_name.upper()
@@ -404,10 +477,11 @@ def deploy(
     else:
         RICH_CONSOLE.print(table)
 
-    guids_to_tag: set[_types.GUID] = set()
+    if log_errors:
+        for response in table.statuses:
+            if response.status == "OK":
+                continue
 
-    for original_guid, response in zip(tmls, table.statuses):
-        if log_errors and response.status != "OK":
             assert response.message is not None, "TML warning/errors should always come with a raw.error_message."
             n = len(response.cleaned_messages)
             s = "" if n == 1 else "s"
@@ -416,10 +490,6 @@ def deploy(
                 msg="\n".join([f"{response.metadata_guid} >> Found {n} issue{s}.\n", response.message, ""]),
             )
 
-        if table.can_map_guids and response.metadata_guid is not None:
-            mapping_info.map_guid(old=original_guid, new=response.metadata_guid, disallow_overriding=True)
-            guids_to_tag.add(response.metadata_guid)
-
     # RECORD THE GUID MAPPING
     mapping_info.save(new_path=directory / ".mappings" / f"{target_environment}-guid-mappings.json")
 
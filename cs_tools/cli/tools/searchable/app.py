@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Coroutine
+from collections.abc import AsyncIterator
 from typing import Literal
 import collections
 import datetime as dt
@@ -30,6 +30,9 @@ from . import api_transformer, models
 log = logging.getLogger(__name__)
 app = AsyncTyper(help="""Explore your ThoughtSpot metadata, in ThoughtSpot!""")
 
+# HOW MANY LOGICAL_TABLEs (WITH THEIR COLUMN DETAILS) TO HOLD IN MEMORY BEFORE WRITING THEM OUT.
+_TABLE_DETAILS_CHUNK_SIZE = 100
+
 
 def _ensure_external_mapping(tml: _types.TML, *, connection_info: dict[str, str]) -> _types.TML:
     """Remap TML object to match the external database."""
@@ -483,20 +486,23 @@ def metadata(
 
             if org["id"] == 0 or collect_info:
                 with tracker["TS_USER"]:
-                    c = workflows.paginator(ts.api.users_search, record_size=5_000, timeout=60 * 15)
-                    _ = utils.run_sync(c)
 
-                    # DUMP USER DATA
-                    d = api_transformer.ts_user(data=_, cluster=CLUSTER_UUID)
-                    temp.dump(models.User.__tablename__, data=d)
+                    async def dump_users_page_by_page() -> None:
+                        # THE NEXT PAGE IS FETCHED WHILE THE LAST ONE IS RESHAPED AND WRITTEN.
+                        async for page in workflows.iter_pages(ts.api.users_search, record_size=5_000, timeout=60 * 15):
+                            # DUMP USER DATA
+                            d = api_transformer.ts_user(data=page, cluster=CLUSTER_UUID)
+                            temp.dump(models.User.__tablename__, data=d)
+
+                            # DUMP USER->ORG_MEMBERSHIP DATA
+                            d = api_transformer.ts_org_membership(data=page, cluster=CLUSTER_UUID)
+                            temp.dump(models.OrgMembership.__tablename__, data=d)
 
-                    # DUMP USER->ORG_MEMBERSHIP DATA
-                    d = api_transformer.ts_org_membership(data=_, cluster=CLUSTER_UUID)
-                    temp.dump(models.OrgMembership.__tablename__, data=d)
+                            # DUMP USER->GROUP_MEMBERSHIP DATA
+                            d = api_transformer.ts_group_membership(data=page, cluster=CLUSTER_UUID)
+                            temp.dump(models.GroupMembership.__tablename__, data=d)
 
-                    # DUMP USER->GROUP_MEMBERSHIP DATA
-                    d = api_transformer.ts_group_membership(data=_, cluster=CLUSTER_UUID)
-                    temp.dump(models.GroupMembership.__tablename__, data=d)
+                    utils.run_sync(dump_users_page_by_page())
                 collect_info = False
             elif org["id"] != 0:
                 log.info(f"Skipping USER data fetch for non-primary org (ID: {org['id']}) as it was already fetched.")
@@ -511,61 +517,99 @@ def metadata(
                 temp.dump(models.Tag.__tablename__, data=d)
 
             with tracker["TS_METADATA"]:
-                c = workflows.metadata.fetch_all(
-                    metadata_types=["CONNECTION", "LOGICAL_TABLE", "LIVEBOARD", "ANSWER"], http=ts.api
-                )
-                _ = utils.run_sync(c)
 
-                # COLLECT GUIDS FOR LATER ON.. THIS WILL BE MORE EFFICIENT THAN metadata.fetch_all MULTIPLE TIMES.
-                for metadata in _:
-                    if _is_in_current_org(metadata, current_org=org["id"]):
-                        seen_guids[metadata["metadata_type"]].add(metadata["metadata_id"])
+                async def dump_metadata_page_by_page(
+                    org_id: int, seen_guids: dict[_types.APIObjectType, set[_types.GUID]]
+                ) -> None:
+                    # EACH PAGE IS RESHAPED AND WRITTEN AS IT ARRIVES, RATHER THAN HOLDING EVERY OBJECT OF EVERY TYPE.
+                    async for page in workflows.metadata.fetch_all_iter(
+                        metadata_types=["CONNECTION", "LOGICAL_TABLE", "LIVEBOARD", "ANSWER"], http=ts.api
+                    ):
+                        # COLLECT GUIDS FOR LATER ON.. MORE EFFICIENT THAN metadata.fetch_all MULTIPLE TIMES.
+                        for metadata in page:
+                            if _is_in_current_org(metadata, current_org=org_id):
+                                seen_guids[metadata["metadata_type"]].add(metadata["metadata_id"])
+
+                        # DUMP DATA_SOURCE DATA
+                        d = api_transformer.ts_data_source(data=page, cluster=CLUSTER_UUID)
+                        temp.dump(models.DataSource.__tablename__, data=d)
 
-                # DUMP DATA_SOURCE DATA
-                d = api_transformer.ts_data_source(data=_, cluster=CLUSTER_UUID)
-                temp.dump(models.DataSource.__tablename__, data=d)
+                        # DUMP METDATA_OBJECT DATA
+                        d = api_transformer.ts_metadata_object(data=page, cluster=CLUSTER_UUID)
+                        temp.dump(models.MetadataObject.__tablename__, data=d)
 
-                # DUMP METDATA_OBJECT DATA
-                d = api_transformer.ts_metadata_object(data=_, cluster=CLUSTER_UUID)
-                temp.dump(models.MetadataObject.__tablename__, data=d)
+                        # DUMP TAGGED_OBJECT DATA
+                        d = api_transformer.ts_tagged_object(data=page, cluster=CLUSTER_UUID)
+                        temp.dump(models.TaggedObject.__tablename__, data=d)
 
-                # DUMP TAGGED_OBJECT DATA
-                d = api_transformer.ts_tagged_object(data=_, cluster=CLUSTER_UUID)
-                temp.dump(models.TaggedObject.__tablename__, data=d)
+                utils.run_sync(dump_metadata_page_by_page(org_id=org["id"], seen_guids=seen_guids))
 
             with tracker["TS_COLUMN"]:
                 # USE include_hidden_objects=True BECAUSE HIDDEN COLUMNS ON A LOGICAL_TABLE AREN'T RETURNED WITHOUT IT.
                 g = {"LOGICAL_TABLE": seen_guids["LOGICAL_TABLE"]}
-                c = workflows.metadata.fetch(
-                    typed_guids=g, include_details=True, include_hidden_objects=True, http=ts.api
-                )
-                _ = utils.run_sync(c)
-
-                # COLLECT GUIDS FOR LATER ON.. THIS WILL BE MORE EFFICIENT THAN metadata.fetch_all MULTIPLE TIMES.
-                for metadata in _:
-                    if _is_in_current_org(metadata, current_org=org["id"]):
-                        seen_guids["CONNECTION"].add(metadata["metadata_detail"]["dataSourceId"])
 
-                        if not metadata["metadata_detail"]["columns"]:
-                            log.warning(
-                                f"LOGICAL_TABLE '{metadata['metadata_header']['name']}' ({metadata['metadata_id']}) "
-                                f"somehow has no columns, skipping.."
-                            )
-                            continue
-
-                        seen_columns.append([_["header"]["id"] for _ in metadata["metadata_detail"]["columns"]])
-
-                # DUMP METDATA_OBJECT DATA (UPSERT LOGICAL_TABLE with .data_source_guid)
-                d = api_transformer.ts_metadata_object(data=_, cluster=CLUSTER_UUID)
-                temp.dump(models.MetadataObject.__tablename__, data=d)
-
-                # DUMP METADATA_COLUMN DATA
-                d = api_transformer.ts_metadata_column(data=_, cluster=CLUSTER_UUID)
-                temp.dump(models.MetadataColumn.__tablename__, data=d)
-
-                # DUMP COLUMN_SYNONYM DATA
-                d = api_transformer.ts_column_synonym(data=_, cluster=CLUSTER_UUID)
-                temp.dump(models.ColumnSynonym.__tablename__, data=d)
+                def dump_table_details(
+                    tables: list[_types.APIResult],
+                    *,
+                    org_id: int,
+                    seen_guids: dict[_types.APIObjectType, set[_types.GUID]],
+                    seen_columns: list[list[_types.GUID]],
+                ) -> None:
+                    # COLLECT GUIDS FOR LATER ON.. THIS WILL BE MORE EFFICIENT THAN metadata.fetch_all MULTIPLE TIMES.
+                    for metadata in tables:
+                        if _is_in_current_org(metadata, current_org=org_id):
+                            seen_guids["CONNECTION"].add(metadata["metadata_detail"]["dataSourceId"])
+
+                            if not metadata["metadata_detail"]["columns"]:
+                                log.warning(
+                                    f"LOGICAL_TABLE '{metadata['metadata_header']['name']}' "
+                                    f"({metadata['metadata_id']}) somehow has no columns, skipping.."
+                                )
+                                continue
+
+                            columns = metadata["metadata_detail"]["columns"]
+                            seen_columns.append([_["header"]["id"] for _ in columns])
+
+                    # DUMP METDATA_OBJECT DATA (UPSERT LOGICAL_TABLE with .data_source_guid)
+                    d = api_transformer.ts_metadata_object(data=tables, cluster=CLUSTER_UUID)
+                    temp.dump(models.MetadataObject.__tablename__, data=d)
+
+                    # DUMP METADATA_COLUMN DATA
+                    d = api_transformer.ts_metadata_column(data=tables, cluster=CLUSTER_UUID)
+                    temp.dump(models.MetadataColumn.__tablename__, data=d)
+
+                    # DUMP COLUMN_SYNONYM DATA
+                    d = api_transformer.ts_column_synonym(data=tables, cluster=CLUSTER_UUID)
+                    temp.dump(models.ColumnSynonym.__tablename__, data=d)
+
+                async def dump_table_details_in_chunks(
+                    details: AsyncIterator[_types.APIResult],
+                    org_id: int,
+                    seen_guids: dict[_types.APIObjectType, set[_types.GUID]],
+                    seen_columns: list[list[_types.GUID]],
+                ) -> None:
+                    # COLUMN DETAILS ARE LARGE, SO ONLY A CHUNK OF TABLES IS EVER HELD IN MEMORY AT ONCE.
+                    tables: list[_types.APIResult] = []
+
+                    async for metadata in details:
+                        tables.append(metadata)
+
+                        if len(tables) == _TABLE_DETAILS_CHUNK_SIZE:
+                            dump_table_details(tables, org_id=org_id, seen_guids=seen_guids, seen_columns=seen_columns)
+                            tables = []
+
+                    if tables:
+                        dump_table_details(tables, org_id=org_id, seen_guids=seen_guids, seen_columns=seen_columns)
+
+                c = dump_table_details_in_chunks(
+                    workflows.metadata.fetch_iter(
+                        typed_guids=g, include_details=True, include_hidden_objects=True, http=ts.api
+                    ),
+                    org_id=org["id"],
+                    seen_guids=seen_guids,
+                    seen_columns=seen_columns,
+                )
+                utils.run_sync(c)
 
             with tracker["TS_DEPENDENT"]:
                 c = workflows.metadata.fetch(
@@ -737,19 +781,26 @@ def tml(
                         d = [_ for _ in d if _["modified"] >= latest_dt or _["created"] >= latest_dt]
 
             with tracker["EXPORT"]:
-                coros: list[Coroutine] = []
-
-                for metadata_object in d:
-                    opts = {
-                        "directory": directory,
-                        "export_schema_version": "V2" if metadata_object["object_subtype"] == "MODEL" else "V1",
-                        "edoc_format": tml_format,
-                    }
-                    c = workflows.metadata.tml_export(guid=metadata_object["object_guid"], **opts, http=ts.api)
-                    coros.append(c)
-
-                c = utils.bounded_gather(*coros, max_concurrent=4)
-                _ = utils.run_sync(c)
+
+                async def export_by_schema_version(metadata: list[_types.APIResult]) -> list[_types.APIResult]:
+                    # A BATCH SHARES ITS EXPORT OPTIONS, SO MODELS (WHICH ONLY EXPORT AS V2) ARE BATCHED SEPARATELY.
+                    models_guids = [_["object_guid"] for _ in metadata if _["object_subtype"] == "MODEL"]
+                    others_guids = [_["object_guid"] for _ in metadata if _["object_subtype"] != "MODEL"]
+                    exported: list[_types.APIResult] = []
+
+                    for guids, schema_version in ((others_guids, "V1"), (models_guids, "V2")):
+                        exports = workflows.metadata.tml_export_batched(
+                            guids,
+                            directory=directory,
+                            export_schema_version=schema_version,
+                            edoc_format=tml_format,
+                            http=ts.api,
+                        )
+                        exported.extend(await workflows.collect(exports))
+
+                    return exported
+
+                _ = utils.run_sync(export_by_schema_version(metadata=d))
 
                 d = api_transformer.ts_metadata_tml(
                     metadata_info=d, tml_info=_, edoc_format=tml_format, cluster=CLUSTER_UUID, org_id=org["id"]
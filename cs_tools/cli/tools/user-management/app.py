@@ -101,6 +101,10 @@ def transfer_sharing(
     """
 
     ts = ctx.obj.thoughtspot
+
+    # OWNERSHIP AND SHARING ARE REWRITTEN, SO THE CURRENT STATE IS READ LIVE.
+    ts.api.headers["cache-control"] = "no-cache"
+
     org_id = None
     # Switch the org
     if ts.session_context.thoughtspot.is_orgs_enabled and org_override is not None:
@@ -290,6 +294,9 @@ def transfer(
 
     ts = ctx.obj.thoughtspot
 
+    # OWNERSHIP IS REWRITTEN, SO THE CONTENT TO TRANSFER IS READ LIVE.
+    ts.api.headers["cache-control"] = "no-cache"
+
     # Switch the org
     if ts.session_context.thoughtspot.is_orgs_enabled and org_override is not None:
         ts.switch_org(org_id=org_override)
@@ -398,6 +405,9 @@ def delete(
     """
     ts = ctx.obj.thoughtspot
 
+    # PRINCIPALS ARE DELETED, SO THEY ARE NEVER PICKED FROM A CACHED LISTING.
+    ts.api.headers["cache-control"] = "no-cache"
+
     if not ts.session_context.user.is_admin:
         raise errors.InsufficientPrivileges(
             user=ts.session_context.user,
@@ -510,6 +520,9 @@ def sync(
     return 0
     ts = ctx.obj.thoughtspot
 
+    # THE SYNC CREATES, UPDATES AND DELETES PRINCIPALS FROM THIS DIFF, SO IT MUST BE DIFFED LIVE.
+    ts.api.headers["cache-control"] = "no-cache"
+
     if ts.session_context.thoughtspot.is_orgs_enabled:
         org = ts.switch_org(org_id=org_override)
         org_override = org["id"]
@@ -237,6 +237,8 @@ class ThoughtSpotConfiguration(_GlobalSettings):
     bearer_token: Optional[str] = pydantic.Field(default=None)
     default_org: Optional[int] = None
     disable_ssl: bool = False
+    disable_cache: bool = False
+    http2: bool = False
     proxy: Optional[str] = None  # See: https://www.python-httpx.org/advanced/proxies/
 
     @pydantic.model_validator(mode="before")
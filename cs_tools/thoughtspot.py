@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Awaitable
-from typing import Optional
+from typing import Any, Optional
 import asyncio
 import logging
 
@@ -22,16 +22,19 @@ class ThoughtSpot:
     Represents a connection to your ThoughtSpot cluster.
     """
 
-    def __init__(self, config: CSToolsConfig, auto_login: bool = False):
+    def __init__(self, config: CSToolsConfig, auto_login: bool = False, **api_options: Any):
         self._event_loop = utils.get_event_loop()
         self._session_context: Optional[SessionContext] = None
         self.config = config
         self.api = RESTAPIClient(
             base_url=str(config.thoughtspot.url),
             concurrency= 15 if config.thoughtspot.concurrency is None else config.thoughtspot.concurrency,
-            # cache_directory=config.temp_dir,
+            cache_directory=None if config.thoughtspot.disable_cache else config.temp_dir,
             verify=not config.thoughtspot.disable_ssl,
+            http2=config.thoughtspot.http2,
             proxy=config.thoughtspot.proxy,
+            wire_log_sample=1 if config.verbose else 10,
+            **api_options,
         )
 
         if auto_login:
@@ -60,6 +63,11 @@ class ThoughtSpot:
         # GOOD TO GO , INTERACT WITH THE APIs
         __session_info__ = r.json()
 
+        # CACHED RESPONSES ARE ONLY VALID FOR THE USER AND ORG WHO FETCHED THEM.
+        if self.api.cache is not None:
+            current_org = (__session_info__.get("current_org", None) or {}).get("id", None)
+            self.api.cache.namespace = f"{__session_info__['id']}@{current_org}"
+
         c = self.api.system_config_overrides()
         r = utils.run_sync(c)
         __overrides_info__ = r.json() if r.is_success else {}  # REQUIRES: ADMINISTARTION | APPLICATION_ADMINISTRATION
@@ -4,7 +4,7 @@ from base64 import (
     urlsafe_b64decode as b64d,
     urlsafe_b64encode as b64e,
 )
-from collections.abc import Awaitable, Coroutine, Generator, Iterable, Sequence
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Coroutine, Generator, Iterable, Sequence
 from contextvars import Context
 from typing import Annotated, Any, Optional, TypeVar
 import asyncio
@@ -102,6 +102,46 @@ async def bounded_gather(
     return await asyncio.gather(*(with_backpressure(coro) for coro in aws), return_exceptions=return_exceptions)
 
 
+async def read_ahead(aiterable: AsyncIterable[_T], *, n: int) -> AsyncIterator[_T]:
+    """Consume an async iterable up to n items ahead of the caller, so producing and consuming overlap."""
+    done = object()
+    queue: asyncio.Queue[tuple[Any, Optional[BaseException]]] = asyncio.Queue(maxsize=max(1, n))
+
+    async def produce() -> None:
+        try:
+            async for item in aiterable:
+                # BACKPRESSURE, ONCE THE CALLER FALLS n ITEMS BEHIND WE STOP PRODUCING.
+                await queue.put((item, None))
+        except Exception as e:
+            await queue.put((done, e))
+        else:
+            await queue.put((done, None))
+
+    producer = asyncio.ensure_future(produce())
+
+    try:
+        while True:
+            item, error = await queue.get()
+
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+
+            yield item
+
+    # THE CALLER STOPPED EARLY (OR FAILED), SO NOTHING MORE SHOULD BE PRODUCED.
+    finally:
+        producer.cancel()
+
+        with contextlib.suppress(asyncio.CancelledError):
+            await producer
+
+        # A GENERATOR LEFT PART WAY THROUGH ONLY RUNS ITS CLEANUP ONCE IT IS CLOSED.
+        if (aclose := getattr(aiterable, "aclose", None)) is not None:
+            await aclose()
+
+
 def platform_tag() -> str:
     """Return the platform tag for use in pip download."""
     try:
@@ -115,7 +155,7 @@ def platform_tag() -> str:
     return platform_tag
 
 
-def batched(iterable: Iterable[_T], *, n: int) -> Generator[Iterable[_T], None, None]:
+def batched(iterable: Iterable[_T], *, n: int) -> Generator[tuple[_T, ...], None, None]:
     """Yield successive n-sized chunks from list."""
     # batched('ABCDEFG', 3) --> ABC DEF G
     if n < 1:
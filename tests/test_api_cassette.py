@@ -0,0 +1,227 @@
+"""
+Tests for recording a RESTAPIClient session and replaying it without a cluster.
+
+The recording is made against an in-memory httpx.MockTransport, then replayed by a
+fresh client which has no route to any server at all.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import gzip
+import json
+import os
+
+from cs_tools.api import _cassette
+from cs_tools.api.client import RESTAPIClient
+import httpx
+import pytest
+
+ANY_CLUSTER = "https://customer.thoughtspot.cloud"
+
+
+def record_session(path) -> list[httpx.Response]:
+    def server(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("auth/token/full"):
+            return httpx.Response(
+                status_code=200,
+                json={"token": "secret-token", "valid_for_username": "me"},
+                headers={"set-cookie": "JSESSIONID=abc"},
+            )
+
+        guid = json.loads(request.content)["metadata"][0]["identifier"]
+        return httpx.Response(status_code=200, json=[{"metadata_id": guid}])
+
+    async def scenario() -> list[httpx.Response]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER,
+            wrapped_transport=httpx.MockTransport(server),
+            recorder=_cassette.CassetteRecorder(path=path),
+        )
+        responses = [
+            await client.post("api/rest/2.0/auth/token/full", json={"username": "me", "password": "hunter2"}),
+            await client.metadata_search(guid="abc"),
+            await client.metadata_search(guid="def"),
+        ]
+        await client.aclose()
+        return responses
+
+    return asyncio.run(scenario())
+
+
+def test_a_recorded_session_replays_without_a_cluster(tmp_path):
+    cassette = tmp_path / "session.cassette"
+    recorded = record_session(cassette)
+
+    async def scenario() -> list[httpx.Response]:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=_cassette.ReplayTransport(cassette))
+        responses = [
+            await client.metadata_search(guid="def"),
+            await client.metadata_search(guid="abc"),
+            await client.metadata_search(guid="ghi"),
+        ]
+        await client.aclose()
+        return responses
+
+    replayed = asyncio.run(scenario())
+
+    assert replayed[0].json() == recorded[2].json() == [{"metadata_id": "def"}]
+    assert replayed[1].json() == recorded[1].json() == [{"metadata_id": "abc"}]
+    assert replayed[2].status_code == 404
+
+
+def test_credentials_and_tokens_are_not_recorded(tmp_path):
+    cassette = tmp_path / "session.cassette"
+    recorded = record_session(cassette)
+    archive = gzip.decompress(cassette.read_bytes()).decode()
+
+    assert recorded[0].json()["token"] == "secret-token", "the live session should still see the token"
+    assert "hunter2" not in archive
+    assert "JSESSIONID" not in archive
+    assert "secret-token" not in archive
+
+
+def test_a_recorded_login_replays_with_a_redacted_token(tmp_path):
+    cassette = tmp_path / "session.cassette"
+    record_session(cassette)
+
+    async def scenario() -> httpx.Response:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=_cassette.ReplayTransport(cassette))
+        r = await client.post("api/rest/2.0/auth/token/full", json={"username": "me", "password": "hunter2"})
+        await client.aclose()
+        return r
+
+    r = asyncio.run(scenario())
+
+    assert r.json() == {"token": "REDACTED", "valid_for_username": "me"}
+
+
+def test_exchanges_are_written_as_they_are_recorded(tmp_path):
+    # A LONG RECORDING MUST NOT ACCUMULATE IN MEMORY, SO EACH EXCHANGE REACHES THE ARCHIVE BEFORE THE CLOSE.
+    cassette = tmp_path / "session.cassette"
+    recorder = _cassette.CassetteRecorder(path=cassette)
+    body = os.urandom(64 * 1024)
+
+    async def scenario() -> int:
+        request = httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/metadata/search", json={"metadata": []})
+
+        for _ in range(5):
+            r = await recorder.record(request, httpx.Response(status_code=200, content=body), elapsed=0.1)
+            await r.aread()
+
+        written_before_close = cassette.stat().st_size
+        await recorder.aclose()
+        return written_before_close
+
+    written_before_close = asyncio.run(scenario())
+    archive = gzip.decompress(cassette.read_bytes()).decode().splitlines()
+
+    assert written_before_close > 4 * len(body), "the (incompressible) bodies should already be on disk"
+    assert recorder.recorded == len(archive) - 1 == 5
+
+
+def test_a_session_with_cache_hits_is_recorded_and_replayed_in_full(tmp_path):
+    cassette = tmp_path / "session.cassette"
+    answers = iter(["stale", "first", "second"])
+    sent: list[str] = []
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        sent.append(answer := next(answers))
+        return httpx.Response(status_code=200, json=[{"metadata_id": answer}])
+
+    async def scenario() -> tuple[list[str], list[str]]:
+        # A PREVIOUS, LIVE RUN LEAVES AN ANSWER IN THE REAL CACHE.
+        live = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        await live.metadata_search(guid="abc")
+        await live.aclose()
+
+        # THE SECOND READ WOULD BE A CACHE HIT, BUT THE CASSETTE MUST STILL SEE IT.
+        recording = RESTAPIClient(
+            base_url=ANY_CLUSTER,
+            cache_directory=tmp_path,
+            wrapped_transport=httpx.MockTransport(server),
+            recorder=_cassette.CassetteRecorder(path=cassette),
+        )
+        recorded = [(await recording.metadata_search(guid="abc")).json()[0]["metadata_id"] for _ in range(2)]
+        await recording.aclose()
+
+        replaying = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=_cassette.ReplayTransport(cassette)
+        )
+        replayed = [(await replaying.metadata_search(guid="abc")).json()[0]["metadata_id"] for _ in range(2)]
+        await replaying.aclose()
+
+        return recorded, replayed
+
+    recorded, replayed = asyncio.run(scenario())
+
+    assert sent == ["stale", "first", "second"], "the recorded run should bypass the cache"
+    assert recorded == replayed == ["first", "second"], "the replay should be answered by the cassette alone"
+
+
+def test_injected_faults_are_reproducible(tmp_path):
+    cassette = tmp_path / "session.cassette"
+    record_session(cassette)
+
+    async def replay() -> list[int]:
+        transport = _cassette.ReplayTransport(cassette, faults=_cassette.FaultProfile.from_string("503=0.5", seed=42))
+        request = httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/auth/token/full")
+        return [(await transport.handle_async_request(request)).status_code for _ in range(20)]
+
+    first, second = asyncio.run(replay()), asyncio.run(replay())
+
+    assert first == second
+    assert set(first) == {200, 503}
+
+
+def test_unknown_faults_are_rejected():
+    with pytest.raises(ValueError, match="fault"):
+        _cassette.FaultProfile.from_string("oops=0.5")
+
+
+def test_a_streamed_response_is_still_streamed_while_it_is_recorded(tmp_path):
+    cassette = tmp_path / "session.cassette"
+    first_element_seen = asyncio.Event()
+
+    async def slow_body():
+        yield b'[{"metadata_id": "abc"},'
+        await first_element_seen.wait()
+        yield b' {"metadata_id": "def"}]'
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        return httpx.Response(status_code=200, content=slow_body())
+
+    async def scenario() -> list[str]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER,
+            wrapped_transport=httpx.MockTransport(server),
+            recorder=_cassette.CassetteRecorder(path=cassette),
+        )
+        seen: list[str] = []
+
+        async for element in client.stream_json_array(client.metadata_search, guid="abc"):
+            seen.append(element["metadata_id"])
+            first_element_seen.set()
+
+        # A READER WHICH STOPS EARLY STILL LEAVES THE WHOLE BODY IN THE CASSETTE.
+        async with contextlib.aclosing(client.stream_json_array(client.metadata_search, guid="abc")) as elements:
+            async for element in elements:
+                seen.append(element["metadata_id"])
+                break
+
+        await client.aclose()
+        return seen
+
+    assert asyncio.run(asyncio.wait_for(scenario(), timeout=5)) == ["abc", "def", "abc"]
+
+    async def replay() -> list[httpx.Response]:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=_cassette.ReplayTransport(path=cassette))
+        responses = [await client.metadata_search(guid="abc") for _ in range(2)]
+        await client.aclose()
+        return responses
+
+    expected = [{"metadata_id": "abc"}, {"metadata_id": "def"}]
+    assert [r.json() for r in asyncio.run(replay())] == [expected, expected]
@@ -0,0 +1,184 @@
+"""
+Specification for the CS Tools adaptive concurrency limiter.
+
+cs_tools/api/_concurrency.py decides how many requests may be in flight at once.
+
+- The user's configured concurrency is a ceiling, never exceeded.
+- Signs of server pressure (429/502/503/504, timeouts, latency spikes) cut the
+  limit multiplicatively, but a single burst of failures only counts once.
+- Healthy responses recover the limit additively, back up to the ceiling.
+- Slots are handed out first-come first-served within a priority, and higher
+  priorities are always served first.
+- Reserved slots above the limit are only ever used by control-plane requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from cs_tools.api import _concurrency
+import pytest
+
+ENDPOINT = "/api/rest/2.0/metadata/search"
+
+
+def test_limit_starts_at_the_ceiling():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=15)
+    assert limiter.limit == 15
+
+
+def test_ceiling_must_allow_at_least_one_request():
+    with pytest.raises(ValueError):
+        _concurrency.AdaptiveConcurrencyLimiter(ceiling=0)
+
+
+def test_pressure_cuts_the_limit_multiplicatively():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=16)
+
+    for _ in range(16):
+        limiter.record(endpoint=ENDPOINT, latency=0.1)
+
+    limiter.record(endpoint=ENDPOINT, pressured=True)
+    assert limiter.limit == 8
+
+
+def test_a_burst_of_failures_only_backs_off_once():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=16)
+
+    for _ in range(16):
+        limiter.record(endpoint=ENDPOINT, latency=0.1)
+
+    for _ in range(5):
+        limiter.record(endpoint=ENDPOINT, pressured=True)
+
+    assert limiter.limit == 8
+
+
+def test_pressure_at_startup_cuts_the_limit_immediately():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=16)
+
+    limiter.record(endpoint=ENDPOINT, pressured=True)
+    assert limiter.limit == 8
+
+    limiter.record(endpoint=ENDPOINT, pressured=True)
+    assert limiter.limit == 8, "the rest of the burst still only counts once"
+
+
+def test_limit_never_falls_below_the_floor():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=4)
+
+    for _ in range(100):
+        limiter.record(endpoint=ENDPOINT, pressured=True)
+
+    assert limiter.limit == 1
+
+
+def test_healthy_responses_recover_the_limit_up_to_the_ceiling():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=8, initial=2)
+
+    for _ in range(1_000):
+        limiter.record(endpoint=ENDPOINT, latency=0.1)
+
+    assert limiter.limit == 8
+
+
+def test_a_latency_spike_counts_as_pressure():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=8)
+
+    for _ in range(8):
+        limiter.record(endpoint=ENDPOINT, latency=0.5)
+
+    limiter.record(endpoint=ENDPOINT, latency=30.0)
+    assert limiter.limit == 4
+
+
+def test_slots_are_handed_out_in_order():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=1)
+    order: list[int] = []
+
+    async def worker(n: int) -> None:
+        async with limiter:
+            order.append(n)
+            await asyncio.sleep(0)
+
+    async def scenario() -> None:
+        await asyncio.gather(*(worker(n) for n in range(5)))
+
+    asyncio.run(scenario())
+
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.in_flight == 0
+
+
+def test_a_cancelled_waiter_does_not_leak_its_slot():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=1)
+
+    async def scenario() -> None:
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        waiter.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        await asyncio.wait_for(limiter.acquire(), timeout=1)
+        limiter.release()
+
+    asyncio.run(scenario())
+
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+
+
+def test_higher_priorities_are_served_first():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=1)
+    order: list[str] = []
+
+    async def worker(name: str, priority: str) -> None:
+        async with limiter.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def scenario() -> None:
+        await limiter.acquire()
+        tasks = [
+            asyncio.create_task(worker("crawl-1", "background")),
+            asyncio.create_task(worker("search", "normal")),
+            asyncio.create_task(worker("crawl-2", "background")),
+            asyncio.create_task(worker("heartbeat", "control")),
+        ]
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+
+    assert order == ["heartbeat", "search", "crawl-1", "crawl-2"]
+
+
+def test_reserved_slots_are_only_for_control_requests():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=2, reserved=1)
+
+    async def scenario() -> None:
+        await limiter.acquire()
+        await limiter.acquire()
+
+        # THE LIMIT IS SPENT, BUT A CONTROL REQUEST STILL GETS THROUGH IMMEDIATELY.
+        await asyncio.wait_for(limiter.acquire("control"), timeout=1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire("normal"), timeout=0.05)
+
+    asyncio.run(scenario())
+
+    assert limiter.in_flight == 3
+    assert limiter.waiting == 0
+
+
+def test_unknown_priorities_are_rejected():
+    limiter = _concurrency.AdaptiveConcurrencyLimiter(ceiling=1)
+
+    with pytest.raises(ValueError, match="priority"):
+        asyncio.run(limiter.acquire("urgent"))
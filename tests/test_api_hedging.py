@@ -0,0 +1,131 @@
+"""
+Tests for hedging slow, idempotent reads.
+
+Once an endpoint's latency is known, a request which takes longer than its p95 is sent
+again, and whichever copy answers first is used.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from cs_tools.api import _hedging, _retry
+from cs_tools.api.client import RESTAPIClient
+import httpx
+import pytest
+
+ANY_CLUSTER = "https://customer.thoughtspot.cloud"
+
+
+def search_data(client: RESTAPIClient, **headers: str):
+    return client.post("api/rest/2.0/searchdata", headers=headers, json={"query_string": "[sales]"})
+
+
+def stall_on(*stalled: int):
+    """Answer quickly, except for the nth requests to arrive (counting hedges)."""
+    calls = 0
+
+    async def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        nonlocal calls
+        calls += 1
+
+        if calls in stalled:
+            await asyncio.sleep(5)
+
+        return httpx.Response(status_code=200, json={"call": calls})
+
+    return server
+
+
+def run(server, *, hedge_policy: _hedging.HedgePolicy, requests: int, **headers: str) -> list[httpx.Response]:
+    async def scenario() -> list[httpx.Response]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, hedge_policy=hedge_policy, wrapped_transport=httpx.MockTransport(server)
+        )
+        responses = [await search_data(client, **headers) for _ in range(requests)]
+        await client.aclose()
+        return responses
+
+    return asyncio.run(asyncio.wait_for(scenario(), timeout=0.5))
+
+
+def test_a_slow_read_is_hedged_and_the_first_answer_wins():
+    policy = _hedging.HedgePolicy(min_samples=5)
+    responses = run(stall_on(6), hedge_policy=policy, requests=6)
+
+    assert responses[-1].json() == {"call": 7}, "the duplicate should answer while the original stalls"
+    assert responses[-1].headers[_hedging.HEDGE_HEADER] == "hedge"
+    assert policy.stats == {"hedges_sent": 1, "hedges_won": 1}
+    assert all(_hedging.HEDGE_HEADER not in r.headers for r in responses[:-1])
+
+
+def test_reads_are_not_hedged_until_the_endpoint_latency_is_known():
+    policy = _hedging.HedgePolicy(min_samples=5)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(stall_on(4), hedge_policy=policy, requests=4)
+
+    assert not policy.stats
+
+
+def test_non_idempotent_requests_are_never_hedged():
+    policy = _hedging.HedgePolicy(min_samples=5)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(stall_on(6), hedge_policy=policy, requests=6, **{_retry.NON_IDEMPOTENT_HEADER: "true"})
+
+    assert not policy.stats
+
+
+def test_hedges_stop_once_the_budget_is_spent():
+    policy = _hedging.HedgePolicy(min_samples=5, reserve=1.0, ratio=0.0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(stall_on(6, 8), hedge_policy=policy, requests=7)
+
+    assert policy.stats == {"hedges_sent": 1, "hedges_won": 1, "budget_exhausted": 1}
+
+
+def test_only_reads_are_hedgeable():
+    policy = _hedging.HedgePolicy()
+
+    assert policy.is_hedgeable(httpx.Request("GET", f"{ANY_CLUSTER}/callosum/v1/session/info"))
+    assert policy.is_hedgeable(httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/searchdata", json={}))
+    assert not policy.is_hedgeable(httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/users/create", json={}))
+    assert not policy.is_hedgeable(httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/metadata/tml/import", json={}))
+
+
+def test_a_cancelled_caller_takes_the_unhedged_request_down_with_it():
+    policy = _hedging.HedgePolicy(min_samples=5, min_delay=5.0)
+    abandoned = []
+    calls = 0
+
+    async def server(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+
+        if calls == 6:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                abandoned.append(request)
+                raise
+
+        return httpx.Response(status_code=200, json={})
+
+    async def scenario() -> None:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, hedge_policy=policy, wrapped_transport=httpx.MockTransport(server))
+
+        for _ in range(5):
+            await search_data(client)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(search_data(client), timeout=0.1)
+
+        # GIVE A STILL-RUNNING ORIGINAL THE CHANCE TO BE CANCELLED, BEFORE THE EVENT LOOP DOES IT FOR US.
+        await asyncio.sleep(0.05)
+        assert abandoned, "the original request should be cancelled along with its caller"
+        await client.aclose()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=1))
+    assert not policy.stats
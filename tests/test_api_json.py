@@ -0,0 +1,116 @@
+"""
+Tests for the accelerated JSON decoding of API responses.
+
+Whichever decoder is available (orjson, msgspec, or the stdlib), the decoded
+documents must be identical to what json.loads would produce.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from cs_tools.api import _json
+from cs_tools.api.client import RESTAPIClient
+import httpx
+import pytest
+
+ANY_CLUSTER = "https://customer.thoughtspot.cloud"
+
+DOCUMENTS = [
+    b'[{"metadata_id": "abc", "metadata_name": "Sales \\u2013 EMEA", "metadata_header": {"modified": 1.5e12}}]',
+    b'{"contents": [{"column_names": ["a"], "data_rows": [[1, null, true]]}]}',
+    b'{"value": -9223372036854775808}',
+    # THE ACCELERATED DECODERS REJECT THIS, SO THE STDLIB MUST STEP IN.
+    b'{"value": NaN}',
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_decoded_documents_match_the_stdlib(document):
+    assert repr(_json.loads(document)) == repr(json.loads(document))
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_stdlib_is_used_when_no_accelerated_decoder_is_installed(document, monkeypatch):
+    monkeypatch.setattr(_json, "orjson", None)
+    monkeypatch.setattr(_json, "msgspec", None)
+
+    assert repr(_json.loads(document)) == repr(json.loads(document))
+    assert repr(_json.loads_as(document, shape=object)) == repr(json.loads(document))
+
+
+def test_invalid_documents_still_raise_a_json_error():
+    with pytest.raises(json.JSONDecodeError):
+        _json.loads(b'{"unterminated": ')
+
+
+def test_client_responses_decode_with_the_accelerated_decoder(tmp_path):
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        return httpx.Response(status_code=200, content=DOCUMENTS[0], headers={"content-type": "application/json"})
+
+    async def scenario() -> list[httpx.Response]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        network = await client.metadata_search(guid="abc")
+        memory = await client.metadata_search(guid="abc")
+        await client.aclose()
+        return [network, memory]
+
+    for response in asyncio.run(scenario()):
+        assert isinstance(response, _json.JSONResponse)
+        assert response.json() == json.loads(DOCUMENTS[0])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+def test_array_elements_are_split_however_the_document_is_chunked(chunk_size):
+    document = [1, 'a,]"}\\', {"nested": [1, {"b": "]"}]}, [], None, "\u2013"]
+    data = json.dumps(document, ensure_ascii=False).encode()
+
+    splitter = _json.ArraySplitter()
+    elements = [e for i in range(0, len(data), chunk_size) for e in splitter.feed(data[i : i + chunk_size])]
+    splitter.close()
+
+    assert [json.loads(e) for e in elements] == document
+
+
+@pytest.mark.parametrize("document", [b'{"a": 1}', b'"[1]"', b"[1, 2"])
+def test_only_complete_arrays_can_be_split(document):
+    splitter = _json.ArraySplitter()
+
+    with pytest.raises(ValueError):
+        splitter.feed(document)
+        splitter.close()
+
+
+def test_streamed_elements_arrive_before_the_response_is_complete(tmp_path):
+    first_element_seen = asyncio.Event()
+    calls = 0
+
+    async def slow_body():
+        yield b'[{"metadata_id": "abc"},'
+        await first_element_seen.wait()
+        yield b' {"metadata_id": "def"}]'
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        nonlocal calls
+        calls += 1
+        return httpx.Response(status_code=200, content=slow_body())
+
+    async def scenario() -> list[str]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        seen: list[str] = []
+
+        for _ in range(2):
+            async for element in client.stream_json_array(client.metadata_search, guid="abc"):
+                seen.append(element["metadata_id"])
+                first_element_seen.set()
+
+        await client.aclose()
+        return seen
+
+    assert asyncio.run(asyncio.wait_for(scenario(), timeout=5)) == ["abc", "def", "abc", "def"]
+    assert calls == 2, "a streamed response is never cached"
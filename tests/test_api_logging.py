@@ -0,0 +1,58 @@
+"""
+Tests for the RESTAPIClient wire log.
+
+Every request and response may be logged at DEBUG, so the hooks must cost nothing
+when that output is disabled, and only a sample of exchanges when it is not.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from cs_tools.api import client as client_module
+from cs_tools.api.client import RESTAPIClient
+import httpx
+
+ANY_CLUSTER = "https://customer.thoughtspot.cloud"
+
+
+def send_requests(*, statuses: list[int], wire_log_sample: int = 1) -> None:
+    answers = iter(statuses)
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        return httpx.Response(status_code=next(answers), json={"error": "nope"})
+
+    async def scenario() -> None:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, wire_log_sample=wire_log_sample, wrapped_transport=httpx.MockTransport(server)
+        )
+
+        for _ in statuses:
+            await client.request("GET", "api/rest/2.0/system")
+
+    asyncio.run(scenario())
+
+
+def test_wire_log_is_sampled_but_errors_are_always_logged(caplog):
+    with caplog.at_level(logging.DEBUG, logger=client_module.wire_log.name):
+        send_requests(statuses=[200, 200, 200, 200, 400, 200, 200], wire_log_sample=3)
+
+    records = [r for r in caplog.records if r.name == client_module.wire_log.name]
+
+    assert [r.getMessage()[:3] for r in records] == [">>>", "<<<", ">>>", "<<<", "<<<", ">>>", "<<<"]
+    statuses = [r.http_status for r in records if r.getMessage().startswith("<<<")]  # type: ignore[attr-defined]
+    assert statuses == [200, 200, 400, 200]
+
+
+def test_nothing_is_formatted_when_the_wire_log_is_disabled(caplog, monkeypatch):
+    def explode(self):  # noqa: ARG001
+        raise AssertionError("request details should never be formatted")
+
+    monkeypatch.setattr(client_module._RequestDetail, "__str__", explode)
+    monkeypatch.setattr(client_module._ResponseDetail, "__str__", explode)
+
+    with caplog.at_level(logging.INFO, logger=client_module.wire_log.name):
+        send_requests(statuses=[200, 200])
+
+    assert not [r for r in caplog.records if r.name == client_module.wire_log.name]
@@ -15,10 +15,17 @@ cs_tools/api/_retry.py decides which failures are safe to retry. The rules:
 - Waits between attempts are short, jittered, and capped. Each wait is slept
   while holding one of the transport's concurrency slots, so long waits would
   collapse throughput exactly when the server is struggling.
+- A server's Retry-After is honored up to that same cap. Asking for longer is
+  treated as a failure, not retried early.
+- Retries are drawn from a client-wide budget which refills with successful
+  responses. An empty budget fails fast instead of piling onto the server.
 """
 
 from __future__ import annotations
 
+import datetime as dt
+import email.utils
+
 from cs_tools.api import _retry
 from cs_tools.api.client import RESTAPIClient
 import httpx
@@ -61,8 +68,8 @@ def make_error(error_type: type[httpx.TransportError], endpoint: str) -> httpx.T
     return error_type("transient network blip", request=make_request(endpoint))
 
 
-def make_response(status_code: int, endpoint: str) -> httpx.Response:
-    return httpx.Response(status_code=status_code, request=make_request(endpoint))
+def make_response(status_code: int, endpoint: str, **headers: str) -> httpx.Response:
+    return httpx.Response(status_code=status_code, request=make_request(endpoint), headers=headers)
 
 
 class TestTransientErrorPredicate:
@@ -171,3 +178,73 @@ class TestBackoffPolicy:
         state = tenacity.RetryCallState(retry_object=retry_policy, fn=None, args=(), kwargs={})
         state.attempt_number = 10
         assert retry_policy.stop(state) is True
+
+
+class TestRetryAfter:
+    """Spec for honoring the server's Retry-After header."""
+
+    @staticmethod
+    def wait_after(response: httpx.Response) -> float:
+        policy = tenacity.AsyncRetrying(wait=_retry.wait_retry_after(fallback=tenacity.wait_fixed(1)))
+        state = tenacity.RetryCallState(retry_object=policy, fn=None, args=(), kwargs={})
+        state.set_result(response)
+        return policy.wait(state)
+
+    def test_delay_in_seconds_is_honored(self):
+        response = make_response(429, "api/rest/2.0/metadata/search", **{"Retry-After": "7"})
+        assert self.wait_after(response) == 7
+
+    def test_delay_as_an_http_date_is_honored(self):
+        retry_at = dt.datetime.now(tz=dt.timezone.utc) + dt.timedelta(seconds=20)
+        response = make_response(
+            503, "api/rest/2.0/metadata/search", **{"Retry-After": email.utils.format_datetime(retry_at)}
+        )
+        assert 15 < self.wait_after(response) <= 20
+
+    def test_missing_header_falls_back_to_backoff(self):
+        response = make_response(503, "api/rest/2.0/metadata/search")
+        assert self.wait_after(response) == 1
+
+    def test_asking_for_longer_than_the_cap_is_not_retried(self):
+        response = make_response(503, "api/rest/2.0/metadata/search", **{"Retry-After": "3600"})
+        assert _retry.if_server_is_under_pressure(response) is False
+
+
+class TestRetryBudget:
+    """Spec for _retry.RetryBudget, the client-wide cap on retries."""
+
+    @staticmethod
+    def outcome(budget: _retry.RetryBudget, status_code: int) -> bool:
+        state = tenacity.RetryCallState(retry_object=None, fn=None, args=(), kwargs={})  # type: ignore[arg-type]
+        state.set_result(make_response(status_code, "api/rest/2.0/metadata/search"))
+        return budget(state)
+
+    @staticmethod
+    def budget(**options: float) -> _retry.RetryBudget:
+        return _retry.RetryBudget(tenacity.retry_if_result(_retry.if_server_is_under_pressure), **options)
+
+    def test_reserve_allows_early_retries_then_fails_fast(self):
+        budget = self.budget(reserve=3)
+        assert [self.outcome(budget, 503) for _ in range(5)] == [True, True, True, False, False]
+        assert budget.exhausted == 2
+
+    def test_successes_refill_the_budget_by_ratio(self):
+        budget = self.budget(reserve=0, ratio=0.5)
+        assert self.outcome(budget, 503) is False
+
+        self.outcome(budget, 200)
+        self.outcome(budget, 200)
+        assert self.outcome(budget, 503) is True
+
+    def test_budget_never_banks_more_than_its_capacity(self):
+        budget = self.budget(reserve=0, ratio=1, capacity=2)
+
+        for _ in range(100):
+            self.outcome(budget, 200)
+
+        assert budget.tokens == 2
+
+    def test_failures_which_are_not_retryable_are_left_alone(self):
+        budget = self.budget(reserve=1)
+        assert self.outcome(budget, 404) is False
+        assert budget.tokens == 1
@@ -0,0 +1,82 @@
+"""
+Tests for the per-endpoint request telemetry collected by RESTAPIClient.
+
+Requests are answered by an in-memory httpx.MockTransport, so the timings come
+from the real transport headers without any network access.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from cs_tools.api import _telemetry
+from cs_tools.api.client import RESTAPIClient
+import httpx
+
+ANY_CLUSTER = "https://customer.thoughtspot.cloud"
+
+
+def test_histogram_percentiles_are_within_a_bucket_of_the_truth():
+    histogram = _telemetry.LatencyHistogram()
+
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+
+    assert histogram.count == 1000
+    assert histogram.max == 1.0
+    assert 0.500 <= histogram.percentile(50) <= 0.500 * 1.05
+    assert 0.990 <= histogram.percentile(99) <= 1.0
+    assert histogram.percentile(100) == 1.0
+
+
+def test_identifiers_do_not_split_an_endpoint():
+    a = httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/users/0f0dd0f7-7411-4195-a4aa-0dc6b58413c9/update")
+    b = httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/users/bd5a7b80-d3b4-4e9b-8a36-71a7d5e4f0c2/update")
+
+    assert _telemetry.RequestTelemetry.endpoint_for(a) == "POST /api/rest/2.0/users/{id}/update"
+    assert _telemetry.RequestTelemetry.endpoint_for(a) == _telemetry.RequestTelemetry.endpoint_for(b)
+
+
+def test_client_records_latency_retries_and_cache_tiers(tmp_path):
+    answers = iter([502, 200])
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        return httpx.Response(status_code=next(answers, 200), json=[{"metadata_id": "abc"}])
+
+    async def scenario() -> RESTAPIClient:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+
+        async def dont_sleep(seconds: float) -> None:
+            pass
+
+        client._transport.retrier.sleep = dont_sleep  # type: ignore[union-attr]
+
+        await client.metadata_search(guid="abc")
+        await client.metadata_search(guid="abc")
+        await client.aclose()
+        return client
+
+    client = asyncio.run(scenario())
+    stats = client.telemetry.endpoints["POST /api/rest/2.0/metadata/search"]
+
+    assert stats.requests == 2
+    assert stats.retries == 1, "the cache hit should not repeat the original request's retries"
+    assert stats.status_codes == {200: 2}
+    assert stats.cache_tiers == {"network": 1, "memory": 1}
+    assert stats.latency.count == 2
+
+
+def test_summary_is_exported_as_json(tmp_path):
+    telemetry = _telemetry.RequestTelemetry()
+    request = httpx.Request("POST", f"{ANY_CLUSTER}/api/rest/2.0/metadata/search")
+    telemetry.record(httpx.Response(status_code=200, content=b"[]", request=request))
+
+    telemetry.export(tmp_path / "telemetry.json")
+    data = json.loads((tmp_path / "telemetry.json").read_text())
+
+    assert data["requests"] == 1
+    assert data["endpoints"]["POST /api/rest/2.0/metadata/search"]["bytes"] == 2
+    assert "POST /api/rest/2.0/metadata/search" in telemetry.format_summary()
@@ -13,8 +13,15 @@ from __future__ import annotations
 
 from typing import Union
 import asyncio
+import base64
+import contextlib
+import datetime as dt
+import pathlib
+import sqlite3
 
+from cs_tools.api import _concurrency, _transport
 from cs_tools.api.client import RESTAPIClient
+import httpcore
 import httpx
 import pytest
 import tenacity
@@ -64,6 +71,118 @@ def test_default_wrapped_transport_is_a_real_http_transport():
     assert isinstance(client._transport._wrapper, httpx.AsyncHTTPTransport)  # type: ignore[union-attr]
 
 
+def test_http2_is_opt_in():
+    assert RESTAPIClient(base_url=ANY_CLUSTER)._transport._wrapper._pool._http2 is False  # type: ignore[union-attr]
+    assert RESTAPIClient(base_url=ANY_CLUSTER, http2=True)._transport._wrapper._pool._http2 is True  # type: ignore[union-attr]
+
+
+def test_http2_falls_back_to_http1_when_the_server_rejects_it():
+    # A PROXY WHICH ADVERTISES h2 BUT BREAKS THE CONNECTION, BEFORE ANY HTTP/2 RESPONSE WAS SEEN.
+    def broken_h2(request: httpx.Request) -> httpx.Response:
+        raise httpx.RemoteProtocolError("connection reset during h2 preface", request=request)
+
+    transport = _transport.CachedRetryTransport(http2=True)
+    rejected = transport._wrapper
+    transport._wrapper = httpx.MockTransport(broken_h2)
+
+    with pytest.raises(httpx.RemoteProtocolError):
+        asyncio.run(transport._handle_async_request(httpx.Request("GET", f"{ANY_CLUSTER}/{RETRY_SAFE_ENDPOINT}")))
+
+    assert transport.http2 is False
+    assert transport._wrapper is not rejected
+    assert transport._wrapper._pool._http2 is False  # type: ignore[attr-defined]
+
+
+def test_http2_is_kept_after_an_ordinary_dropped_connection():
+    # ALPN SETTLED ON HTTP/1.1, THEN THE SERVER CLOSED A KEEP-ALIVE CONNECTION.
+    answers: list[Union[httpx.Response, Exception]] = [
+        httpx.Response(status_code=200, json=[]),
+        httpx.RemoteProtocolError("Server disconnected without sending a response."),
+    ]
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        if isinstance(answer := answers.pop(0), Exception):
+            raise answer
+        return answer
+
+    transport = _transport.CachedRetryTransport(http2=True)
+    negotiated = transport._wrapper = httpx.MockTransport(server)
+
+    async def scenario() -> None:
+        request = httpx.Request("GET", f"{ANY_CLUSTER}/{RETRY_SAFE_ENDPOINT}")
+        await transport._handle_async_request(request)
+
+        with pytest.raises(httpx.RemoteProtocolError):
+            await transport._handle_async_request(request)
+
+    asyncio.run(scenario())
+
+    assert transport.http2 is True
+    assert transport._wrapper is negotiated
+
+
+def test_http2_falls_back_to_http1_on_an_h2_error_after_a_response():
+    h2_events = pytest.importorskip("h2.events")
+
+    def h2_stream_reset() -> httpx.RemoteProtocolError:
+        # THE SAME CHAIN httpcore AND httpx BUILD AROUND AN h2 EVENT.
+        try:
+            raise httpcore.RemoteProtocolError(h2_events.StreamReset(stream_id=1))
+        except httpcore.RemoteProtocolError as e:
+            try:
+                raise httpx.RemoteProtocolError(str(e)) from e
+            except httpx.RemoteProtocolError as wrapped:
+                return wrapped
+
+    answers: list[Union[httpx.Response, Exception]] = [httpx.Response(status_code=200, json=[]), h2_stream_reset()]
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        if isinstance(answer := answers.pop(0), Exception):
+            raise answer
+        return answer
+
+    transport = _transport.CachedRetryTransport(http2=True)
+    transport._wrapper = httpx.MockTransport(server)
+
+    async def scenario() -> None:
+        request = httpx.Request("GET", f"{ANY_CLUSTER}/{RETRY_SAFE_ENDPOINT}")
+        await transport._handle_async_request(request)
+
+        with pytest.raises(httpx.RemoteProtocolError):
+            await transport._handle_async_request(request)
+
+    asyncio.run(scenario())
+
+    assert transport.http2 is False
+
+
+def test_connection_pool_is_sized_to_the_concurrency_limit():
+    pool = RESTAPIClient(base_url=ANY_CLUSTER, concurrency=7)._transport._wrapper._pool  # type: ignore[union-attr]
+
+    # ONE CONNECTION ABOVE THE LIMIT FOR THE SLOT RESERVED TO CONTROL-PLANE CALLS.
+    assert pool._max_connections == 7 + _concurrency.DEFAULT_RESERVED_SLOTS
+    assert pool._max_keepalive_connections == 7
+    assert pool._keepalive_expiry == _transport.CachedRetryTransport.KEEPALIVE_EXPIRY_SECONDS
+
+
+def test_time_waiting_for_a_connection_is_reported_apart_from_server_latency():
+    # httpcore TRACES THE MOMENT A CONNECTION IS HANDED OUT, WHICH MockTransport STANDS IN FOR HERE.
+    async def pooled_server(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.02)
+        await request.extensions["trace"]("http11.send_request_headers.started", {})
+        return httpx.Response(status_code=200, json=[])
+
+    async def scenario() -> tuple[httpx.Response, _transport.CachedRetryTransport]:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(pooled_server))
+        r = await client.request("POST", RETRY_SAFE_ENDPOINT, json={})
+        return r, client._transport  # type: ignore[return-value]
+
+    r, transport = asyncio.run(scenario())
+
+    assert float(r.headers[_transport.CachedRetryTransport.CONNECTION_WAIT_HEADER]) >= 0.02
+    assert transport.connection_stats["connections_reused"] == 1
+
+
 def test_successful_request_is_sent_exactly_once():
     server = ScriptedServer(script=[200])
 
@@ -124,6 +243,22 @@ def test_transient_network_error_is_retried_until_success():
     assert server.calls == 3
 
 
+def test_retries_stop_once_the_client_wide_budget_is_spent():
+    # A PERSISTENTLY OVERLOADED SERVER GETS ITS RETRY RESERVE (10), THEN ONE ATTEMPT PER REQUEST.
+    server = ScriptedServer(script=[503])
+
+    async def scenario() -> None:
+        client, _ = make_client(server)
+
+        for _ in range(8):
+            with contextlib.suppress(tenacity.RetryError):
+                await client.request("POST", RETRY_SAFE_ENDPOINT, json={})
+
+    asyncio.run(scenario())
+
+    assert server.calls == 8 + 10
+
+
 def test_tml_import_is_never_resent_on_ambiguous_network_errors():
     # THE CLIENT METHOD MARKS ITS REQUEST NON-IDEMPOTENT, SO A ReadTimeout MUST
     # SURFACE ON THE FIRST ATTEMPT — THE IMPORT MAY HAVE BEEN APPLIED
@@ -153,3 +288,554 @@ def test_tml_import_is_never_resent_under_server_pressure():
 
     assert r.status_code == 502
     assert server.calls == 1
+
+
+class CountingServer:
+    """An in-memory server which answers every request with the same JSON payload."""
+
+    def __init__(self, payload: object):
+        self.payload = payload
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:  # noqa: ARG002
+        self.calls += 1
+        return httpx.Response(status_code=200, json=self.payload)
+
+
+def fetch_through_cache(directory: pathlib.Path, server: CountingServer, guid: str = "abc") -> httpx.Response:
+    """Search for one object with a fresh, cache-enabled client, flushing the cache on close."""
+
+    async def scenario() -> httpx.Response:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=directory, wrapped_transport=httpx.MockTransport(server)
+        )
+        r = await client.metadata_search(guid=guid)
+        await client.aclose()
+        return r
+
+    return asyncio.run(scenario())
+
+
+def test_cacheable_responses_are_served_from_the_cache(tmp_path):
+    # THE SECOND IDENTICAL SEARCH IS ANSWERED LOCALLY, WITH THE SAME BODY.
+    server = CountingServer(payload=[{"metadata_id": "abc", "metadata_name": "x" * 1_000}])
+
+    first = fetch_through_cache(tmp_path, server)
+    second = fetch_through_cache(tmp_path, server)
+
+    assert server.calls == 1
+    assert second.headers["x-cs-tools-cache-hit"] == "true"
+    assert second.json() == first.json()
+
+
+def test_legacy_cache_records_are_read_and_upgraded(tmp_path):
+    # CACHE FILES WRITTEN BEFORE VERSIONED RECORDS (base64 TEXT) MUST STILL BE HITS.
+    server = CountingServer(payload=[{"metadata_id": "fresh"}])
+    fetch_through_cache(tmp_path, server)
+
+    # REWRITE THE CACHE FILE AS AN OLDER CS TOOLS WOULD HAVE LEFT IT.
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        (key,) = db.execute("SELECT key FROM http_cache").fetchone()
+        db.execute("DROP TABLE http_cache")
+        db.execute(
+            "CREATE TABLE http_cache (key TEXT PRIMARY KEY, status_code INTEGER, headers BLOB, stream TEXT, "
+            "cache_hits INTEGER DEFAULT 0, created_at_utc DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        )
+        db.execute(
+            "INSERT INTO http_cache (key, status_code, headers, stream) VALUES (?, 200, ?, ?)",
+            (key, b"[]", base64.b64encode(b'[{"metadata_id": "legacy"}]').decode("ascii")),
+        )
+
+    r = fetch_through_cache(tmp_path, server)
+
+    assert server.calls == 1
+    assert r.json() == [{"metadata_id": "legacy"}]
+
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        record_format, hits = db.execute("SELECT record_format, cache_hits FROM http_cache").fetchone()
+
+    assert record_format == _transport.RECORD_FORMAT_CURRENT
+    assert hits == 1
+
+
+def test_expired_responses_are_fetched_again(tmp_path):
+    # A RESPONSE PAST ITS ENDPOINT'S TIME-TO-LIVE IS A MISS, NOT A STALE HIT.
+    server = CountingServer(payload=[{"metadata_id": "abc"}])
+    fetch_through_cache(tmp_path, server)
+
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        db.execute("UPDATE http_cache SET expires_at_utc = '2000-01-01 00:00:00'")
+
+    r = fetch_through_cache(tmp_path, server)
+
+    assert server.calls == 2
+    assert "x-cs-tools-cache-hit" not in r.headers
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "api/rest/2.0/metadata/search",
+        "api/rest/2.0/security/metadata/fetch-permissions",
+        "api/rest/2.0/tags/search",
+    ],
+)
+def test_reads_which_may_be_edited_in_the_ui_only_outlive_a_run_briefly(tmp_path, path):
+    # NOTHING INVALIDATES AN EDIT MADE OUTSIDE OF THIS CLIENT, SO THESE MUST NOT SURVIVE FROM ONE DAY TO THE NEXT.
+    cache = _transport.CachePolicy(directory=tmp_path)
+    request = httpx.Request("POST", f"{ANY_CLUSTER}/{path}")
+
+    assert cache.ttl_for(request) <= dt.timedelta(minutes=10)
+
+
+def test_prune_holds_the_cache_to_its_byte_budget(tmp_path):
+    # EVERYTHING OVER BUDGET IS EVICTED, LEAST RECENTLY USED FIRST.
+    for guid in ("oldest", "older", "newest"):
+        server = CountingServer(payload=[{"metadata_id": guid}])
+        fetch_through_cache(tmp_path, server, guid=guid)
+
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        (newest_size,) = db.execute(
+            "SELECT LENGTH(headers) + LENGTH(stream) FROM http_cache ORDER BY created_at_utc DESC"
+        ).fetchone()
+
+    async def scenario() -> int:
+        cache = _transport.CachePolicy(directory=tmp_path)
+        evicted = await cache.prune(max_bytes=newest_size)
+        await cache.aclose()
+        return evicted
+
+    assert asyncio.run(scenario()) == 2
+
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        assert db.execute("SELECT COUNT(*) FROM http_cache").fetchone() == (1,)
+
+    assert fetch_through_cache(tmp_path, server, guid="newest").json() == [{"metadata_id": "newest"}]
+    assert server.calls == 1
+
+
+def test_prune_lets_other_queries_in_between_its_batches(tmp_path, monkeypatch):
+    # A LARGE SWEEP MUST NOT HOLD THE DATABASE FOR ITS WHOLE DURATION.
+    monkeypatch.setattr(_transport.CachePolicy, "SWEEP_BATCH_SIZE", 2)
+
+    for guid in ("a", "b", "c", "d", "e", "f"):
+        fetch_through_cache(tmp_path, CountingServer(payload=[{"metadata_id": guid}]), guid=guid)
+
+    async def scenario() -> tuple[int, list[str]]:
+        cache = _transport.CachePolicy(directory=tmp_path)
+        await cache._setup_database()
+        order: list[str] = []
+
+        async def read_while_pruning() -> None:
+            for _ in range(3):
+                await cache._sql_select(key="anything")
+                order.append("read")
+
+        async def prune() -> int:
+            evicted = await cache.prune(max_bytes=0)
+            order.append("pruned")
+            return evicted
+
+        evicted, _ = await asyncio.gather(prune(), read_while_pruning())
+        await cache.aclose()
+        return evicted, order
+
+    evicted, order = asyncio.run(scenario())
+
+    assert evicted == 6
+    assert order[-1] == "pruned", "reads should get the database between the sweep's batches"
+
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        assert db.execute("SELECT COUNT(*) FROM http_cache").fetchone() == (0,)
+
+
+def test_repeated_reads_in_one_session_are_served_from_memory(tmp_path):
+    # THE SECOND READ NEVER REACHES THE NETWORK OR THE DATABASE.
+    server = CountingServer(payload=[{"metadata_id": "abc"}])
+
+    async def scenario() -> tuple[httpx.Response, dict[str, int]]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        await client.metadata_search(guid="abc")
+        r = await client.metadata_search(guid="abc")
+        stats = dict(client.cache.stats)  # type: ignore[union-attr]
+        await client.aclose()
+        return r, stats
+
+    r, stats = asyncio.run(scenario())
+
+    assert server.calls == 1
+    assert r.json() == [{"metadata_id": "abc"}]
+    assert stats == {"misses": 1, "memory_hits": 1}
+
+
+def test_memory_tier_evicts_least_recently_used_within_its_byte_budget():
+    tier = _transport._MemoryTier(max_bytes=10)
+    never = _transport._utc_now() + dt.timedelta(days=1)
+
+    tier.put("a", status_code=200, headers=[], content=b"aaaa", expires_at=never)
+    tier.put("b", status_code=200, headers=[], content=b"bbbb", expires_at=never)
+    tier.get("a", now=_transport._utc_now())
+    tier.put("c", status_code=200, headers=[], content=b"cccc", expires_at=never)
+
+    assert tier.get("b", now=_transport._utc_now()) is None
+    assert tier.get("a", now=_transport._utc_now()) == (200, [], b"aaaa")
+    assert tier.nbytes == 8
+
+
+def test_concurrent_identical_reads_share_one_request():
+    # FIVE COROUTINES ASKING FOR THE SAME OBJECT AT ONCE COST THE SERVER ONE REQUEST.
+    server = CountingServer(payload=[{"metadata_id": "abc"}])
+
+    async def slow_server(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        return server(request)
+
+    async def scenario() -> list[httpx.Response]:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(slow_server))
+        return await asyncio.gather(*(client.metadata_search(guid="abc") for _ in range(5)))
+
+    responses = asyncio.run(scenario())
+
+    assert server.calls == 1
+    assert all(r.json() == [{"metadata_id": "abc"}] for r in responses)
+    assert len({id(r) for r in responses}) == len(responses), "each caller should get its own response"
+
+
+def test_concurrent_identical_writes_are_never_shared():
+    # ONLY CACHEABLE READS ARE COALESCED, EVERY TML IMPORT REACHES THE SERVER.
+    server = CountingServer(payload=[])
+
+    async def scenario() -> None:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(server))
+        imports = (client.metadata_tml_import(tmls=["guid: fake"], policy="ALL_OR_NONE") for _ in range(3))
+        await asyncio.gather(*imports)
+
+    asyncio.run(scenario())
+
+    assert server.calls == 3
+
+
+def test_expensive_endpoints_cannot_starve_cheap_calls():
+    # TML EXPORTS ARE CAPPED AT THEIR POOL'S SHARE, SO A SEARCH STILL GETS A SLOT WHILE THEY ARE STUCK.
+    release_exports = asyncio.Event()
+    in_flight = {"exports": 0, "peak": 0}
+
+    async def server(request: httpx.Request) -> httpx.Response:
+        if "tml/export" in request.url.path:
+            in_flight["exports"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["exports"])
+            await release_exports.wait()
+            in_flight["exports"] -= 1
+
+        return httpx.Response(status_code=200, json=[])
+
+    async def scenario() -> RESTAPIClient:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, concurrency=8, wrapped_transport=httpx.MockTransport(server))
+        exports = [asyncio.create_task(client.metadata_tml_export(guid=f"guid-{n}")) for n in range(6)]
+
+        search = await asyncio.wait_for(client.metadata_search(guid="abc"), timeout=1)
+        assert search.status_code == 200
+
+        release_exports.set()
+        await asyncio.gather(*exports)
+        return client
+
+    client = asyncio.run(scenario())
+    tml_pool = client._transport.pools["tml"]  # type: ignore[union-attr]
+
+    assert in_flight["peak"] == 2
+    assert tml_pool.acquired == 6
+    assert tml_pool.wait_seconds > 0
+
+
+def test_expensive_endpoints_are_tagged_with_their_pool():
+    # THE TAG ROUTES THE CALL, EVEN WITHOUT A MATCHING PATH.
+    async def scenario() -> RESTAPIClient:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(CountingServer(payload=[])))
+        client._transport.pool_routes = {}  # type: ignore[union-attr]
+
+        await client.metadata_tml_export(guid="guid-1")
+        await client.search_data(logical_table_identifier="guid-1", query_string="[sales]")
+        await client.security_metadata_permissions(guid="guid-1")
+        await client.metadata_search(guid="guid-1")
+        return client
+
+    client = asyncio.run(scenario())
+    pools = client._transport.pools  # type: ignore[union-attr]
+
+    assert {name: pool.acquired for name, pool in pools.items()} == {"tml": 1, "data": 1, "permissions": 1}
+
+
+def test_heartbeat_is_not_starved_by_a_saturated_crawl():
+    # EVERY SLOT IS HELD BY A BACKGROUND CRAWL, WITH MORE QUEUED, YET THE SESSION KEEPALIVE IS ANSWERED AT ONCE.
+    release_crawl = asyncio.Event()
+
+    async def server(request: httpx.Request) -> httpx.Response:
+        if "metadata/search" in request.url.path:
+            await release_crawl.wait()
+
+        return httpx.Response(status_code=200, json=[])
+
+    async def scenario() -> None:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, concurrency=2, wrapped_transport=httpx.MockTransport(server))
+        background = {_concurrency.PRIORITY_HEADER: "background"}
+        crawl = [
+            asyncio.create_task(client.metadata_search(guid=f"guid-{n}", headers=dict(background))) for n in range(8)
+        ]
+        await asyncio.sleep(0.01)
+
+        heartbeat = await asyncio.wait_for(client.request("GET", "callosum/v1/session/isactive"), timeout=1)
+        assert heartbeat.status_code == 200
+        assert client._transport.rate_limit.waiting == 6  # type: ignore[union-attr]
+
+        release_crawl.set()
+        await asyncio.gather(*crawl)
+
+    asyncio.run(scenario())
+
+
+def test_cache_writes_are_batched_and_flushed_on_close(tmp_path):
+    # A FAN-OUT OF READS QUEUES ITS WRITES, WHICH ALL LAND IN THE (WAL-MODE) DATABASE ONCE THE CLIENT CLOSES.
+    server = CountingServer(payload=[{"metadata_id": "abc"}])
+
+    async def scenario() -> int:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        await asyncio.gather(*(client.metadata_search(guid=f"guid-{n}") for n in range(50)))
+        queued = len(client.cache._pending_writes)  # type: ignore[union-attr]
+        await client.aclose()
+        return queued
+
+    assert asyncio.run(scenario()) == 50
+
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        assert db.execute("SELECT COUNT(*) FROM http_cache").fetchone() == (50,)
+        assert db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
+def test_cache_keys_ignore_json_key_order_and_whitespace():
+    a = httpx.Request("POST", f"{ANY_CLUSTER}/{RETRY_SAFE_ENDPOINT}", content=b'{"record_size": 10, "offset": 0}')
+    b = httpx.Request("POST", f"{ANY_CLUSTER}/{RETRY_SAFE_ENDPOINT}", content=b'{ "offset":0,\n "record_size":10 }')
+    c = httpx.Request("POST", f"{ANY_CLUSTER}/{RETRY_SAFE_ENDPOINT}", content=b'{"offset": 10, "record_size": 10}')
+
+    async def keys() -> list[str]:
+        return [await _transport.CachePolicy.build_cache_key(r) for r in (a, b, c)]
+
+    key_a, key_b, key_c = asyncio.run(keys())
+
+    assert key_a == key_b != key_c
+    assert len(key_a) == 40
+
+
+def test_cache_keys_ignore_identifier_order_only_where_the_endpoint_allows_it():
+    forward = [{"identifier": "a"}, {"identifier": "b"}]
+    backward = forward[::-1]
+
+    async def key(path: str, metadata: list) -> str:
+        r = httpx.Request("POST", f"{ANY_CLUSTER}/{path}", json={"metadata": metadata})
+        return await _transport.CachePolicy.build_cache_key(r)
+
+    async def scenario() -> tuple[bool, bool]:
+        search = await key(RETRY_SAFE_ENDPOINT, forward) == await key(RETRY_SAFE_ENDPOINT, backward)
+        export = await key("api/rest/2.0/metadata/tml/export", forward) == await key(
+            "api/rest/2.0/metadata/tml/export", backward
+        )
+        return search, export
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_tml_exports_are_never_served_from_the_cache(tmp_path):
+    # TML IS COMMITTED BY ITS CALLERS, SO AN EDIT MADE IN THE UI MUST ALWAYS BE SEEN.
+    server = CountingServer(payload=[])
+
+    async def scenario() -> None:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        await client.metadata_tml_export(guid="abc")
+        await client.metadata_tml_export(guid="abc")
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+    assert server.calls == 2
+
+
+def test_a_no_cache_request_is_fetched_again_and_refreshes_the_cache(tmp_path):
+    server = CountingServer(payload=[{"metadata_id": "abc"}])
+
+    async def scenario() -> list[httpx.Response]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        await client.metadata_search(guid="abc")
+        client.headers["cache-control"] = "no-cache"
+        refetched = await client.metadata_search(guid="abc")
+        del client.headers["cache-control"]
+        cached = await client.metadata_search(guid="abc")
+        await client.aclose()
+        return [refetched, cached]
+
+    refetched, cached = asyncio.run(scenario())
+
+    assert server.calls == 2
+    assert _transport.CachePolicy.CACHE_FETCHED_HEADER not in refetched.headers
+    assert cached.headers[_transport.CachePolicy.CACHE_FETCHED_HEADER] == "true"
+
+
+def test_cache_rows_keep_a_readable_description_of_the_request(tmp_path):
+    server = CountingServer(payload=[{"metadata_id": "abc"}])
+    fetch_through_cache(tmp_path, server)
+
+    with sqlite3.connect(tmp_path / "http.cache") as db:
+        (description,) = db.execute("SELECT request FROM http_cache").fetchone()
+
+    assert description.startswith("POST customer.thoughtspot.cloud/api/rest/2.0/metadata/search {")
+    assert '"identifier":"abc"' in description
+
+
+def test_mutations_invalidate_the_cached_reads_they_make_stale(tmp_path):
+    # DELETING ONE TABLE REFRESHES READS OF THAT TABLE AND OF TABLE LISTINGS, BUT NOTHING ELSE.
+    deleted, untouched = "0a5f6e4e-5d7e-4c1f-9a3b-2b6c7d8e9f00", "1b6f7e5e-6d8e-4d2f-8a4c-3c7d8e9f0a11"
+    fetched: list[str] = []
+
+    def server(request: httpx.Request) -> httpx.Response:
+        fetched.append(request.content.decode())
+        return httpx.Response(status_code=200, json=[])
+
+    async def scenario() -> None:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        reads = (
+            lambda: client.metadata_search(guid=deleted),
+            lambda: client.metadata_search(guid=untouched),
+            lambda: client.metadata_search(guid=deleted, metadata=[{"type": "LOGICAL_TABLE"}]),
+            lambda: client.metadata_search(guid=deleted, metadata=[{"type": "LIVEBOARD"}]),
+        )
+
+        for read in reads:
+            await read()
+
+        fetched.clear()
+        await client.metadata_delete(guid=deleted, metadata=[{"identifier": deleted, "type": "LOGICAL_TABLE"}])
+
+        for read in reads:
+            await read()
+
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+    delete, *refetched = fetched
+    assert "metadata" in delete
+    assert len(refetched) == 2
+    assert deleted in refetched[0]
+    assert "LOGICAL_TABLE" in refetched[1]
+
+
+def test_mutations_invalidate_cached_dependents_and_permissions_of_other_objects(tmp_path):
+    parent, dependent = "0a5f6e4e-5d7e-4c1f-9a3b-2b6c7d8e9f00", "1b6f7e5e-6d8e-4d2f-8a4c-3c7d8e9f0a11"
+    server = CountingServer(payload=[])
+
+    async def scenario() -> None:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        reads = (
+            lambda: client.metadata_search(guid=parent, include_dependent_objects=True),
+            lambda: client.security_metadata_permissions(guid=parent, metadata=[{"identifier": parent}]),
+        )
+
+        for read in reads:
+            await read()
+
+        await client.metadata_delete(guid=dependent, metadata=[{"identifier": dependent, "type": "LIVEBOARD"}])
+
+        for read in reads:
+            await read()
+
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+    assert server.calls == 2 + 1 + 2, "deleting a dependent changes what its parent's relationships look like"
+
+
+def test_a_loop_of_mutations_searches_the_cache_once_and_keeps_unaffected_reads_in_memory(tmp_path):
+    deleted = [f"0a5f6e4e-5d7e-4c1f-9a3b-2b6c7d8e9{i:03x}" for i in range(50)]
+    untouched = "1b6f7e5e-6d8e-4d2f-8a4c-3c7d8e9f0a11"
+    server = CountingServer(payload=[])
+
+    async def scenario() -> tuple[int, Union[str, None], dict[str, int]]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        await client.metadata_search(guid=deleted[0])
+        await client.metadata_search(guid=untouched)
+
+        for guid in deleted:
+            await client.metadata_delete(guid=guid, metadata=[{"identifier": guid, "type": "LOGICAL_TABLE"}])
+
+        assert client.cache is not None
+        scans_before_reading = client.cache.stats["invalidation_scans"]
+
+        untouched_read = await client.metadata_search(guid=untouched)
+        await client.metadata_search(guid=deleted[0])
+        await client.aclose()
+
+        tier = untouched_read.headers.get(_transport.CachePolicy.CACHE_TIER_HEADER)
+        return scans_before_reading, tier, dict(client.cache.stats)
+
+    scans_before_reading, tier, stats = asyncio.run(scenario())
+
+    assert scans_before_reading == 0, "mutations alone should never scan the cache"
+    assert stats["invalidation_scans"] == 1
+    assert tier == "memory", "a read the mutations did not touch should stay in memory"
+    assert server.calls == 2 + len(deleted) + 1
+
+
+def test_imports_are_never_cached_and_invalidate_the_reads_they_make_stale(tmp_path):
+    # A RE-RUN IMPORT MUST REACH THE SERVER, IT RETURNS 200 EVEN WHEN ITS OBJECTS FAIL.
+    fetched: list[str] = []
+
+    def server(request: httpx.Request) -> httpx.Response:
+        fetched.append(request.url.path)
+        return httpx.Response(status_code=200, json=[])
+
+    async def scenario() -> list[httpx.Response]:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        imports = []
+
+        for _ in range(2):
+            await client.metadata_search(guid="abc")
+            await client.metadata_tml_export(guid="abc")
+            imports.append(await client.metadata_tml_import(tmls=["guid: abc"], policy="ALL_OR_NONE"))
+
+        await client.aclose()
+        return imports
+
+    imports = asyncio.run(scenario())
+
+    assert [path.rsplit("2.0/", 1)[-1] for path in fetched] == [
+        "metadata/search",
+        "metadata/tml/export",
+        "metadata/tml/import",
+    ] * 2
+    assert all(_transport.CachePolicy.CACHE_TIER_HEADER not in r.headers for r in imports)
+
+
+def test_cache_keys_are_scoped_to_the_user_and_org_which_asked():
+    request = httpx.Request("POST", f"{ANY_CLUSTER}/{RETRY_SAFE_ENDPOINT}", json={"metadata": []})
+
+    async def keys() -> set[str]:
+        namespaces = ("", "user-a@0", "user-a@1", "user-b@0")
+        return {await _transport.CachePolicy.build_cache_key(request, namespace=ns) for ns in namespaces}
+
+    assert len(asyncio.run(keys())) == 4
@@ -0,0 +1,137 @@
+"""
+Tests for calling RESTAPIClient endpoints through the trusted, non-validating path.
+
+Internal workflows call some endpoints tens of thousands of times with arguments which
+are already known-good, so they may skip pydantic's validation of every call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import timeit
+
+from cs_tools.api.client import RESTAPIClient
+import httpx
+import pydantic
+import pytest
+
+ANY_CLUSTER = "https://customer.thoughtspot.cloud"
+
+
+def send_both_ways(endpoint: str, **arguments) -> list[httpx.Request]:
+    seen: list[httpx.Request] = []
+
+    def server(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(status_code=200, json=[])
+
+    async def scenario() -> None:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(server))
+        await getattr(client, endpoint)(**arguments)
+        await getattr(client.trusted, endpoint)(**arguments)
+        await client.aclose()
+
+    asyncio.run(scenario())
+    return seen
+
+
+def never_called(request: httpx.Request) -> httpx.Response:
+    raise AssertionError(f"unexpected request to {request.url}")
+
+
+@pytest.mark.parametrize(
+    "endpoint, arguments",
+    [
+        ("metadata_search", {"guid": "", "record_size": 5_000, "metadata": [{"identifier": "abc"}]}),
+        ("tags_assign", {"guid": "abc", "tag": "stale"}),
+        ("metadata_delete", {"guid": "abc"}),
+        ("security_metadata_permissions", {"guid": "abc", "record_size": -1}),
+    ],
+)
+def test_trusted_calls_send_the_same_request(endpoint, arguments):
+    validated, trusted = send_both_ways(endpoint, **arguments)
+
+    assert trusted.url == validated.url
+    assert json.loads(trusted.content) == json.loads(validated.content)
+
+
+def test_trusted_calls_are_still_cacheable(tmp_path):
+    calls = 0
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        nonlocal calls
+        calls += 1
+        return httpx.Response(status_code=200, json=[])
+
+    async def scenario() -> None:
+        client = RESTAPIClient(
+            base_url=ANY_CLUSTER, cache_directory=tmp_path, wrapped_transport=httpx.MockTransport(server)
+        )
+        await client.metadata_search(guid="abc")
+        await client.trusted.metadata_search(guid="abc")
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+    assert calls == 1, "the trusted call should be answered from the cache"
+
+
+def test_user_facing_calls_are_still_validated():
+    client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(never_called))
+
+    with pytest.raises(pydantic.ValidationError):
+        client.tags_assign(guid=["abc"], tag="stale")
+
+    with pytest.raises(AttributeError, match="not a validated endpoint"):
+        client.trusted.stream_json_array  # noqa: B018
+
+
+def test_trusted_calls_skip_validating_the_request_too(monkeypatch):
+    validated: list[str] = []
+    send_validated_request = RESTAPIClient._send_validated_request
+
+    async def spy(self, method, url, **passthru) -> httpx.Response:
+        validated.append(str(url))
+        return await send_validated_request(self, method, url, **passthru)
+
+    monkeypatch.setattr(RESTAPIClient, "_send_validated_request", spy)
+    send_both_ways("metadata_search", guid="abc")
+
+    assert validated == ["api/rest/2.0/metadata/search"], "only the user-facing call should be validated"
+
+
+@pytest.mark.skipif(not os.getenv("CS_TOOLS_BENCHMARK"), reason="a timing benchmark, set CS_TOOLS_BENCHMARK=1 to run")
+def test_trusted_calls_skip_the_validation_overhead(capsys):
+    metadata = [{"type": "LIVEBOARD", "identifier": f"guid-{n}"} for n in range(25)]
+
+    def server(request: httpx.Request) -> httpx.Response:  # noqa: ARG001
+        return httpx.Response(status_code=200, json=[])
+
+    # THE WHOLE AWAITED CALL IS MEASURED, ANSWERED BY AN IN-MEMORY SERVER.
+    async def per_call(number: int, rounds: int) -> tuple[float, float]:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(server))
+        timings: dict[bool, list[float]] = {False: [], True: []}
+
+        # INTERLEAVED, SO NEITHER SIDE IS FAVOURED BY WARM-UP OR BY A NOISY MOMENT.
+        for _, trusted in itertools.product(range(rounds), (False, True)):
+            endpoint = client.trusted.metadata_search if trusted else client.metadata_search
+            start = timeit.default_timer()
+
+            for _ in range(number):
+                await endpoint(guid="", record_size=5_000, metadata=metadata)
+
+            timings[trusted].append((timeit.default_timer() - start) / number)
+
+        await client.aclose()
+        return min(timings[False]), min(timings[True])
+
+    validated, trusted = asyncio.run(per_call(number=100, rounds=30))
+
+    with capsys.disabled():
+        print(f"\nmetadata_search awaited per-call: validated={validated * 1e6:.1f}us trusted={trusted * 1e6:.1f}us")  # noqa: T201
+
+    # NEXT TO THE TRANSPORT THE SAVING IS SMALL, SO THIS ONLY GUARDS THE TRUSTED PATH AGAINST GROWING SLOWER.
+    assert trusted < validated * 1.1
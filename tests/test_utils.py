@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import pathlib
 
 from cs_tools import utils
@@ -8,3 +9,23 @@ import cs_tools
 
 def test_get_package_directory():
     assert utils.get_package_directory("cs_tools") == pathlib.Path(cs_tools.__file__).parent
+
+
+def test_read_ahead_closes_its_source_when_the_caller_stops_early():
+    closed = []
+
+    async def source():
+        try:
+            for n in range(10):
+                yield n
+        finally:
+            closed.append(True)
+
+    async def scenario() -> int:
+        items = utils.read_ahead(source(), n=1)
+        first = await items.__anext__()
+        await items.aclose()
+        assert closed, "the source should be closed along with read_ahead"
+        return first
+
+    assert asyncio.run(scenario()) == 0
@@ -26,9 +26,14 @@ import math
 
 from cs_tools import _compat
 from cs_tools.api.client import RESTAPIClient
-from cs_tools.api.workflows import metadata as metadata_workflow
+from cs_tools.api.workflows import (
+    metadata as metadata_workflow,
+    utils as workflow_utils,
+)
+import awesomeversion
 import httpx
 import pytest
+import thoughtspot_tml
 
 ANY_CLUSTER = "https://customer.thoughtspot.cloud"
 
@@ -149,3 +154,333 @@ def test_c_a_failing_batch_aborts_and_raises_the_current_contract():
 
     with pytest.raises(_compat.ExceptionGroup):
         asyncio.run(scenario())
+
+
+def test_d_a_failing_permissions_batch_is_bisected_down_to_the_offending_object():
+    def respond(request: httpx.Request) -> Union[int, Exception]:
+        return 500 if b"BOOM" in request.content else 200
+
+    server = RecordingServer(respond=respond)
+    guids = [f"tbl-{i}" for i in range(20)]
+    guids[13] = "BOOM-13"
+
+    async def scenario() -> list:
+        client = make_client(server)
+        return await metadata_workflow.permissions(
+            typed_guids={"LOGICAL_TABLE": guids},
+            compat_ts_version=awesomeversion.AwesomeVersion("10.4.0"),
+            http=client,
+        )
+
+    results = asyncio.run(scenario())
+    succeeded = [b for b, r in zip(server.sent_identifiers(), server.requests) if b"BOOM" not in r.content]
+
+    assert ["BOOM-13"] in server.sent_identifiers(), "the offending object should be tried alone"
+    assert sorted(g for batch in succeeded for g in batch) == sorted(set(guids) - {"BOOM-13"})
+    assert len(results) == len(succeeded)
+
+
+def test_d_bisected_permissions_batches_wait_their_turn():
+    in_flight = most_in_flight = 0
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return httpx.Response(status_code=500 if b"BOOM" in request.content else 200, json=[{"metadata_id": "OK"}])
+
+    # EVERY FIFTH OBJECT FAILS, SO EACH BATCH IS SPLIT MANY TIMES OVER.
+    guids = [f"BOOM-{i}" if i % 5 == 0 else f"tbl-{i}" for i in range(100)]
+
+    async def scenario() -> list:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(respond))
+        return await metadata_workflow.permissions(
+            typed_guids={"LOGICAL_TABLE": guids},
+            compat_ts_version=awesomeversion.AwesomeVersion("10.4.0"),
+            http=client,
+        )
+
+    results = asyncio.run(scenario())
+
+    assert len(results) >= 80 // EXPECTED_MAX_PER_REQUEST, "the healthy objects are still fetched"
+    assert most_in_flight <= 5, "the halves of a split batch go back behind the concurrency limit"
+
+
+def test_d_a_slow_permissions_batch_is_allowed_to_finish(monkeypatch):
+    monkeypatch.setattr(metadata_workflow, "_SLOW_PERMISSIONS_BATCH_SECONDS", 0.01)
+    server = RecordingServer(respond=lambda _: 200)
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        return server(request)
+
+    async def scenario() -> list:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(slow))
+        return await metadata_workflow.permissions(
+            typed_guids={"LOGICAL_TABLE": [f"tbl-{i}" for i in range(20)]},
+            compat_ts_version=awesomeversion.AwesomeVersion("10.4.0"),
+            http=client,
+        )
+
+    results = asyncio.run(scenario())
+
+    assert len(server.requests) == 1, "the slow batch is neither cancelled nor re-sent in halves"
+    assert len(results) == 1
+
+
+def test_d_a_rejected_permissions_batch_is_skipped_rather_than_bisected():
+    def respond(request: httpx.Request) -> int:
+        return 403 if b"DENIED" in request.content else 200
+
+    server = RecordingServer(respond=respond)
+    denied = [f"DENIED-{i}" for i in range(5)]
+    allowed = [f"tbl-{i}" for i in range(20)]
+
+    async def scenario() -> list:
+        client = make_client(server)
+        return await metadata_workflow.permissions(
+            typed_guids={"LOGICAL_VIEW": denied, "LOGICAL_TABLE": allowed},
+            compat_ts_version=awesomeversion.AwesomeVersion("10.4.0"),
+            http=client,
+        )
+
+    results = asyncio.run(scenario())
+
+    assert server.sent_identifiers().count(denied) == 1, "a rejected batch is neither split nor retried"
+    assert sorted(g for batch in server.sent_identifiers() for g in batch if g in allowed) == sorted(allowed)
+    assert len(results) == len(server.requests) - 1, "the other batches' results still come back"
+
+
+def test_e_permissions_batches_adapt_to_the_server():
+    batch_size = workflow_utils.AdaptiveBatchSize(initial=25, maximum=100, target_seconds=10.0)
+
+    batch_size.record(size=25, seconds=1.0, nbytes=1_024)
+    assert batch_size.size == 50, "a fast batch at most doubles"
+
+    batch_size.record(size=50, seconds=15.0, nbytes=1_024)
+    assert batch_size.size == 33, "a slow batch shrinks towards the target"
+
+    batch_size.record(size=33, seconds=1.0, nbytes=batch_size.target_bytes * 2)
+    assert batch_size.size == 16, "a large response shrinks the batch too"
+
+    batch_size.record_failure(size=16)
+    assert batch_size.size == 8
+
+
+def test_f_tml_is_exported_in_batches_and_failures_are_retried_alone(tmp_path):
+    exported_alone: list[str] = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        guids = [m["identifier"] for m in json.loads(request.content)["metadata"]]
+
+        if len(guids) == 1:
+            exported_alone.extend(guids)
+
+        # A BATCH WITH AN OVERSIZED OBJECT IS REJECTED WHOLESALE.
+        if len(guids) > 1 and "HUGE-7" in guids:
+            return httpx.Response(status_code=500, json={"error": "too large"})
+
+        # A FLAKY OBJECT ONLY FAILS ALONGSIDE OTHERS.
+        docs = [
+            {
+                "edoc": f"guid: {guid}",
+                "info": {
+                    "id": guid,
+                    "type": "table",
+                    "status": {"status_code": "ERROR" if guid == "FLAKY-3" and len(guids) > 1 else "OK"},
+                },
+            }
+            for guid in guids
+        ]
+        return httpx.Response(status_code=200, json=docs)
+
+    guids = [f"tbl-{i}" for i in range(30)]
+    guids[3], guids[7] = "FLAKY-3", "HUGE-7"
+
+    async def scenario() -> list:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(respond))
+        # ONE WORKER, SO NONE CAN CUT A BATCH OF ONE WHILE A FAILURE HAS SHRUNK THE SHARED BATCH SIZE.
+        exports = metadata_workflow.tml_export_batched(guids, directory=tmp_path, concurrency=1, http=client)
+        return await workflow_utils.collect(exports)
+
+    results = asyncio.run(scenario())
+
+    assert sorted(r["info"]["id"] for r in results) == sorted(guids)
+    assert all(r["info"]["status"]["status_code"] == "OK" for r in results)
+    assert sorted(exported_alone) == ["FLAKY-3", "HUGE-7"], "only failed objects should be exported alone"
+    assert sorted(p.stem for p in tmp_path.joinpath("table").iterdir()) == sorted(f"{g}.table" for g in guids)
+
+
+def test_f_tml_exports_wait_for_a_slow_consumer():
+    requested: list[str] = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        guids = [m["identifier"] for m in json.loads(request.content)["metadata"]]
+        requested.extend(guids)
+        docs = [{"edoc": "", "info": {"id": guid, "type": "table", "status": {"status_code": "OK"}}} for guid in guids]
+        return httpx.Response(status_code=200, json=docs)
+
+    guids = [f"tbl-{i}" for i in range(2_000)]
+
+    async def scenario() -> None:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(respond))
+        exports = metadata_workflow.tml_export_batched(guids, concurrency=2, http=client)
+
+        await exports.__anext__()
+        await asyncio.sleep(0.2)
+        await exports.aclose()
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+    # AT MOST A FULL QUEUE (100 PER WORKER) AND THE BATCH EACH WORKER HOLDS, NOT EVERY OBJECT.
+    assert len(requested) <= 2 * 100 + 2 * 100, "exports should stop while the consumer is behind"
+
+
+def test_g_tml_imports_are_planned_in_dependency_waves():
+    table = thoughtspot_tml.Table.loads(
+        "guid: tbl-1\ntable:\n  name: SALES\n  db: DB\n  schema: S\n  db_table: SALES\n"
+    )
+    worksheet = thoughtspot_tml.Worksheet.loads(
+        "guid: ws-1\nworksheet:\n  name: Sales WS\n  tables:\n  - name: SALES\n    fqn: tbl-1\n"
+    )
+    # A WORKSHEET BUILT ON ANOTHER WORKSHEET MUST WAIT FOR IT, EVEN THOUGH THEY'RE THE SAME TYPE.
+    derived = thoughtspot_tml.Worksheet.loads(
+        "guid: ws-2\nworksheet:\n  name: Derived WS\n  tables:\n  - name: Sales WS\n    fqn: ws-1\n"
+    )
+    liveboard = thoughtspot_tml.Liveboard.loads(
+        "guid: lb-1\nliveboard:\n  name: LB\n  visualizations:\n"
+        "  - id: Viz_1\n    answer:\n      name: A\n      tables:\n      - name: Derived WS\n        fqn: ws-2\n"
+    )
+
+    waves = metadata_workflow.tml_import_waves([liveboard, derived, worksheet, table])
+
+    assert [[tml.guid for tml in wave] for wave in waves] == [["tbl-1"], ["ws-1"], ["ws-2"], ["lb-1"]]
+
+
+def test_g_waves_of_objects_which_may_refer_to_each_other_by_name_are_not_imported_at_once():
+    view = thoughtspot_tml.View.loads("guid: vw-1\nview:\n  name: Sales View\n")
+    # NAMES THE VIEW, BUT HAS NO FQN TO ORDER IT BY.
+    worksheet = thoughtspot_tml.Worksheet.loads(
+        "guid: ws-1\nworksheet:\n  name: Sales WS\n  tables:\n  - name: Sales View\n"
+    )
+    answers = [thoughtspot_tml.Answer.loads(f"guid: ans-{i}\nanswer:\n  name: A{i}\n") for i in range(2)]
+
+    (data_models,) = metadata_workflow.tml_import_waves([worksheet, view])
+
+    assert not metadata_workflow.tml_import_wave_is_independent(data_models)
+    assert metadata_workflow.tml_import_wave_is_independent(answers)
+
+
+def test_h_tml_is_imported_in_bounded_chunks_which_fail_independently():
+    in_flight = most_in_flight = 0
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+        tmls = json.loads(request.content)["metadata_tmls"]
+        status = "ERROR" if any("BAD" in tml for tml in tmls) else "OK"
+        return httpx.Response(status_code=200, json=[{"response": {"status": {"status_code": status}}} for _ in tmls])
+
+    tmls = [
+        thoughtspot_tml.Table.loads(f"guid: tbl-{i}\ntable:\n  name: {'BAD' if i == 5 else 'T'}{i}\n")
+        for i in range(10)
+    ]
+
+    async def scenario() -> list:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(respond))
+        chunks = metadata_workflow.tml_import_chunked(tmls, chunk_size=3, concurrency=2, http=client)
+        return await workflow_utils.collect(chunks)
+
+    chunks = asyncio.run(scenario())
+    statuses = {tml.guid: r["response"]["status"]["status_code"] for chunk, rs in chunks for tml, r in zip(chunk, rs)}
+
+    assert sorted(len(chunk) for chunk, _ in chunks) == [1, 3, 3, 3]
+    assert most_in_flight == 2
+    assert sorted(guid for guid, status in statuses.items() if status == "ERROR") == ["tbl-3", "tbl-4", "tbl-5"]
+
+
+def test_h_a_chunked_import_sends_nothing_after_the_caller_stops():
+    server = RecordingServer(respond=lambda _: 200)
+
+    tmls = [thoughtspot_tml.Table.loads(f"guid: tbl-{i}\ntable:\n  name: T{i}\n") for i in range(10)]
+
+    async def scenario() -> None:
+        client = make_client(server)
+        chunks = metadata_workflow.tml_import_chunked(tmls, chunk_size=3, concurrency=1, http=client)
+
+        async for _ in chunks:
+            await asyncio.sleep(0.01)
+            break
+
+        await chunks.aclose()
+
+    asyncio.run(scenario())
+
+    assert len(server.requests) == 1, "an ALL_OR_NONE deploy must be able to stop at its first failed chunk"
+
+
+def test_i_streamed_fetches_run_concurrently_and_skip_failing_batches():
+    in_flight = most_in_flight = 0
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+        guids = [m["identifier"] for m in json.loads(request.content)["metadata"]]
+
+        if "BOOM-0" in guids:
+            return httpx.Response(status_code=400, json={"error": "nope"})
+
+        return httpx.Response(status_code=200, json=[{"metadata_id": guid} for guid in guids])
+
+    guids = [f"tbl-{i}" for i in range(100)]
+    guids[0] = "BOOM-0"
+
+    async def scenario() -> list:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(respond))
+        objects = metadata_workflow.fetch_iter({"LOGICAL_TABLE": guids}, concurrency=3, http=client)
+        return await workflow_utils.collect(objects)
+
+    fetched = asyncio.run(scenario())
+
+    assert sorted(_["metadata_id"] for _ in fetched) == sorted(guids[EXPECTED_MAX_PER_REQUEST:])
+    assert most_in_flight == 3
+
+
+def test_j_every_object_is_listed_page_by_page_and_failing_types_are_skipped():
+    objects = {"LOGICAL_TABLE": [f"tbl-{i}" for i in range(7)], "LIVEBOARD": [f"pin-{i}" for i in range(2)]}
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        metadata_type = payload["metadata"][0]["type"]
+
+        if metadata_type not in objects:
+            return httpx.Response(status_code=400, json={"error": "nope"})
+
+        offset, size = payload["record_offset"], payload["record_size"]
+        return httpx.Response(
+            status_code=200, json=[{"metadata_id": guid} for guid in objects[metadata_type][offset : offset + size]]
+        )
+
+    async def scenario() -> tuple[list, list]:
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(respond))
+        types = ["LOGICAL_TABLE", "LIVEBOARD", "ANSWER"]
+        pages = await workflow_utils.collect(metadata_workflow.fetch_all_iter(types, record_size=3, http=client))
+        listed = await metadata_workflow.fetch_all(types, record_size=3, http=client)
+        return pages, listed
+
+    pages, listed = asyncio.run(scenario())
+
+    assert max(len(page) for page in pages) == 3, "objects should arrive a page at a time"
+    assert sorted(_["metadata_id"] for page in pages for _ in page) == sorted(_["metadata_id"] for _ in listed)
+    assert sorted(_["metadata_id"] for _ in listed) == sorted(objects["LOGICAL_TABLE"] + objects["LIVEBOARD"])
@@ -0,0 +1,150 @@
+"""
+Tests for the paginated crawl helpers in cs_tools.api.workflows.utils.
+
+The server below serves a fixed listing, `record_size` records at a time, and counts
+how many pages it was asked for.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+from cs_tools.api import workflows
+from cs_tools.api.client import RESTAPIClient
+import httpx
+
+ANY_CLUSTER = "https://customer.thoughtspot.cloud"
+
+
+class ListingServer:
+    def __init__(self, records: int, *, fail_at_offset: int = -1, filtered: frozenset[int] = frozenset()):
+        self.listing = [{"id": f"user-{n}"} for n in range(records)]
+        self.fail_at_offset = fail_at_offset
+        self.filtered = filtered
+        self.offsets: list[int] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        offset, size = body["record_offset"], body["record_size"]
+        self.offsets.append(offset)
+
+        if offset == self.fail_at_offset:
+            return httpx.Response(status_code=500, json={"error": "nope"})
+
+        page = [r for n, r in enumerate(self.listing[offset : offset + size], start=offset) if n not in self.filtered]
+        return httpx.Response(status_code=200, json=page)
+
+
+def crawl(server: ListingServer, consume):
+    async def scenario():
+        client = RESTAPIClient(base_url=ANY_CLUSTER, wrapped_transport=httpx.MockTransport(server))
+        result = await consume(client)
+        await client.aclose()
+        return result
+
+    return asyncio.run(scenario())
+
+
+def test_paginator_still_returns_every_record():
+    server = ListingServer(records=5)
+    records = crawl(server, lambda client: workflows.paginator(client.users_search, record_size=2))
+
+    assert records == server.listing
+    assert server.offsets == [0, 2, 4, 5]
+
+
+def test_pages_are_yielded_as_they_arrive_with_bounded_read_ahead():
+    server = ListingServer(records=100)
+
+    async def consume(client):
+        pages = workflows.iter_pages(client.users_search, record_size=2, read_ahead=1)
+
+        async for page in pages:
+            # GIVE THE CRAWL EVERY CHANCE TO RUN AWAY FROM US.
+            await asyncio.sleep(0.05)
+            requested = len(server.offsets)
+            await pages.aclose()
+            return page, requested
+
+    page, requested = crawl(server, consume)
+
+    assert page == server.listing[:2]
+    assert requested <= 3, "only the read-ahead page (and the one waiting to be queued) should be fetched"
+
+
+def test_records_stop_at_the_first_failed_page():
+    server = ListingServer(records=10, fail_at_offset=4)
+
+    async def consume(client):
+        return await workflows.collect(workflows.iter_records(client.users_search, record_size=2))
+
+    assert crawl(server, consume) == server.listing[:4]
+
+
+def test_prefetched_pages_arrive_in_order_and_stop_at_an_empty_page():
+    server = ListingServer(records=7)
+    records = crawl(server, lambda client: workflows.paginator(client.users_search, record_size=2, prefetch=3))
+
+    assert records == server.listing
+    assert sorted(server.offsets) == [0, 2, 4, 6, 8, 10], "the window widens 1, 2, 3 and the empty page is discarded"
+
+
+def test_prefetching_a_short_listing_costs_no_more_requests_than_a_serial_crawl():
+    server = ListingServer(records=1)
+    records = crawl(server, lambda client: workflows.paginator(client.users_search, record_size=2, prefetch=4))
+
+    assert records == server.listing
+    assert server.offsets == [0, 2]
+
+
+def test_a_filtered_page_mid_listing_does_not_end_the_crawl_in_either_mode():
+    filtered = frozenset({5})
+    expected = [r for n, r in enumerate(ListingServer(records=12).listing) if n not in filtered]
+
+    def ids(records: list) -> list[str]:
+        return list(dict.fromkeys(r["id"] for r in records))
+
+    serial = crawl(
+        ListingServer(records=12, filtered=filtered),
+        lambda client: workflows.paginator(client.users_search, record_size=2),
+    )
+    prefetched = crawl(
+        ListingServer(records=12, filtered=filtered),
+        lambda client: workflows.paginator(client.users_search, record_size=2, prefetch=3),
+    )
+
+    assert ids(prefetched) == ids(serial) == ids(expected)
+
+
+def test_prefetched_pages_are_requested_concurrently():
+    server = ListingServer(records=12)
+    in_flight = most_in_flight = 0
+
+    async def slow_server(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return server(request)
+
+    records = crawl(slow_server, lambda client: workflows.paginator(client.users_search, record_size=2, prefetch=3))
+
+    assert records == server.listing
+    assert most_in_flight == 3
+
+
+def test_prefetched_records_are_deduplicated_when_the_listing_shifts():
+    server = ListingServer(records=6)
+
+    def shifting_server(request: httpx.Request) -> httpx.Response:
+        # AN OBJECT WAS CREATED MID-CRAWL, SO EVERY PAGE AFTER THE FIRST BEGINS ONE RECORD EARLIER.
+        if (offset := json.loads(request.content)["record_offset"]) > 0:
+            return httpx.Response(status_code=200, json=server.listing[offset - 1 : offset + 1])
+
+        return server(request)
+
+    records = crawl(shifting_server, lambda client: workflows.paginator(client.users_search, record_size=2, prefetch=2))
+
+    assert records == server.listing